@@ -0,0 +1,318 @@
+# backend/api/ai/intent.py
+"""
+Intent matcher for Turkish Airlines queries (fast path before the LLM)
+"""
+import re
+import datetime
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+import pytz
+
+_TURKEY_TZ = pytz.timezone('Europe/Istanbul')
+
+# Entity patterns, compiled once
+_FLIGHT_RE = re.compile(r'\b(TK|PC|AJ)\s?(\d{1,4}[A-Z]?)\b', re.I)
+# YYYY-MM-DD | D(D).M(M).YYYY | words; the two numeric forms share their first digit so it is tested once
+_DATE_RE = re.compile(r'(\d(?:\d{3}-\d{2}-\d{2}|\d?[./-]\d{1,2}[./-]\d{4})|bugün|today|yarın|tomorrow)', re.I)
+_AIRPORT_RE = re.compile(r'\b([A-Z]{3})\b')
+_PNR_RE = re.compile(r'\b([A-Z0-9]{6})\b')
+_SURNAME_RE = re.compile(r'(soyad[ıi]?\s*[:=]?\s*|surname\s*[:=]?\s*)([A-Za-zÇĞİÖŞÜçğıöşü\s\'-]{2,})', re.I)
+_PASSENGER_RE = re.compile(r'(\d+)\s*(kişi|kisi|passenger|adult)')
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+_DATE_SPLIT_RE = re.compile(r'[./-]')
+# PNR typed in lower case: 6 characters mixing letters and digits
+_PNR_MIXED_RE = re.compile(r'\b(?=[a-z]*\d)(?=\d*[a-z])[a-z0-9]{6}\b', re.I)
+_NUMBER_RE = re.compile(r'\d+')
+
+# Keyword groups; a group "hits" when any of its keywords occurs as a substring
+KEYWORD_GROUPS: Dict[str, tuple] = {
+    "status": ("durum", "status"),
+    "booking": ("rezervasyon", "pnr", "booking"),
+    "flight": ("uçuş", "ucus", "bilet", "flight"),
+    "mil": ("mil",),
+    "expiry": ("bitiyor", "son"),
+    "expiring_miles": ("expiring miles",),
+    "my_flights": ("uçuşlarım", "ucuslarim", "my flights"),
+    "guide": ("rehber", "guide", "gez"),
+    "promo": ("promosyon", "kampanya", "promotion"),
+    "baggage": ("bagaj", "bavul", "baggage"),
+    "profile": ("profil", "hesap", "profile", "miles"),
+    "ping": ("test", "ping", "bağlantı"),
+}
+
+
+def _trie_pattern(words) -> str:
+    """Regex alternation shaped as a prefix trie; optional tails are greedy, so it matches the longest word"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _compile_keyword_matcher(groups: Dict[str, tuple]):
+    """
+    Build a single-pass matcher over every keyword.
+
+    The pattern is a lookahead, so findall() reports the longest keyword
+    starting at every position, overlapping ones included ("ping" and
+    "guide" in "pinguide"). Keywords contained in a reported one ("mil" in
+    "miles") are implied by it, so each hit maps straight to all its groups.
+    """
+    keywords = sorted({kw for kws in groups.values() for kw in kws})
+    first_chars = re.escape("".join(sorted({kw[0] for kw in keywords})))
+    # The leading character class lets the engine skip positions no keyword can start at
+    pattern = re.compile(f"(?=[{first_chars}])(?=({_trie_pattern(keywords)}))")
+    implied = {
+        kw: frozenset(g for g, kws in groups.items() for other in kws if other in kw)
+        for kw in keywords
+    }
+    return pattern, implied
+
+
+_KEYWORD_RE, _KEYWORD_IMPLIED = _compile_keyword_matcher(KEYWORD_GROUPS)
+_NO_GROUPS: FrozenSet[str] = frozenset()
+
+
+def keyword_groups(text: str) -> FrozenSet[str]:
+    """Return the keyword groups present in an already lower-cased text."""
+    hits = _KEYWORD_RE.findall(text)
+    if not hits:
+        return _NO_GROUPS
+    return _NO_GROUPS.union(*map(_KEYWORD_IMPLIED.__getitem__, hits))
+
+
+# (valid until epoch seconds, today, tomorrow); datetime.now(tz) costs ~10us, the day changes once a day
+_turkey_day_cache: Tuple[float, str, str] = (0.0, "", "")
+
+
+def _turkey_days() -> tuple:
+    """Return (today, tomorrow) as YYYY-MM-DD strings in Turkey time."""
+    global _turkey_day_cache
+    if time.time() >= _turkey_day_cache[0]:
+        today_date = datetime.datetime.now(_TURKEY_TZ).date()
+        tomorrow_date = today_date + datetime.timedelta(days=1)
+        midnight = _TURKEY_TZ.localize(datetime.datetime.combine(tomorrow_date, datetime.time.min)).timestamp()
+        _turkey_day_cache = (midnight, today_date.strftime('%Y-%m-%d'), tomorrow_date.strftime('%Y-%m-%d'))
+    return _turkey_day_cache[1], _turkey_day_cache[2]
+
+
+def parse_date(date_str: Optional[str]) -> str:
+    """Convert various date formats to YYYY-MM-DD using Turkey timezone"""
+    if not date_str:
+        return _turkey_days()[0]
+
+    date_str = date_str.lower()
+    if date_str in ('bugün', 'today'):
+        return _turkey_days()[0]
+    elif date_str in ('yarın', 'tomorrow'):
+        return _turkey_days()[1]
+
+    if _ISO_DATE_RE.match(date_str):
+        return date_str
+
+    parts = _DATE_SPLIT_RE.split(date_str)
+    if len(parts) == 3:
+        if len(parts[2]) == 4:  # DD-MM-YYYY
+            day, month, year = parts
+        else:  # YYYY-MM-DD
+            year, month, day = parts
+        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+
+    return _turkey_days()[0]
+
+
+def extract_entities(message: str) -> Tuple[str, ...]:
+    """
+    Flight numbers, PNRs, IATA codes, dates and other numbers in a message,
+    normalized and sorted. An answer to a message with entities is about that
+    flight/booking, so it must never be reused for a merely similar message.
+    """
+    found = set()
+    for m in _FLIGHT_RE.finditer(message):
+        found.add(f"flight:{m.group(1).upper()}{m.group(2).upper()}")
+    for m in _DATE_RE.finditer(message):
+        found.add(f"date:{parse_date(m.group(1))}")
+    for code in _AIRPORT_RE.findall(message):
+        found.add(f"iata:{code}")
+    for m in _PNR_RE.finditer(message):
+        found.add(f"pnr:{m.group(1)}")
+    for m in _PNR_MIXED_RE.finditer(message):
+        found.add(f"pnr:{m.group().upper()}")
+    for number in _NUMBER_RE.findall(message):
+        found.add(f"num:{number}")
+    return tuple(sorted(found))
+
+
+# MCP tools relevant to each keyword group, used to trim the tool list sent to the LLM
+_FLIGHT_TOOLS = ("search_flights", "get_flight_status_by_number", "get_flight_status_by_route")
+GROUP_TOOLS: Dict[str, tuple] = {
+    "status": _FLIGHT_TOOLS,
+    "flight": _FLIGHT_TOOLS,
+    "my_flights": ("list_user_flights", "get_booking_details"),
+    "booking": ("get_booking_details", "get_booking_baggage_allowance"),
+    "baggage": ("get_booking_baggage_allowance", "get_booking_details"),
+    "mil": ("get_expiring_miles", "get_current_user_details"),
+    "expiring_miles": ("get_expiring_miles", "get_current_user_details"),
+    "profile": ("get_current_user_details", "get_expiring_miles"),
+    "guide": ("get_city_guide",),
+    "promo": ("get_airline_promotions",),
+    "ping": ("ping",),
+}
+
+
+@dataclass(slots=True)
+class IntentMatch:
+    """Classified intent: chosen tool, its arguments and a confidence per candidate intent"""
+    tool_name: Optional[str]
+    arguments: Dict[str, Any]
+    confidence: float = 0.0
+    scores: Dict[str, float] = field(default_factory=dict)
+    groups: FrozenSet[str] = frozenset()
+    has_flight_entities: bool = False
+
+
+# Argument builders, called only for the rule that wins
+
+def _status_by_number_args(flight_match, airports, pnr_match, date_str, user_message, text):
+    return {
+        "flightNumber": f"{flight_match.group(1).upper()}{flight_match.group(2)}",
+        "flightDate": parse_date(date_str)
+    }
+
+
+def _status_by_route_args(flight_match, airports, pnr_match, date_str, user_message, text):
+    return {
+        "origin": airports[0],
+        "destination": airports[1],
+        "flightDate": parse_date(date_str)
+    }
+
+
+def _booking_args(flight_match, airports, pnr_match, date_str, user_message, text):
+    params = {"bookingReference": pnr_match.group(1).upper()}
+    surname_match = _SURNAME_RE.search(user_message)
+    if surname_match:
+        params["surname"] = surname_match.group(2).strip()
+    return params
+
+
+def _search_args(flight_match, airports, pnr_match, date_str, user_message, text):
+    passenger_match = _PASSENGER_RE.search(text)
+    return {
+        "origin": airports[0],
+        "destination": airports[1],
+        "departureDate": parse_date(date_str),
+        "passengerCount": int(passenger_match.group(1)) if passenger_match else 1
+    }
+
+
+def _city_guide_args(flight_match, airports, pnr_match, date_str, user_message, text):
+    return {"cityCode": airports[0]}
+
+
+def _promo_args(flight_match, airports, pnr_match, date_str, user_message, text):
+    params = {"countryCode": "TR"}
+    if airports:
+        params["departureAirport"] = airports[0]
+        if len(airports) > 1:
+            params["arrivalAirport"] = airports[1]
+    return params
+
+
+def _baggage_args(flight_match, airports, pnr_match, date_str, user_message, text):
+    return {"bookingReference": pnr_match.group(1).upper()} if pnr_match else {}
+
+
+def _no_args(*_):
+    return {}
+
+
+def classify_intent(user_message: str) -> IntentMatch:
+    """
+    Classify a chat message into an MCP tool call.
+
+    Rules are evaluated in priority order; the first rule that fires wins.
+    `scores` lists the confidence of every rule that fired, so callers can
+    see ambiguous messages.
+    """
+    text = user_message.strip().lower()
+    groups = keyword_groups(text)
+
+    flight_match = _FLIGHT_RE.search(user_message)
+    date_match = _DATE_RE.search(user_message)
+    airports = _AIRPORT_RE.findall(user_message.upper())
+    pnr_match = _PNR_RE.search(user_message)
+    date_str = date_match.group(1) if date_match else None
+    route_confidence = 0.9 if date_match else 0.85
+
+    # (tool, confidence, argument builder) for every rule that fires, in priority order
+    fired = []
+    # 1. Flight status by number
+    if flight_match and "status" in groups:
+        fired.append(("get_flight_status_by_number", 0.95, _status_by_number_args))
+    # 2. Flight status by route
+    if len(airports) >= 2 and "status" in groups:
+        fired.append(("get_flight_status_by_route", route_confidence, _status_by_route_args))
+    # 3. Booking details (PNR)
+    if pnr_match and "booking" in groups:
+        fired.append(("get_booking_details", 0.9 if _SURNAME_RE.search(user_message) else 0.75, _booking_args))
+    # 4. Flight search
+    if "flight" in groups and len(airports) >= 2:
+        fired.append(("search_flights", route_confidence, _search_args))
+    # 5. Miles expiring
+    if "expiring_miles" in groups:
+        fired.append(("get_expiring_miles", 0.9, _no_args))
+    elif "mil" in groups and "expiry" in groups:
+        fired.append(("get_expiring_miles", 0.7, _no_args))
+    # 6. User flights
+    if "my_flights" in groups:
+        fired.append(("list_user_flights", 0.85, _no_args))
+    # 7. City guide
+    if "guide" in groups and airports:
+        fired.append(("get_city_guide", 0.7, _city_guide_args))
+    # 8. Promotions
+    if "promo" in groups:
+        fired.append(("get_airline_promotions", 0.75, _promo_args))
+    # 9. Baggage allowance
+    if "baggage" in groups:
+        fired.append(("get_booking_baggage_allowance", 0.8 if pnr_match else 0.6, _baggage_args))
+    # 10. User details
+    if "profile" in groups:
+        fired.append(("get_current_user_details", 0.6, _no_args))
+    # 11. Test/ping
+    if "ping" in groups:
+        fired.append(("ping", 0.5, _no_args))
+
+    has_flight_entities = bool(flight_match) or len(airports) >= 2
+    if not fired:
+        return IntentMatch(None, {}, 0.0, {}, groups, has_flight_entities)
+    scores = {tool_name: confidence for tool_name, confidence, _ in fired}
+    tool_name, confidence, build = fired[0]
+    arguments = build(flight_match, airports, pnr_match, date_str, user_message, text)
+    return IntentMatch(tool_name, arguments, confidence, scores, groups, has_flight_entities)
+
+
+def select_tool_names(match: IntentMatch) -> Optional[FrozenSet[str]]:
+    """
+    Names of the MCP tools worth offering to the LLM for a classified message.
+    Returns None when nothing points at a specific area, meaning "send all tools".
+    """
+    names = set()
+    for group in match.groups:
+        names.update(GROUP_TOOLS.get(group, ()))
+    if match.has_flight_entities:
+        names.update(_FLIGHT_TOOLS)
+    return frozenset(names) if names else None
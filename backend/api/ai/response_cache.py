@@ -0,0 +1,257 @@
+# backend/api/ai/response_cache.py
+"""
+Response cache for /ai/ask - exact match + embedding similarity layers
+"""
+import asyncio
+import math
+import os
+import re
+import time
+import unicodedata
+import operator
+import datetime
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pytz
+from loguru import logger
+
+from api.ai.intent import extract_entities, keyword_groups
+
+_TURKEY_TZ = pytz.timezone('Europe/Istanbul')
+
+# How long (seconds) an answer built from a given MCP tool stays valid.
+# A cached reply lives only as long as the shortest-lived tool it used.
+TOOL_TTLS: Dict[str, int] = {
+    "ping": 30,
+    "get_flight_status_by_number": 120,
+    "get_flight_status_by_route": 120,
+    "search_flights": 300,
+    "get_expiring_miles": 300,
+    "get_booking_details": 60,
+    "get_booking_baggage_allowance": 600,
+    "get_current_user_details": 60,
+    "list_user_flights": 60,
+    "get_airline_promotions": 3600,
+    "get_city_guide": 86400,
+}
+DEFAULT_TOOL_TTL = 60        # tools not listed above
+NO_TOOL_TTL = int(os.getenv("AI_CACHE_NO_TOOL_TTL", "3600"))  # pure LLM answers
+
+# Intents whose answers depend on the exact flight/route/booking asked about; "istanbul ankara
+# uçuş" and "istanbul izmir uçuş" embed almost identically, so these are never served semantically
+NO_SEMANTIC_GROUPS = frozenset({"flight", "status", "booking"})
+
+# Above this many candidates the cosine scan runs in a worker thread instead of on the event loop
+SEMANTIC_INLINE_MAX = int(os.getenv("AI_CACHE_SEMANTIC_INLINE_MAX", "64"))
+
+_PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a chat message for exact-match lookups."""
+    text = unicodedata.normalize("NFKC", message or "").casefold()
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def ttl_for_tools(tools: Optional[List[str]]) -> int:
+    """Shortest TTL among the tools an answer was built from."""
+    if not tools:
+        return NO_TOOL_TTL
+    return min(TOOL_TTLS.get(name, DEFAULT_TOOL_TTL) for name in tools)
+
+
+def _unit(vec: List[float]) -> array:
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return array("f", (v / norm for v in vec))
+
+
+def _nearest(query: array, candidates: List[Tuple[tuple, array]], threshold: float) -> Tuple[Optional[tuple], float]:
+    """Key and cosine similarity of the closest unit vector at or above threshold"""
+    best_key, best_sim = None, threshold
+    for key, vec in candidates:
+        sim = sum(map(operator.mul, query, vec))
+        if sim >= best_sim:
+            best_key, best_sim = key, sim
+    return best_key, best_sim
+
+
+@dataclass
+class CacheEntry:
+    """One cached /ai/ask response"""
+    namespace: str
+    normalized: str
+    payload: Dict[str, Any]
+    tools: List[str]
+    expires_at: float
+    embedding: Optional[array] = None
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+@dataclass
+class CacheLookup:
+    """Result of a cache lookup; carries the computed embedding to reuse on store"""
+    namespace: str
+    normalized: str
+    entry: Optional[CacheEntry] = None
+    layer: Optional[str] = None          # "exact" | "semantic"
+    similarity: Optional[float] = None
+    embedding: Optional[array] = None
+    entities: tuple = ()                 # flight no / PNR / IATA / dates in the message
+
+
+class ResponseCache:
+    """
+    Two-layer cache in front of the OpenAI path of /ai/ask.
+
+    Exact layer: dict keyed by (namespace, normalized message).
+    Semantic layer: cosine similarity against entries in the same namespace,
+    only consulted when an embedding function is configured and only for
+    entity-free (FAQ-style) messages outside the flight/status/booking
+    intents: "TK1234 uçuşum ne zaman" and "TK1243 uçuşum ne zaman" embed
+    almost identically but are different flights.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        similarity_threshold: float = 0.92,
+        embed_fn: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        enabled: bool = True
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self.enabled = enabled
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._stats = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "evicted": 0,
+            "embed_errors": 0,
+            "semantic_skipped": 0,
+        }
+
+    @staticmethod
+    def namespace_for(use_mcp: bool, temperature: float) -> str:
+        """Answers are only shared between requests with the same options and Istanbul day."""
+        day = datetime.datetime.now(_TURKEY_TZ).strftime('%Y-%m-%d')
+        return f"{day}|{int(bool(use_mcp))}|{temperature:.2f}"
+
+    def _drop(self, key: tuple, reason: str):
+        if self._entries.pop(key, None) is not None:
+            self._stats[reason] += 1
+
+    async def _embed(self, text: str) -> Optional[array]:
+        if not self.embed_fn:
+            return None
+        try:
+            return _unit(await self.embed_fn(text))
+        except Exception as e:
+            self._stats["embed_errors"] += 1
+            logger.warning(f"Response cache embedding failed: {e}")
+            return None
+
+    async def lookup(self, message: str, namespace: str) -> CacheLookup:
+        """Find a cached response: exact match first, then nearest embedding above threshold."""
+        normalized = normalize_message(message)
+        probe = CacheLookup(namespace=namespace, normalized=normalized)
+        if not self.enabled or not normalized:
+            return probe
+
+        self._stats["lookups"] += 1
+        now = time.time()
+
+        key = (namespace, normalized)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                self._stats["exact_hits"] += 1
+                probe.entry, probe.layer, probe.similarity = entry, "exact", 1.0
+                return probe
+            self._drop(key, "expired")
+
+        # Messages naming a flight, booking, airport or date, and flight/status/booking
+        # intents, only match exactly; they also get no embedding, so they never
+        # answer someone else's question
+        probe.entities = extract_entities(message)
+        if probe.entities or not NO_SEMANTIC_GROUPS.isdisjoint(keyword_groups(message.strip().lower())):
+            self._stats["semantic_skipped"] += 1
+            self._stats["misses"] += 1
+            return probe
+
+        probe.embedding = await self._embed(normalized)
+        if probe.embedding is not None:
+            candidates = []
+            for k, cand in list(self._entries.items()):
+                if cand.namespace != namespace or cand.embedding is None:
+                    continue
+                if cand.expires_at <= now:
+                    self._drop(k, "expired")
+                    continue
+                candidates.append((k, cand.embedding))
+            if len(candidates) > SEMANTIC_INLINE_MAX:
+                best_key, best_sim = await asyncio.to_thread(
+                    _nearest, probe.embedding, candidates, self.similarity_threshold)
+            else:
+                best_key, best_sim = _nearest(probe.embedding, candidates, self.similarity_threshold)
+            # The entry may have been evicted or cleared while the scan ran in a thread
+            entry = self._entries.get(best_key) if best_key is not None else None
+            if entry is not None:
+                self._entries.move_to_end(best_key)
+                entry.hits += 1
+                self._stats["semantic_hits"] += 1
+                probe.entry, probe.layer, probe.similarity = entry, "semantic", round(best_sim, 4)
+                return probe
+
+        self._stats["misses"] += 1
+        return probe
+
+    def store(self, probe: CacheLookup, payload: Dict[str, Any], tools: Optional[List[str]] = None):
+        """Store a response for the message described by a previous lookup."""
+        if not self.enabled or not probe.normalized:
+            return
+        tools = list(tools or [])
+        key = (probe.namespace, probe.normalized)
+        self._entries[key] = CacheEntry(
+            namespace=probe.namespace,
+            normalized=probe.normalized,
+            payload=payload,
+            tools=tools,
+            expires_at=time.time() + ttl_for_tools(tools),
+            embedding=probe.embedding
+        )
+        self._entries.move_to_end(key)
+        self._stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest, "evicted")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self._stats["exact_hits"] + self._stats["semantic_hits"]
+        lookups = self._stats["lookups"]
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "exact_hit_rate": round(self._stats["exact_hits"] / lookups, 4) if lookups else 0.0,
+            "semantic_hit_rate": round(self._stats["semantic_hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "semantic_enabled": self.embed_fn is not None,
+            "enabled": self.enabled,
+        }
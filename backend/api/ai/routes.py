@@ -2,12 +2,13 @@
 """
 Turkish Airlines MCP Integration - AI Routes
 """
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 import os
 import json
 import re
+import asyncio
 import datetime
 import pytz
 from dotenv import load_dotenv
@@ -19,9 +20,15 @@ from mcp_client import (
     get_mcp_client,
     ensure_mcp_connection,
     call_mcp_tool,
+    call_mcp_tools,
     get_mcp_tools,
     mcp_health_check
 )
+from api.ai.response_cache import ResponseCache
+from api.ai.intent import classify_intent, select_tool_names
+from health import health_prober
+from auth.admin import require_admin
+from metrics import track_stage, track_upstream, record_cache
 
 load_dotenv()
 
@@ -37,6 +44,28 @@ except Exception as e:
 # Configuration
 OPENAI_TOOLS_ENABLED = os.getenv("OPENAI_TOOLS_ENABLED", "1").strip().lower() in {"1", "true", "on", "yes"}
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "1").strip().lower() in {"1", "true", "on", "yes"}
+AI_CACHE_SEMANTIC = os.getenv("AI_CACHE_SEMANTIC", "1").strip().lower() in {"1", "true", "on", "yes"}
+AI_CACHE_EMBED_MODEL = os.getenv("AI_CACHE_EMBED_MODEL", "text-embedding-3-small")
+AI_CACHE_EMBED_DIMS = int(os.getenv("AI_CACHE_EMBED_DIMS", "256"))
+
+async def _embed_for_cache(text: str) -> List[float]:
+    """Embedding used by the semantic cache layer (sync client runs off the event loop)."""
+    with track_upstream("openai", "embeddings"):
+        response = await asyncio.to_thread(
+            client.embeddings.create,
+            model=AI_CACHE_EMBED_MODEL,
+            input=text,
+            dimensions=AI_CACHE_EMBED_DIMS
+        )
+    return response.data[0].embedding
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", "512")),
+    similarity_threshold=float(os.getenv("AI_CACHE_SIM_THRESHOLD", "0.92")),
+    embed_fn=_embed_for_cache if (client and AI_CACHE_SEMANTIC) else None,
+    enabled=AI_CACHE_ENABLED
+)
 
 # Enhanced system prompt for Turkish Airlines AI assistant
 SYSTEM_PROMPT = """Sen Rota planlamaya yardımcı olan bir asistansın.
@@ -86,6 +115,7 @@ class AskResponse(BaseModel):
     tools_called: Optional[List[str]] = None
     fallback: Optional[bool] = False
     error: Optional[str] = None
+    cached: Optional[bool] = False
 
 def _sanitize_text(text: str) -> str:
     """Clean up text for better readability."""
@@ -112,142 +142,8 @@ def _extract_flight_intent(user_message: str) -> tuple[Optional[str], Dict[str,
     Extract Turkish Airlines specific intents from user message.
     Returns (tool_name, arguments) or (None, {}) if no clear intent found.
     """
-    text = user_message.strip().lower()
-    
-    # Flight number pattern (TK123, PC4567, etc.)
-    flight_pattern = r'\b(TK|PC|AJ)\s?(\d{1,4}[A-Z]?)\b'
-    date_pattern = r'(\d{4}-\d{2}-\d{2}|\d{1,2}[./-]\d{1,2}[./-]\d{4}|bugün|today|yarın|tomorrow)'
-    airport_pattern = r'\b([A-Z]{3})\b'
-    pnr_pattern = r'\b([A-Z0-9]{6})\b'
-    
-    flight_match = re.search(flight_pattern, user_message, re.I)
-    date_match = re.search(date_pattern, user_message, re.I)
-    airports = re.findall(airport_pattern, user_message.upper())
-    pnr_match = re.search(pnr_pattern, user_message)
-    
-    def parse_date(date_str):
-        """Convert various date formats to YYYY-MM-DD using Turkey timezone"""
-        import pytz
-        
-        # Get Turkey timezone
-        turkey_tz = pytz.timezone('Europe/Istanbul')
-        turkey_now = datetime.datetime.now(turkey_tz)
-        turkey_today = turkey_now.date()
-        
-        if not date_str:
-            return turkey_today.strftime('%Y-%m-%d')
-            
-        date_str = date_str.lower()
-        if date_str in ['bugün', 'today']:
-            return turkey_today.strftime('%Y-%m-%d')
-        elif date_str in ['yarın', 'tomorrow']:
-            tomorrow = turkey_today + datetime.timedelta(days=1)
-            return tomorrow.strftime('%Y-%m-%d')
-        
-        # Try to parse date
-        try:
-            if re.match(r'\d{4}-\d{2}-\d{2}', date_str):
-                return date_str
-            
-            parts = re.split(r'[./-]', date_str)
-            if len(parts) == 3:
-                if len(parts[2]) == 4:  # DD-MM-YYYY
-                    day, month, year = parts
-                else:  # YYYY-MM-DD
-                    year, month, day = parts
-                return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-        except:
-            pass
-        
-        return turkey_today.strftime('%Y-%m-%d')
-    
-    # 1. Flight status by number
-    if flight_match and ('durum' in text or 'status' in text):
-        airline_code = flight_match.group(1).upper()
-        flight_num = flight_match.group(2)
-        flight_number = f"{airline_code}{flight_num}"
-        flight_date = parse_date(date_match.group(1) if date_match else None)
-        
-        return "get_flight_status_by_number", {
-            "flightNumber": flight_number,
-            "flightDate": flight_date
-        }
-    
-    # 2. Flight status by route
-    if len(airports) >= 2 and ('durum' in text or 'status' in text):
-        flight_date = parse_date(date_match.group(1) if date_match else None)
-        
-        return "get_flight_status_by_route", {
-            "origin": airports[0],
-            "destination": airports[1],
-            "flightDate": flight_date
-        }
-    
-    # 3. Booking details (PNR)
-    if pnr_match and ('rezervasyon' in text or 'pnr' in text or 'booking' in text):
-        # Look for surname
-        surname_pattern = r'(soyad[ıi]?\s*[:=]?\s*|surname\s*[:=]?\s*)([A-Za-zÇĞİÖŞÜçğıöşü\s\'-]{2,})'
-        surname_match = re.search(surname_pattern, user_message, re.I)
-        
-        params = {"bookingReference": pnr_match.group(1).upper()}
-        if surname_match:
-            params["surname"] = surname_match.group(2).strip()
-        
-        return "get_booking_details", params
-    
-    # 4. Flight search
-    if ('uçuş' in text or 'ucus' in text or 'bilet' in text or 'flight' in text) and len(airports) >= 2:
-        departure_date = parse_date(date_match.group(1) if date_match else None)
-        
-        # Extract passenger count
-        passenger_count = 1
-        passenger_match = re.search(r'(\d+)\s*(kişi|kisi|passenger|adult)', text)
-        if passenger_match:
-            passenger_count = int(passenger_match.group(1))
-        
-        return "search_flights", {
-            "origin": airports[0],
-            "destination": airports[1],  
-            "departureDate": departure_date,
-            "passengerCount": passenger_count
-        }
-    
-    # 5. Miles expiring
-    if ('mil' in text and ('bitiyor' in text or 'son' in text)) or 'expiring miles' in text:
-        return "get_expiring_miles", {}
-    
-    # 6. User flights
-    if 'uçuşlarım' in text or 'ucuslarim' in text or 'my flights' in text:
-        return "list_user_flights", {}
-    
-    # 7. City guide
-    if ('rehber' in text or 'guide' in text or 'gez' in text) and airports:
-        return "get_city_guide", {"cityCode": airports[0]}
-    
-    # 8. Promotions
-    if 'promosyon' in text or 'kampanya' in text or 'promotion' in text:
-        params = {"countryCode": "TR"}
-        if airports:
-            params["departureAirport"] = airports[0]
-            if len(airports) > 1:
-                params["arrivalAirport"] = airports[1]
-        return "get_airline_promotions", params
-    
-    # 9. Baggage allowance
-    if 'bagaj' in text or 'bavul' in text or 'baggage' in text:
-        if pnr_match:
-            return "get_booking_baggage_allowance", {"bookingReference": pnr_match.group(1).upper()}
-        return "get_booking_baggage_allowance", {}
-    
-    # 10. User details
-    if 'profil' in text or 'hesap' in text or 'profile' in text or 'miles' in text:
-        return "get_current_user_details", {}
-    
-    # 11. Test/ping
-    if 'test' in text or 'ping' in text or 'bağlantı' in text:
-        return "ping", {}
-    
-    return None, {}
+    match = classify_intent(user_message)
+    return match.tool_name, match.arguments
 
 def _format_mcp_result(result: Dict[str, Any], tool_name: str) -> str:
     """Format MCP tool results for better user experience."""
@@ -452,14 +348,17 @@ async def ask(request: AskRequest, req: Request):
     logger.info(f"AI request: {request.message[:100]}...")
     
     # Step 1: Direct intent extraction for Turkish Airlines specific queries
+    intent = None
     if request.use_mcp:
-        tool_name, tool_args = _extract_flight_intent(request.message)
+        intent = classify_intent(request.message)
+        tool_name, tool_args = intent.tool_name, intent.arguments
         if tool_name:
             try:
-                logger.info(f"Direct intent: {tool_name} with args: {tool_args}")
+                logger.info(f"Direct intent: {tool_name} (confidence={intent.confidence}) with args: {tool_args}")
                 
                 # Execute MCP tool directly
-                result = await call_mcp_tool(tool_name, tool_args)
+                with track_stage("ai_ask", "direct_mcp"):
+                    result = await call_mcp_tool(tool_name, tool_args)
                 
                 # Format result for user
                 reply = _format_mcp_result(result, tool_name)
@@ -474,12 +373,26 @@ async def ask(request: AskRequest, req: Request):
                 logger.warning(f"Direct MCP tool execution failed: {e}")
                 # Continue to OpenAI approach below
     
-    # Step 2: Use OpenAI with function calling
+    # Step 2: Response cache in front of the OpenAI path
+    temperature = request.temperature or 0.2
+    with track_stage("ai_ask", "cache_lookup"):
+        cache_probe = await response_cache.lookup(
+            request.message,
+            ResponseCache.namespace_for(bool(request.use_mcp), temperature)
+        )
+    if response_cache.enabled:
+        record_cache("ai_response", cache_probe.entry is not None)
+    if cache_probe.entry:
+        logger.info(f"Response cache {cache_probe.layer} hit (similarity={cache_probe.similarity})")
+        return AskResponse(**cache_probe.entry.payload, cached=True)
+    
+    # Step 3: Use OpenAI with function calling
     tools = []
     if OPENAI_TOOLS_ENABLED and request.use_mcp:
         try:
-            # Get MCP tools in OpenAI format
-            tools = await get_mcp_tools()
+            # Get MCP tools in OpenAI format, trimmed to the ones relevant to the message
+            with track_stage("ai_ask", "tools_load"):
+                tools = await get_mcp_tools(select_tool_names(intent) if intent else None)
             logger.info(f"Loaded {len(tools)} MCP tools for OpenAI")
         except Exception as e:
             logger.warning(f"Failed to load MCP tools: {e}")
@@ -495,14 +408,15 @@ async def ask(request: AskRequest, req: Request):
         call_kwargs = {
             "model": OPENAI_MODEL,
             "messages": messages,
-            "temperature": request.temperature or 0.2,
+            "temperature": temperature,
         }
         
         if tools:
             call_kwargs["tools"] = tools
             call_kwargs["tool_choice"] = "auto"
         
-        response = client.chat.completions.create(**call_kwargs)
+        with track_upstream("openai", "chat"):
+            response = client.chat.completions.create(**call_kwargs)
         
     except Exception as e:
         logger.error(f"OpenAI API error: {e}")
@@ -535,7 +449,8 @@ async def ask(request: AskRequest, req: Request):
         tools_called = []
         any_successful = False
         
-        # Execute each tool call
+        # Execute the tool calls together (one JSON-RPC batch when the server supports it)
+        calls = []
         for tc in tool_calls:
             tool_name = tc.function.name
             try:
@@ -544,46 +459,59 @@ async def ask(request: AskRequest, req: Request):
                 args = {}
             
             tools_called.append(tool_name)
-            logger.info(f"Executing MCP tool: {tool_name}")
-            
-            try:
-                # Call MCP tool
-                result = await call_mcp_tool(tool_name, args)
-                any_successful = True
-                
-                # Add tool result to messages
+            calls.append((tool_name, args))
+        
+        logger.info(f"Executing MCP tools: {tools_called}")
+        try:
+            with track_stage("ai_ask", "tool_calls"):
+                results = await call_mcp_tools(calls)
+        except Exception as e:
+            results = [e] * len(calls)
+        
+        for tc, (tool_name, _), result in zip(tool_calls, calls, results):
+            if isinstance(result, BaseException):
+                logger.error(f"MCP tool {tool_name} failed: {result}")
                 messages.append({
                     "role": "tool",
                     "tool_call_id": tc.id,
                     "name": tool_name,
-                    "content": json.dumps(result, ensure_ascii=False)[:8000]  # Limit size
+                    "content": json.dumps({"error": str(result)}, ensure_ascii=False)
                 })
+            else:
+                any_successful = True
                 
-            except Exception as e:
-                logger.error(f"MCP tool {tool_name} failed: {e}")
+                # Add tool result to messages
                 messages.append({
                     "role": "tool",
                     "tool_call_id": tc.id,
                     "name": tool_name,
-                    "content": json.dumps({"error": str(e)}, ensure_ascii=False)
+                    "content": json.dumps(result, ensure_ascii=False)[:8000]  # Limit size
                 })
         
         # Get final response from OpenAI
         try:
-            final_response = client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=messages,
-                temperature=request.temperature or 0.2
-            )
+            with track_upstream("openai", "chat"):
+                final_response = client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=messages,
+                    temperature=temperature
+                )
             
             reply = final_response.choices[0].message.content or ""
             
-            return AskResponse(
+            answer = AskResponse(
                 reply=_sanitize_text(reply),
                 used_mcp=any_successful,
                 tools_called=tools_called,
                 fallback=not any_successful
             )
+            if any_successful:
+                response_cache.store(
+                    cache_probe,
+                    answer.model_dump(exclude={"cached"}),
+                    tools=tools_called
+                )
+            return answer
             
         except Exception as e:
             logger.error(f"Final OpenAI call failed: {e}")
@@ -600,16 +528,29 @@ async def ask(request: AskRequest, req: Request):
     
     else:
         # No tool calls, return direct response
-        reply = choice.message.content or "Üzgünüm, yanıt oluşturamadım."
+        reply = choice.message.content
+        if not reply:
+            return AskResponse(reply="Üzgünüm, yanıt oluşturamadım.", used_mcp=False)
         
-        return AskResponse(
+        answer = AskResponse(
             reply=_sanitize_text(reply),
             used_mcp=False
         )
+        response_cache.store(cache_probe, answer.model_dump(exclude={"cached"}))
+        return answer
+
+async def _probe_openai() -> Dict[str, Any]:
+    """Background OpenAI check: a model lookup, no completion tokens spent."""
+    if not client:
+        return {"status": "not_configured"}
+    await asyncio.to_thread(client.models.retrieve, OPENAI_MODEL)
+    return {"status": "healthy", "model": OPENAI_MODEL}
+
+health_prober.register("openai", _probe_openai)
 
 @router.get("/health")
 async def ai_health():
-    """Health check for AI service and MCP connection."""
+    """Health of the AI service and MCP connection, from the background prober's cache."""
     checks = {
         "status": "healthy",
         "openai_client": client is not None,
@@ -618,38 +559,34 @@ async def ai_health():
         "timestamp": datetime.datetime.now().isoformat()
     }
     
-    # Test OpenAI connectivity
-    if client:
-        try:
-            test_response = client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[{"role": "user", "content": "test"}],
-                max_tokens=5,
-                temperature=0
-            )
-            checks["openai_status"] = "connected"
-        except Exception as e:
-            checks["openai_status"] = f"error: {str(e)}"
-            checks["status"] = "degraded"
+    openai_health = health_prober.component("openai")
+    if openai_health["status"] == "healthy":
+        checks["openai_status"] = "connected"
+    elif openai_health["status"] in ("not_configured", "unknown"):
+        checks["openai_status"] = openai_health["status"]
+        checks["status"] = "degraded"
     else:
-        checks["openai_status"] = "not_configured"
+        checks["openai_status"] = f"error: {openai_health.get('error')}"
         checks["status"] = "degraded"
+    checks["openai_latency_ms"] = openai_health.get("last_latency_ms")
     
-    # Test MCP connection
-    try:
-        mcp_health = await mcp_health_check()
-        checks["mcp"] = mcp_health
-        if mcp_health["status"] != "healthy":
-            checks["status"] = "degraded"
-    except Exception as e:
-        checks["mcp"] = {
-            "status": "error",
-            "error": str(e)
-        }
+    checks["mcp"] = health_prober.component("mcp")
+    if checks["mcp"]["status"] != "healthy":
         checks["status"] = "degraded"
     
     return checks
 
+@router.get("/cache/stats", dependencies=[Depends(require_admin)])
+async def cache_stats():
+    """Hit rates and size of the /ai/ask response cache."""
+    return response_cache.stats()
+
+@router.delete("/cache", dependencies=[Depends(require_admin)])
+async def clear_cache():
+    """Drop every cached /ai/ask response."""
+    response_cache.clear()
+    return {"status": "cleared"}
+
 @router.get("/tools")
 async def list_available_tools():
     """List all available Turkish Airlines MCP tools."""
@@ -804,20 +741,3 @@ async def get_example_queries():
         "total_examples": sum(len(queries) for queries in examples.values()),
         "usage": "Bu örnekleri /ai/ask endpoint'ine göndererek farklı MCP tool'larını test edebilirsiniz"
     }
-
-# Startup event to initialize MCP connection
-@router.on_event("startup")
-async def startup_event():
-    """Initialize MCP connection on startup."""
-    try:
-        logger.info("🚀 Initializing Turkish Airlines MCP connection...")
-        mcp_client = await get_mcp_client()
-        
-        if mcp_client._connected:
-            await mcp_client.load_tools()
-            logger.success(f"✅ Turkish Airlines MCP ready - {len(mcp_client.tools_cache)} tools available")
-        else:
-            logger.warning("⚠️ MCP connection failed - check TURKISH_AIRLINES_MCP_TOKEN")
-            
-    except Exception as e:
-        logger.error(f"❌ MCP initialization failed: {e}")
@@ -0,0 +1,175 @@
+# backend/api/gen/avatar_cache.py
+"""
+Content-addressed avatar cache for /gen/generate
+
+The avatar depends on the persona selections (order included: the first one
+picks palette and shape) and the style prompt built from them, so those hash
+to a key and the generated images are stored as IMAGES_DIR/av-<key>-<n>.<ext>.
+The file name is the index: a restart or another worker finds the same images
+by listing the directory, no manifest needed. After that first listing the
+in-memory index is authoritative; the directory is only listed again (in a
+worker thread, never on the event loop) for a key that is short of variants,
+and a file deleted behind our back is dropped via forget() when serving it
+404s.
+
+Up to `variants` images are generated per key; after that requests pick one
+of the stored variants. Concurrent misses for one key share a generation.
+"""
+import asyncio
+import hashlib
+import random
+import re
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+KEY_VERSION = "v1"   # bump to invalidate every stored avatar
+_FILE_RE = re.compile(r"^av-([0-9a-f]{32})-(\d+)\.(png|jpg|webp)$")
+
+# stem ("av-<key>-<n>") -> "/gen/image/<stem>.<ext>"
+AvatarCreator = Callable[[Optional[str]], Awaitable[str]]
+
+
+class AvatarGenerationCancelled(RuntimeError):
+    """The request generating a shared avatar was cancelled (e.g. client disconnect)"""
+
+
+def avatar_key(*parts: str) -> str:
+    """Stable hash of the prompt parts (whitespace-normalized)"""
+    text = "\x1f".join([KEY_VERSION, *(" ".join(str(p).split()) for p in parts)])
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class AvatarCache:
+    """key -> {variant: file name}, rebuilt from the directory on first use"""
+
+    def __init__(self, directory: Path, variants: int = 1, enabled: bool = True):
+        self.directory = Path(directory)
+        self.variants = max(1, variants)
+        self.enabled = enabled
+        self._index: Optional[Dict[str, Dict[int, str]]] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {"lookups": 0, "hits": 0, "coalesced": 0, "misses": 0}
+
+    def _scan(self, pattern: str) -> Dict[str, Dict[int, str]]:
+        """Blocking directory listing; run through asyncio.to_thread"""
+        index: Dict[str, Dict[int, str]] = {}
+        for path in self.directory.glob(pattern):
+            m = _FILE_RE.match(path.name)
+            if m and path.stat().st_size > 0:
+                index.setdefault(m.group(1), {})[int(m.group(2))] = path.name
+        return index
+
+    async def _load_index(self) -> Dict[str, Dict[int, str]]:
+        if self._index is None:
+            index = await asyncio.to_thread(self._scan, "av-*")
+            if self._index is None:
+                self._index = index
+                logger.info(f"🖼️ Avatar cache: {sum(map(len, index.values()))} images for {len(index)} personas")
+        return self._index
+
+    async def _stored(self, key: str) -> Dict[int, str]:
+        index = await self._load_index()
+        stored = index.get(key, {})
+        if len(stored) < self.variants:
+            # Another worker may have generated variants since we listed the directory
+            found = (await asyncio.to_thread(self._scan, f"av-{key}-*")).get(key)
+            if found:
+                stored = index.setdefault(key, {})
+                stored.update(found)
+        return stored
+
+    @staticmethod
+    def _url(name: str) -> str:
+        return f"/gen/image/{name}"
+
+    def _pick(self, stored: Dict[int, str]) -> Optional[str]:
+        return self._url(random.choice(list(stored.values()))) if stored else None
+
+    def forget(self, name: str) -> bool:
+        """Drop a stored variant whose file turned out to be missing (called when serving it 404s)"""
+        m = _FILE_RE.match(name)
+        stored = self._index.get(m.group(1)) if m and self._index is not None else None
+        if not stored or stored.get(int(m.group(2))) != name:
+            return False
+        del stored[int(m.group(2))]
+        if not stored:
+            del self._index[m.group(1)]
+        return True
+
+    async def missing_variants(self, key: str) -> int:
+        return max(0, self.variants - len(await self._stored(key))) if self.enabled else 0
+
+    async def peek(self, key: str) -> Optional[str]:
+        """Stored image URL path when no new variant is due for this key, else None"""
+        if not self.enabled:
+            return None
+        stored = await self._stored(key)
+        if len(stored) < self.variants:
+            return None
+        url = self._pick(stored)
+        self._stats["lookups"] += 1
+        self._stats["hits" if url else "misses"] += 1
+        return url
+
+    async def get_or_create(self, key: str, create: AvatarCreator) -> Tuple[str, bool]:
+        """
+        Return (image URL path, served_from_cache). create(stem) must generate
+        the image and store it under file stem `stem` (None when disabled).
+        Errors are not cached.
+        """
+        if not self.enabled:
+            return await create(None), False
+        self._stats["lookups"] += 1
+        stored = await self._stored(key)
+        pending = self._inflight.get(key)
+        if stored and (len(stored) >= self.variants or pending is not None):
+            url = self._pick(stored)
+            if url:
+                self._stats["hits"] += 1
+                return url, True
+
+        if pending is not None:
+            self._stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(pending), True
+            except AvatarGenerationCancelled:
+                # The owner went away; this request generates the avatar itself
+                return await self.get_or_create(key, create)
+
+        self._stats["misses"] += 1
+        variant = min(set(range(self.variants + len(stored))) - set(stored))
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            url = await create(f"av-{key}-{variant}")
+        except asyncio.CancelledError:
+            # Not future.cancel(): waiters would get CancelledError as if they had been cancelled
+            future.set_exception(AvatarGenerationCancelled("avatar generation cancelled"))
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        name = url.rsplit("/", 1)[-1]
+        if _FILE_RE.match(name):
+            self._index.setdefault(key, {})[variant] = name
+        future.set_result(url)
+        return url, False
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index or {}
+        lookups = self._stats["lookups"]
+        served = self._stats["hits"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "personas": len(index),
+            "images": sum(map(len, index.values())),
+            "in_flight": len(self._inflight),
+            "variants": self.variants,
+            "enabled": self.enabled,
+        }
@@ -0,0 +1,172 @@
+# backend/api/gen/geocode_cache.py
+"""
+Geocoding cache for /gen/places - Mapbox results shared per query and map tile
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from math import atan, cos, degrees, log, pi, radians, sinh, tan
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class GeoFeature(NamedTuple):
+    """The parts of a Mapbox feature the recommender uses"""
+    name: str
+    lon: float
+    lat: float
+    category: str     # properties.category, comma separated ("" if none)
+
+
+def parse_features(features: List[Dict[str, Any]]) -> Tuple[GeoFeature, ...]:
+    """Mapbox geocoding `features` -> compact tuples; malformed features are skipped."""
+    out = []
+    for f in features:
+        try:
+            name = f.get("text") or f.get("place_name")
+            coords = f.get("geometry", {}).get("coordinates") or []
+            lon, lat = float(coords[0]), float(coords[1])
+        except Exception:
+            continue
+        out.append(GeoFeature(name or "", lon, lat, (f.get("properties") or {}).get("category") or ""))
+    return tuple(out)
+
+
+def tile_for(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+    """Web Mercator (slippy map) tile containing the point."""
+    n = 1 << zoom
+    lat_r = radians(max(-85.0511, min(85.0511, lat)))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - log(tan(lat_r) + 1.0 / cos(lat_r)) / pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_center(x: int, y: int, zoom: int) -> Tuple[float, float]:
+    """(lat, lon) of the tile's center."""
+    n = 1 << zoom
+    lon = (x + 0.5) / n * 360.0 - 180.0
+    lat = degrees(atan(sinh(pi * (1.0 - 2.0 * (y + 0.5) / n))))
+    return lat, lon
+
+
+@dataclass
+class _Entry:
+    features: Tuple[GeoFeature, ...]
+    expires_at: float
+
+
+class GeocodeCache:
+    """
+    LRU + TTL cache of parsed geocoding results.
+
+    Key: (query, language, types, limit, area) where area is the proximity
+    point snapped to a map tile (or the bbox for nationwide searches). Misses
+    are sent with the tile center as proximity, so every user in the tile gets
+    the same answer, and concurrent misses for one key share a single request.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_sec: float = 21600, tile_zoom: int = 12, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.tile_zoom = tile_zoom
+        self.enabled = enabled
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+            "expired": 0,
+            "evicted": 0,
+        }
+
+    def area_params(self, params: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Area key for the request, and the params to send upstream (proximity snapped to the tile center)."""
+        if "proximity" not in params:
+            return f"bbox:{params.get('bbox', '')}", params
+        lon, lat = (float(v) for v in str(params["proximity"]).split(","))
+        x, y = tile_for(lat, lon, self.tile_zoom)
+        c_lat, c_lon = tile_center(x, y, self.tile_zoom)
+        return f"z{self.tile_zoom}/{x}/{y}", {**params, "proximity": f"{c_lon:.5f},{c_lat:.5f}"}
+
+    @staticmethod
+    def key(query: str, area: str, params: Dict[str, Any]) -> tuple:
+        return (" ".join(query.casefold().split()), params.get("language"), params.get("types"),
+                params.get("limit"), area)
+
+    def _get(self, key: tuple) -> Optional[Tuple[GeoFeature, ...]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            del self._entries[key]
+            self._stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry.features
+
+    def _store(self, key: tuple, features: Tuple[GeoFeature, ...]):
+        self._entries[key] = _Entry(features, time.time() + self.ttl_sec)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evicted"] += 1
+
+    async def get_or_fetch(
+        self, key: tuple, fetch: Callable[[], Awaitable[Tuple[GeoFeature, ...]]]
+    ) -> Tuple[Tuple[GeoFeature, ...], bool]:
+        """Return (features, served_from_cache). Errors are not cached."""
+        if not self.enabled:
+            return await fetch(), False
+        self._stats["lookups"] += 1
+        features = self._get(key)
+        if features is not None:
+            self._stats["hits"] += 1
+            return features, True
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(pending), True
+            except asyncio.CancelledError:
+                if pending.cancelled():
+                    # The request we were waiting on hit its own deadline; ours did not
+                    raise RuntimeError("shared geocoding request was cancelled")
+                raise
+
+        self._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())  # no "never retrieved" noise
+        self._inflight[key] = future
+        try:
+            features = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._store(key, features)
+        future.set_result(features)
+        return features, False
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["lookups"]
+        served = self._stats["hits"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "max_entries": self.max_entries,
+            "ttl_sec": self.ttl_sec,
+            "tile_zoom": self.tile_zoom,
+            "enabled": self.enabled,
+        }
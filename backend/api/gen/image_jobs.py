@@ -0,0 +1,266 @@
+# backend/api/gen/image_jobs.py
+"""
+Background image generation jobs for /gen - submit, then poll or stream
+
+Submitting returns a job id at once; a bounded pool of worker tasks runs the
+slow Gemini call. The same prompt submitted again while its job is queued,
+running or recently done gets the existing job back. Status can be
+long-polled (wait_for_change) or streamed as SSE (the routes use both).
+"""
+import asyncio
+import hashlib
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from uuid import uuid4
+
+from loguru import logger
+
+from metrics import registry
+from tracing import current_span, start_span
+
+IMAGE_JOB_WORKERS = max(1, int(os.getenv("IMAGE_JOB_WORKERS", "2")))
+IMAGE_JOB_QUEUE_MAX = int(os.getenv("IMAGE_JOB_QUEUE_MAX", "32"))
+IMAGE_JOB_TIMEOUT_SEC = float(os.getenv("IMAGE_JOB_TIMEOUT_SEC", "400"))  # both Gemini strategies, 180s each
+IMAGE_JOB_TTL_SEC = float(os.getenv("IMAGE_JOB_TTL_SEC", "900"))          # finished jobs kept for polling/dedup
+IMAGE_JOB_RATE_PER_MIN = int(os.getenv("IMAGE_JOB_RATE_PER_MIN", "6"))    # submissions per client per minute
+
+TERMINAL = ("done", "error")
+
+# prompt -> image URL path (e.g. "/gen/image/<name>.png")
+ImageRunner = Callable[[str], Awaitable[str]]
+
+
+class QueueFullError(Exception):
+    """Too many image jobs waiting; the caller should retry later"""
+
+
+class RateLimitedError(Exception):
+    """Too many submissions from one client; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limit exceeded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class SubmitRateLimiter:
+    """Sliding window: at most `limit` submissions per client within `window` seconds"""
+
+    def __init__(self, limit: int = IMAGE_JOB_RATE_PER_MIN, window: float = 60.0, max_clients: int = 10000):
+        self.limit = limit
+        self.window = window
+        self.max_clients = max_clients
+        self._hits: Dict[str, Deque[float]] = {}
+
+    def check(self, client: str):
+        """Record a submission for client or raise RateLimitedError (limit <= 0 disables)"""
+        if self.limit <= 0:
+            return
+        now = time.time()
+        cutoff = now - self.window
+        if len(self._hits) >= self.max_clients:
+            # forget clients with no submission inside the window
+            self._hits = {c: h for c, h in self._hits.items() if h and h[-1] > cutoff}
+        hits = self._hits.setdefault(client, deque())
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            raise RateLimitedError(hits[0] + self.window - now)
+        hits.append(now)
+
+
+@dataclass
+class ImageJob:
+    id: str
+    prompt_key: str
+    prompt: str
+    status: str = "queued"              # queued | running | done | error
+    image_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    traceparent: Optional[str] = None
+    run: Optional[Callable[[], Awaitable[str]]] = field(default=None, repr=False)  # overrides queue.runner
+    version: int = 0
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def _set(self, **changes):
+        for key, value in changes.items():
+            setattr(self, key, value)
+        self.version += 1
+        # Wake everyone waiting on the previous version, then arm a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "image_url": self.image_url,
+            "error": self.error,
+            "version": self.version,
+            "queued_ms": round(((self.started_at or now) - self.created_at) * 1000, 1),
+            "run_ms": round(((self.finished_at or now) - self.started_at) * 1000, 1) if self.started_at else None,
+        }
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(" ".join(prompt.split()).encode("utf-8")).hexdigest()
+
+
+class ImageJobQueue:
+    """asyncio.Queue + worker tasks; jobs are kept in memory for IMAGE_JOB_TTL_SEC after finishing"""
+
+    def __init__(self, workers: int = IMAGE_JOB_WORKERS, max_queue: int = IMAGE_JOB_QUEUE_MAX,
+                 timeout: float = IMAGE_JOB_TIMEOUT_SEC, ttl: float = IMAGE_JOB_TTL_SEC):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.ttl = ttl
+        self.runner: Optional[ImageRunner] = None
+        self.jobs: Dict[str, ImageJob] = {}
+        self._by_prompt: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+        self._stats = {"submitted": 0, "deduplicated": 0, "rejected": 0, "done": 0, "error": 0}
+
+    def start(self):
+        """Start the worker pool (idempotent; also called lazily on first submit)"""
+        if self._tasks and not all(t.done() for t in self._tasks):
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"🖼️ Image job workers: {self.workers}, queue max {self.max_queue}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks = []
+        # Jobs no worker picked up would stay "queued" forever; fail them so pollers stop waiting
+        while self._queue is not None and not self._queue.empty():
+            job: ImageJob = self._queue.get_nowait()
+            if job.status not in TERMINAL:
+                job._set(status="error", error="image jobs stopped", finished_at=time.time())
+            self._queue.task_done()
+
+    def _prune(self):
+        now = time.time()
+        cutoff = now - self.ttl
+        # A job still queued/running after timeout + ttl is stuck (e.g. its worker died): expire it too
+        stale = cutoff - self.timeout
+        for job in [j for j in self.jobs.values() if j.status not in TERMINAL and j.created_at < stale]:
+            job._set(status="error", error="image job expired", finished_at=now)
+        for job_id in [j.id for j in self.jobs.values()
+                       if (j.finished_at and j.finished_at < cutoff) or j.created_at < stale]:
+            job = self.jobs.pop(job_id)
+            if self._by_prompt.get(job.prompt_key) == job_id:
+                del self._by_prompt[job.prompt_key]
+
+    def submit(self, prompt: str, key: Optional[str] = None,
+               run: Optional[Callable[[], Awaitable[str]]] = None) -> tuple:
+        """
+        Queue a prompt; returns (job, deduplicated). Raises QueueFullError when saturated.
+        key: dedup key (default: hash of the prompt); run: job-specific runner.
+        """
+        if self.runner is None and run is None:
+            raise RuntimeError("image job runner not configured")
+        self._prune()
+        key = key or prompt_key(prompt)
+        existing = self.jobs.get(self._by_prompt.get(key, ""))
+        # Failed jobs are not reused: submitting again retries
+        if existing is not None and existing.status != "error":
+            self._stats["deduplicated"] += 1
+            return existing, True
+
+        self.start()
+        span = current_span()
+        job = ImageJob(id=uuid4().hex, prompt_key=key, prompt=prompt, run=run,
+                       traceparent=span.traceparent() if span else None)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            raise QueueFullError(f"{self._queue.qsize()} image jobs already waiting")
+        self.jobs[job.id] = job
+        self._by_prompt[key] = job.id
+        self._stats["submitted"] += 1
+        return job, False
+
+    def get(self, job_id: str) -> Optional[ImageJob]:
+        return self.jobs.get(job_id)
+
+    async def wait_for_change(self, job: ImageJob, since_version: int, timeout: float) -> ImageJob:
+        """Long-poll: return once job.version > since_version, the job finished, or timeout elapsed"""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while job.version <= since_version and job.status not in TERMINAL:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(job._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            job: ImageJob = await self._queue.get()
+            try:
+                if job.status not in TERMINAL:  # expired by _prune while waiting
+                    await self._run(job)
+            except asyncio.CancelledError:
+                if job.status not in TERMINAL:
+                    job._set(status="error", error="worker stopped", finished_at=time.time())
+                raise
+            except Exception as e:  # _run handles job errors; this is a last resort
+                logger.error(f"[image-jobs] worker {index} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ImageJob):
+        job._set(status="running", started_at=time.time())
+        # Continue the submitting request's trace so the job shows up under it
+        with start_span("image_job", traceparent=job.traceparent, job_id=job.id):
+            try:
+                work = job.run() if job.run else self.runner(job.prompt)
+                url = await asyncio.wait_for(work, timeout=self.timeout)
+                job._set(status="done", image_url=url, finished_at=time.time())
+                self._stats["done"] += 1
+            except asyncio.TimeoutError:
+                job._set(status="error", error=f"image generation exceeded {self.timeout:.0f}s",
+                         finished_at=time.time())
+                self._stats["error"] += 1
+            except Exception as e:
+                job._set(status="error", error=str(e)[:180], finished_at=time.time())
+                self._stats["error"] += 1
+                logger.warning(f"[image-jobs] {job.id} failed: {job.error}")
+
+    def stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self.jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            **self._stats,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": by_status,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+        }
+
+
+image_jobs = ImageJobQueue()
+
+IMAGE_JOBS = registry.gauge("yolyap_image_jobs", "Image jobs held in memory by status", ("status",))
+IMAGE_JOBS.set_function(lambda: {(status,): n for status, n in image_jobs.stats()["jobs"].items()})
+IMAGE_JOB_QUEUE = registry.gauge("yolyap_image_job_queue_depth", "Image jobs waiting for a worker")
+IMAGE_JOB_QUEUE.set_function(lambda: {(): image_jobs.stats()["queued"]})
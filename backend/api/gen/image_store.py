@@ -0,0 +1,226 @@
+# backend/api/gen/image_store.py
+"""
+Image persistence for /gen without blocking the event loop
+
+base64 decoding and file writes run on a small thread pool. Each image is
+written to a dot-prefixed temp file and renamed into place, so /gen/image/...
+and the avatar cache never see a half-written file. fsync policy (IMAGE_FSYNC):
+
+  always - fsync the file before the rename and the directory after it
+  batch  - rename right away; a flusher thread fsyncs the files written in the
+           last IMAGE_FSYNC_INTERVAL_MS together with one directory fsync
+  off    - leave write-back to the OS
+
+Generated images can be regenerated, so the default (batch) accepts losing the
+last interval's writes on power loss and keeps fsync off the request path.
+"""
+import asyncio
+import base64
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from loguru import logger
+
+IMAGE_FSYNC = os.getenv("IMAGE_FSYNC", "batch").strip().lower()
+IMAGE_FSYNC_INTERVAL_MS = float(os.getenv("IMAGE_FSYNC_INTERVAL_MS", "200"))
+IMAGE_STORE_THREADS = max(1, int(os.getenv("IMAGE_STORE_THREADS", "4")))
+
+FSYNC_MODES = ("always", "batch", "off")
+
+
+# base64 chars per decode call; binascii holds the GIL for a whole call, so big
+# payloads are decoded in pieces to let the event loop thread in between
+_DECODE_CHUNK = 1 << 20   # multiple of 4: every chunk is whole 4-char groups
+
+
+def _b64decode(b64: str, decode) -> bytes:
+    if len(b64) <= _DECODE_CHUNK:
+        return decode(b64)
+    try:
+        return b"".join(decode(b64[i:i + _DECODE_CHUNK]) for i in range(0, len(b64), _DECODE_CHUNK))
+    except Exception:
+        # stray characters (line breaks...) shift the groups; decode in one go
+        return decode(b64)
+
+
+def decode_data_uri(data_uri: str) -> Tuple[bytes, str]:
+    """data:image/...;base64,... -> (bytes, file extension)"""
+    head, b64 = data_uri.split(",", 1)
+    # mime like data:image/png;base64,...
+    mime = head[len("data:"):].split(";")[0].lower()
+    # robust decode with padding; b64decode silently drops "-" and "_", so pick the urlsafe alphabet up front
+    padded = b64 + "=" * ((4 - len(b64) % 4) % 4)
+    urlsafe = "-" in b64 or "_" in b64
+    raw = _b64decode(padded, base64.urlsafe_b64decode if urlsafe else base64.b64decode)
+    ext = "png"
+    if "jpeg" in mime or "jpg" in mime:
+        ext = "jpg"
+    elif "webp" in mime:
+        ext = "webp"
+    return raw, ext
+
+
+class ImageStore:
+    """Atomic image writes on a thread pool with an fsync policy (see module docstring)"""
+
+    def __init__(self, directory: Path, fsync: str = IMAGE_FSYNC,
+                 fsync_interval_ms: float = IMAGE_FSYNC_INTERVAL_MS, threads: int = IMAGE_STORE_THREADS):
+        if fsync not in FSYNC_MODES:
+            logger.warning(f"[image-store] unknown IMAGE_FSYNC={fsync!r}, using batch")
+            fsync = "batch"
+        self.directory = Path(directory)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.threads = threads
+        self._pool = self._new_pool()
+        self._pending: List[Path] = []
+        self._cond = threading.Condition()
+        self._flusher: Optional[threading.Thread] = None
+        self._closing = False
+        self._stats = {"writes": 0, "bytes": 0, "errors": 0, "fsyncs": 0, "fsync_batches": 0}
+
+    def _new_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="image-store")
+
+    # ---- blocking side (pool threads) ----
+
+    def write(self, data: bytes, name: str, overwrite: bool = True) -> Path:
+        """Write data to directory/name via temp file + rename; blocking"""
+        path = self.directory / name
+        if not overwrite and path.exists():
+            return path
+        tmp = self.directory / f".{name}.{uuid4().hex[:8]}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+                if self.fsync == "always":
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            self._stats["errors"] += 1
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            raise
+        self._stats["writes"] += 1
+        self._stats["bytes"] += len(data)
+        if self.fsync == "always":
+            self._stats["fsyncs"] += 1
+            self._fsync_dir()
+        elif self.fsync == "batch":
+            self._schedule_fsync(path)
+        return path
+
+    def _decode_and_write(self, data_uri: str, stem: str) -> str:
+        raw, ext = decode_data_uri(data_uri)
+        name = f"{stem}.{ext}"
+        self.write(raw, name)
+        return name
+
+    def _fsync_dir(self):
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:  # e.g. Windows: directories cannot be opened
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _schedule_fsync(self, path: Path):
+        with self._cond:
+            self._pending.append(path)
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name="image-store-fsync", daemon=True)
+                self._flusher.start()
+            self._cond.notify()
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if self._closing:
+                    return  # close() flushes what is left
+                # let the batch fill up; close() wakes us early
+                self._cond.wait(self.fsync_interval)
+                if self._closing:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """fsync files written since the last flush plus the directory; returns the file count"""
+        with self._cond:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        for path in set(batch):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:  # replaced or deleted meanwhile
+                continue
+            try:
+                os.fsync(fd)
+                self._stats["fsyncs"] += 1
+            except OSError as e:
+                logger.warning(f"[image-store] fsync failed for {path.name}: {e}")
+            finally:
+                os.close(fd)
+        self._fsync_dir()
+        self._stats["fsync_batches"] += 1
+        return len(batch)
+
+    def close(self):
+        """Finish queued writes and fsync pending files (shutdown); the store stays usable afterwards"""
+        pool, self._pool = self._pool, self._new_pool()
+        pool.shutdown(wait=True)
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            flusher = self._flusher
+        if flusher is not None:
+            flusher.join()
+        with self._cond:
+            self._closing = False
+            self._flusher = None
+        self.flush()
+
+    # ---- async side ----
+
+    async def save(self, data: bytes, ext: str = "png", stem: Optional[str] = None) -> str:
+        """Write bytes off the loop; returns the file name"""
+        name = f"{stem or uuid4().hex}.{(ext or 'png').lower().strip('.')}"
+        await asyncio.get_running_loop().run_in_executor(self._pool, self.write, data, name)
+        return name
+
+    async def save_data_uri(self, data_uri: str, stem: Optional[str] = None) -> str:
+        """Decode + write a data URI in one pool hop; returns the file name"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._pool, self._decode_and_write, data_uri, stem or uuid4().hex)
+
+    def save_in_background(self, data: bytes, name: str, overwrite: bool = False) -> Future:
+        """Fire-and-forget write for sync callers; failures are logged"""
+        future = self._pool.submit(self.write, data, name, overwrite)
+        future.add_done_callback(
+            lambda f: f.exception() and logger.warning(f"[image-store] write {name} failed: {f.exception()}"))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            **self._stats,
+            "pending_fsync": pending,
+            "queued_writes": self._pool._work_queue.qsize(),
+            "fsync": self.fsync,
+            "fsync_interval_ms": self.fsync_interval * 1000,
+            "threads": self.threads,
+        }
@@ -0,0 +1,85 @@
+# backend/api/gen/inline_cache.py
+"""
+In-memory image cache behind /gen/image/inline/{id}
+
+LRU (OrderedDict) bounded by item count and total bytes, with a TTL. Insert,
+hit and eviction are O(1): entries are evicted from the LRU end, and expired
+ones are dropped when read or when they reach that end. The disk backup the
+routes write (IMAGES_DIR/<id>.png) is the second tier; every uvicorn worker
+reads the same directory, so a miss here can still be served from disk, and an
+image put() rejects as larger than the byte budget is only kept there.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class InlineImage(NamedTuple):
+    data: bytes
+    mime: str
+    expires_at: float
+
+
+class InlineImageCache:
+    def __init__(self, max_bytes: int = 64 << 20, max_items: int = 200, ttl_sec: float = 600):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.ttl_sec = ttl_sec
+        self.bytes = 0
+        self._entries: "OrderedDict[str, InlineImage]" = OrderedDict()
+        self._stats = {"puts": 0, "hits": 0, "misses": 0, "expired": 0, "evicted": 0, "too_large": 0}
+
+    def _drop(self, key: str):
+        self.bytes -= len(self._entries.pop(key).data)
+
+    def get(self, key: str) -> Optional[InlineImage]:
+        item = self._entries.get(key)
+        if item is not None and item.expires_at <= time.time():
+            self._drop(key)
+            self._stats["expired"] += 1
+            item = None
+        if item is None:
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return item
+
+    def put(self, key: str, data: bytes, mime: str) -> bool:
+        """Store (or refresh) an image; False if it alone exceeds the byte budget"""
+        self._stats["puts"] += 1
+        if key in self._entries:
+            self._drop(key)
+        if len(data) > self.max_bytes:
+            self._stats["too_large"] += 1
+            return False
+        now = time.time()
+        self._entries[key] = InlineImage(data, mime, now + self.ttl_sec)
+        self.bytes += len(data)
+        # Oldest-used first: expired ones at the front, then whatever exceeds the budgets
+        while self._entries:
+            oldest_key, oldest = next(iter(self._entries.items()))
+            if oldest.expires_at <= now:
+                self._stats["expired"] += 1
+            elif self.bytes > self.max_bytes or len(self._entries) > self.max_items:
+                self._stats["evicted"] += 1
+            else:
+                break
+            self._drop(oldest_key)
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "max_items": self.max_items,
+            "ttl_sec": self.ttl_sec,
+        }
@@ -0,0 +1,332 @@
+# backend/api/gen/poi_index.py
+"""
+Offline POI index for /gen/places - in-process nearby/nationwide queries
+
+Columnar little-endian file built by data/build_poi_index.py, memory-mapped on
+first use. POIs are sorted by grid cell, so a cell is one contiguous id range;
+per-persona postings lists give every POI of a category without a scan.
+
+Layout (sections 4-byte aligned, in this order):
+  header      HEADER struct below
+  lat, lon    float32[n]
+  mask        uint8[n]            persona bitmask (bit i = PERSONAS[i])
+  cell_start  uint32[cells + 1]   row-major over (rows x cols) cells of cell_deg
+  post_start  uint32[personas + 1]
+  postings    uint32[...]         sorted POI ids per persona
+  name_off    uint32[n + 1]       -> names (utf-8)
+  cat_off     uint32[n + 1]       -> categories (utf-8, Mapbox-style "a, b")
+  names, categories
+"""
+import heapq
+import mmap
+import os
+import struct
+from array import array
+from math import cos, radians
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from api.gen.geocode_cache import GeoFeature
+
+MAGIC = b"YPOI"
+VERSION = 1
+# magic, version, personas, n, rows, cols, cell_deg, min_lat, min_lon, postings, names_len, cats_len
+HEADER = struct.Struct("<4sHHIHHfffIII")
+
+# Bit order of the persona mask; keep in sync with the index file (VERSION)
+PERSONAS: Tuple[str, ...] = (
+    "history", "food", "nature", "culture", "shopping", "adventure", "seaside", "entertainment",
+)
+
+# Category words (OSM tag values and Mapbox categories) that put a POI under a persona
+PERSONA_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "history": ("historic", "monument", "memorial", "castle", "ruins", "archaeological", "heritage", "fort"),
+    "food": ("restaurant", "cafe", "bakery", "fast_food", "street food", "ice_cream", "food"),
+    "nature": ("park", "garden", "nature", "trail", "viewpoint", "peak", "forest", "waterfall"),
+    "culture": ("museum", "gallery", "arts_centre", "theatre", "culture", "artwork"),
+    "shopping": ("marketplace", "market", "bazaar", "mall", "shop", "department_store"),
+    "adventure": ("climbing", "zipline", "adventure", "water_park", "theme_park", "diving"),
+    "seaside": ("beach", "marina", "sea", "coast"),
+    "entertainment": ("cinema", "nightclub", "club", "bar", "pub", "live music", "music", "theme_park"),
+}
+
+POI_INDEX_PATH = os.getenv(
+    "POI_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "poi_index_tr.bin")
+)
+_KM_PER_DEG = 111.32
+# Persona queries with at most this many postings score them directly; larger ones search grid rings
+POSTINGS_SCAN_MAX = int(os.getenv("POI_POSTINGS_SCAN_MAX", "4000"))
+
+
+def persona_mask(personas: Iterable[str]) -> int:
+    mask = 0
+    for p in personas:
+        if p in PERSONAS:
+            mask |= 1 << PERSONAS.index(p)
+    return mask
+
+
+def personas_for_categories(categories: Sequence[str]) -> List[str]:
+    """Personas whose keywords appear in any of the (lower-case) category strings"""
+    return [p for p in PERSONAS if any(kw in c for c in categories for kw in PERSONA_KEYWORDS[p])]
+
+
+def _align(n: int) -> int:
+    return (n + 3) & ~3
+
+
+class POIIndex:
+    """Read side of the index; every query returns GeoFeature tuples like the geocoding path"""
+
+    def __init__(self, path: str = POI_INDEX_PATH):
+        self.path = path
+        self._loaded = False
+        self._map: Optional[mmap.mmap] = None
+        self.count = 0
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._parse()
+            logger.info(f"🗺️ POI index: {self.count} POIs, {self.rows}x{self.cols} cells from {self.path}")
+        except FileNotFoundError:
+            logger.info(f"POI index not found at {self.path}; places use Mapbox geocoding only")
+            self._map, self.count = None, 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"POI index unusable ({e}); places use Mapbox geocoding only")
+            self._map, self.count = None, 0
+
+    def _parse(self):
+        (magic, version, n_personas, n, rows, cols, cell_deg, min_lat, min_lon,
+         n_postings, names_len, cats_len) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or n_personas != len(PERSONAS):
+            raise ValueError(f"unexpected header {magic!r} v{version} personas={n_personas}")
+        view = memoryview(self._map)
+        pos = _align(HEADER.size)
+
+        def take(nbytes: int, fmt: Optional[str]):
+            nonlocal pos
+            if pos + nbytes > len(view):
+                raise ValueError("truncated file")
+            part = view[pos:pos + nbytes]
+            pos = _align(pos + nbytes)
+            return part.cast(fmt) if fmt else part
+
+        self.lat = take(4 * n, "f")
+        self.lon = take(4 * n, "f")
+        self.mask = take(n, "B")
+        self.cell_start = take(4 * (rows * cols + 1), "I")
+        self.post_start = take(4 * (n_personas + 1), "I")
+        self.postings = take(4 * n_postings, "I")
+        self.name_off = take(4 * (n + 1), "I")
+        self.cat_off = take(4 * (n + 1), "I")
+        self.names = take(names_len, None)
+        self.cats = take(cats_len, None)
+        self.count, self.rows, self.cols = n, rows, cols
+        self.cell_deg, self.min_lat, self.min_lon = cell_deg, min_lat, min_lon
+
+    def available(self) -> bool:
+        if not self._loaded:
+            self._load()
+        return self.count > 0
+
+    def feature(self, i: int) -> GeoFeature:
+        name = bytes(self.names[self.name_off[i]:self.name_off[i + 1]]).decode("utf-8")
+        cat = bytes(self.cats[self.cat_off[i]:self.cat_off[i + 1]]).decode("utf-8")
+        return GeoFeature(name, float(self.lon[i]), float(self.lat[i]), cat)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        r = int((lat - self.min_lat) / self.cell_deg)
+        c = int((lon - self.min_lon) / self.cell_deg)
+        return min(max(r, 0), self.rows - 1), min(max(c, 0), self.cols - 1)
+
+    def _cell_ids(self, r: int, c: int) -> range:
+        k = r * self.cols + c
+        return range(self.cell_start[k], self.cell_start[k + 1])
+
+    def _nearest(self, ids: Iterable[int], lat: float, lon: float, limit: int,
+                 max_km: Optional[float] = None, mask: int = 0) -> List[int]:
+        """Closest `limit` ids by equirectangular distance, optionally within max_km / persona mask"""
+        kx = cos(radians(lat))
+        lats, lons, masks = self.lat, self.lon, self.mask
+        max_d2 = (max_km / _KM_PER_DEG) ** 2 if max_km is not None else None
+        scored = []
+        for i in ids:
+            if mask and not masks[i] & mask:
+                continue
+            dy = lats[i] - lat
+            dx = (lons[i] - lon) * kx
+            d2 = dx * dx + dy * dy
+            if max_d2 is None or d2 <= max_d2:
+                scored.append((d2, i))
+        return [i for _, i in heapq.nsmallest(limit, scored)]
+
+    def _nearest_rings(self, lat: float, lon: float, limit: int, mask: int) -> List[int]:
+        """
+        Exact `limit` nearest ids matching mask (same order as _nearest over every
+        POI): grid rings grow around the user until no unvisited cell can hold a
+        POI closer than the current limit-th one.
+        """
+        kx = cos(radians(lat))
+        lats, lons, masks = self.lat, self.lon, self.mask
+        cell = self.cell_deg
+        r0, c0 = self._cell(lat, lon)
+        heap: List[Tuple[float, int]] = []   # max-heap of the best (d2, id) via negated values
+        ring = 0
+        while ring <= max(self.rows, self.cols):
+            for r in range(r0 - ring, r0 + ring + 1):
+                if not 0 <= r < self.rows:
+                    continue
+                cs = range(c0 - ring, c0 + ring + 1) if r in (r0 - ring, r0 + ring) else (c0 - ring, c0 + ring)
+                for c in cs:
+                    if not 0 <= c < self.cols:
+                        continue
+                    for i in self._cell_ids(r, c):
+                        if not masks[i] & mask:
+                            continue
+                        dy = lats[i] - lat
+                        dx = (lons[i] - lon) * kx
+                        item = (-(dx * dx + dy * dy), -i)
+                        if len(heap) < limit:
+                            heapq.heappush(heap, item)
+                        elif item > heap[0]:
+                            heapq.heapreplace(heap, item)
+            if len(heap) >= limit:
+                # Distance from the user to the nearest edge of the visited block of cells;
+                # edges on the border of the grid have nothing behind them
+                inf = float("inf")
+                edges = (
+                    lat - (self.min_lat + (r0 - ring) * cell) if r0 - ring > 0 else inf,
+                    self.min_lat + (r0 + ring + 1) * cell - lat if r0 + ring < self.rows - 1 else inf,
+                    (lon - (self.min_lon + (c0 - ring) * cell)) * kx if c0 - ring > 0 else inf,
+                    (self.min_lon + (c0 + ring + 1) * cell - lon) * kx if c0 + ring < self.cols - 1 else inf,
+                )
+                bound = min(edges) - 1e-9   # slack for float32 cell assignment
+                if bound > 0 and bound * bound > -heap[0][0]:
+                    break
+            ring += 1
+        return [-i for _, i in sorted(heap, reverse=True)]
+
+    def nearby(self, lat: float, lon: float, radius_km: float, personas: Sequence[str] = (),
+               limit: int = 400) -> List[GeoFeature]:
+        """POIs within radius_km (grid cells covering the circle), closest first"""
+        if not self.available():
+            return []
+        span = radius_km / (_KM_PER_DEG * self.cell_deg)
+        span_lon = span / max(0.01, cos(radians(lat)))
+        r0, c0 = self._cell(lat - span * self.cell_deg, lon - span_lon * self.cell_deg)
+        r1, c1 = self._cell(lat + span * self.cell_deg, lon + span_lon * self.cell_deg)
+        ids = (i for r in range(r0, r1 + 1) for c in range(c0, c1 + 1) for i in self._cell_ids(r, c))
+        return [self.feature(i) for i in self._nearest(ids, lat, lon, limit, radius_km, persona_mask(personas))]
+
+    def nationwide(self, lat: float, lon: float, personas: Sequence[str] = (),
+                   limit: int = 400) -> List[GeoFeature]:
+        """
+        Closest POIs of the given personas anywhere in the index (postings lists);
+        without personas, grid rings around the user until `limit` POIs are seen.
+        """
+        if not self.available():
+            return []
+        wanted = [PERSONAS.index(p) for p in personas if p in PERSONAS]
+        if wanted:
+            total = sum(self.post_start[b + 1] - self.post_start[b] for b in wanted)
+            if total > POSTINGS_SCAN_MAX:
+                return [self.feature(i) for i in self._nearest_rings(lat, lon, limit, persona_mask(personas))]
+            # Small lists: score the postings; an id also listed under an earlier persona is skipped
+            masks = self.mask
+            earlier = [sum(1 << e for e in wanted[:n]) for n in range(len(wanted))]
+            ids = (i for n, b in enumerate(wanted)
+                   for i in self.postings[self.post_start[b]:self.post_start[b + 1]]
+                   if not masks[i] & earlier[n])
+            return [self.feature(i) for i in self._nearest(ids, lat, lon, limit)]
+
+        r0, c0 = self._cell(lat, lon)
+        seen: List[int] = []
+        ring = 0
+        # One extra ring after reaching `limit`: cells of the next ring can still hold closer POIs
+        extra = 1
+        while ring <= max(self.rows, self.cols):
+            for r in range(r0 - ring, r0 + ring + 1):
+                if not 0 <= r < self.rows:
+                    continue
+                cs = range(c0 - ring, c0 + ring + 1) if r in (r0 - ring, r0 + ring) else (c0 - ring, c0 + ring)
+                for c in cs:
+                    if 0 <= c < self.cols:
+                        seen.extend(self._cell_ids(r, c))
+            if len(seen) >= limit:
+                if not extra:
+                    break
+                extra -= 1
+            ring += 1
+        return [self.feature(i) for i in self._nearest(seen, lat, lon, limit)]
+
+
+def write_index(pois: Sequence[Tuple[str, float, float, str]], path: str, cell_deg: float = 0.1) -> int:
+    """
+    Write (name, lat, lon, category) records as an index file; returns the POI count.
+    `category` is a Mapbox-style "a, b" string; matched persona names are appended to it.
+    """
+    if not pois:
+        raise ValueError("no POIs to index")
+    # Grid math on float32 values, exactly as the reader sees them
+    f32 = struct.Struct("<f")
+    cell_deg = f32.unpack(f32.pack(cell_deg))[0]
+    pois = [(name, f32.unpack(f32.pack(plat))[0], f32.unpack(f32.pack(plon))[0], category)
+            for name, plat, plon, category in pois]
+    min_lat = min(p[1] for p in pois)
+    min_lon = min(p[2] for p in pois)
+    rows = int((max(p[1] for p in pois) - min_lat) / cell_deg) + 1
+    cols = int((max(p[2] for p in pois) - min_lon) / cell_deg) + 1
+
+    def cell(p) -> int:
+        return int((p[1] - min_lat) / cell_deg) * cols + int((p[2] - min_lon) / cell_deg)
+
+    ordered = sorted(pois, key=lambda p: (cell(p), p[1], p[2]))
+    lat, lon, mask = array("f"), array("f"), bytearray()
+    cell_start = array("I", [0] * (rows * cols + 1))
+    postings: List[List[int]] = [[] for _ in PERSONAS]
+    names, cats = bytearray(), bytearray()
+    name_off, cat_off = array("I", [0]), array("I", [0])
+
+    for i, (name, plat, plon, category) in enumerate(ordered):
+        tags = [t.strip().lower() for t in category.split(",") if t.strip()]
+        personas = personas_for_categories(tags)
+        tags += [p for p in personas if p not in tags]
+        lat.append(plat)
+        lon.append(plon)
+        mask.append(persona_mask(personas))
+        for p in personas:
+            postings[PERSONAS.index(p)].append(i)
+        cell_start[cell((name, plat, plon)) + 1] += 1
+        names += name.encode("utf-8")
+        cats += ", ".join(tags).encode("utf-8")
+        name_off.append(len(names))
+        cat_off.append(len(cats))
+    for k in range(1, len(cell_start)):
+        cell_start[k] += cell_start[k - 1]
+    post_start = array("I", [0])
+    flat = array("I")
+    for ids in postings:
+        flat.extend(ids)
+        post_start.append(len(flat))
+
+    if array("I").itemsize != 4 or struct.pack("=I", 1) != struct.pack("<I", 1):
+        raise RuntimeError("index writer expects a little-endian platform with 32-bit unsigned ints")
+    sections = [lat.tobytes(), lon.tobytes(), bytes(mask), cell_start.tobytes(), post_start.tobytes(),
+                flat.tobytes(), name_off.tobytes(), cat_off.tobytes(), bytes(names), bytes(cats)]
+    header = HEADER.pack(MAGIC, VERSION, len(PERSONAS), len(ordered), rows, cols, cell_deg, min_lat, min_lon,
+                         len(flat), len(names), len(cats))
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        for part in [header] + sections:
+            f.write(part)
+            f.write(b"\0" * (_align(len(part)) - len(part)))
+    os.replace(tmp, path)
+    return len(ordered)
+
+
+poi_index = POIIndex()
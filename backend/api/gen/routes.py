@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 import time
 import json
+import asyncio
+import heapq
+import re
 import os
 import httpx
 import base64
 import hashlib
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
+from functools import lru_cache
+from contextlib import contextmanager
 from pathlib import Path
-from uuid import uuid4
-from starlette.responses import FileResponse, Response
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from math import radians, sin, cos, asin, sqrt
-from time import time as _now
+from loguru import logger
+
+from metrics import registry, track_stage, track_upstream, record_cache
+from api.gen.geocode_cache import GeocodeCache, GeoFeature, parse_features
+from api.gen.poi_index import poi_index
+from api.gen.image_jobs import TERMINAL, QueueFullError, RateLimitedError, SubmitRateLimiter, image_jobs
+from api.gen.avatar_cache import AvatarCache, AvatarCreator, avatar_key
+from api.gen.image_store import ImageStore
+from api.gen.inline_cache import InlineImageCache
 
 
 router = APIRouter()
@@ -107,61 +119,48 @@ def _avatar_style_prompt(selections: list[str]) -> str:
 
 # --- image persistence helpers ---
 
-def _save_bytes_as_image(data: bytes, ext: str = "png") -> str:
-    ext = (ext or "png").lower().strip(".")
-    name = uuid4().hex + f".{ext}"
-    path = IMAGES_DIR / name
-    with open(path, "wb") as f:
-        f.write(data)
-        try:
-            f.flush()
-            os.fsync(f.fileno())
-        except Exception:
-            pass
-    if not path.exists() or path.stat().st_size == 0:
-        raise RuntimeError(f"image write failed: {path}")
-    print(f"[gen-image] saved -> {path.resolve()}")
+# Decode + write run on image_store's thread pool (temp file + rename, batched fsync)
+image_store = ImageStore(IMAGES_DIR)
+
+async def _save_bytes_as_image(data: bytes, ext: str = "png", stem: Optional[str] = None) -> str:
+    if not data:
+        raise RuntimeError("image write failed: empty data")
+    name = await image_store.save(data, ext, stem)
+    logger.debug(f"[gen-image] saved -> {(IMAGES_DIR / name).resolve()}")
     return f"/gen/image/{name}"
 
-def _save_bytes_as_png(data: bytes) -> str:
-    return _save_bytes_as_image(data, "png")
+async def _save_bytes_as_png(data: bytes) -> str:
+    return await _save_bytes_as_image(data, "png")
 
-async def _ensure_local_image(url_or_data: str) -> str:
-    """Accept a data URI or http(s) URL, store as PNG under IMAGES_DIR, return backend URL path."""
+async def _ensure_local_image(url_or_data: str, stem: Optional[str] = None) -> str:
+    """Accept a data URI or http(s) URL, store as PNG under IMAGES_DIR (as <stem>.<ext> if given), return backend URL path."""
     if not url_or_data:
         raise RuntimeError("empty image data")
     if url_or_data.startswith("data:image"):
         try:
-            head, b64 = url_or_data.split(",", 1)
-            # mime like data:image/png;base64,...
-            mime = head[len("data:"):].split(";")[0].lower()
-            # robust decode with padding and urlsafe fallback
-            try:
-                raw = base64.b64decode(b64 + "=" * ((4 - len(b64) % 4) % 4))
-            except Exception:
-                raw = base64.urlsafe_b64decode(b64 + "=" * ((4 - len(b64) % 4) % 4))
-            ext = "png"
-            if "jpeg" in mime or "jpg" in mime:
-                ext = "jpg"
-            elif "webp" in mime:
-                ext = "webp"
-            elif "png" in mime:
-                ext = "png"
-            return _save_bytes_as_image(raw, ext)
+            name = await image_store.save_data_uri(url_or_data, stem)
         except Exception as e:
             raise RuntimeError(f"data uri decode failed: {e}")
+        logger.debug(f"[gen-image] saved -> {(IMAGES_DIR / name).resolve()}")
+        return f"/gen/image/{name}"
     if url_or_data.startswith("http://") or url_or_data.startswith("https://"):
         async with httpx.AsyncClient(timeout=60) as hc:
             r = await hc.get(url_or_data)
             r.raise_for_status()
-            return _save_bytes_as_png(r.content)
+            return await _save_bytes_as_image(r.content, "png", stem)
     raise RuntimeError("unsupported image source")
 
 # --- inline (non-persistent) image proxy ---
-# Keeps images in memory for a short time and serves them via a stable URL, without writing to disk.
-_INLINE_CACHE: dict[str, dict] = {}
-_INLINE_TTL_SEC = 10 * 60   # 10 minutes
-_INLINE_MAX_ITEMS = 200
+# Keeps images in memory for a short time and serves them via a stable URL; the optional
+# disk backup (INLINE_BACKUP_TO_DISK) is the tier shared by all workers and reloads.
+# Images over the memory budget are always written to disk.
+_INLINE_CACHE = InlineImageCache(
+    max_bytes=int(float(os.getenv("INLINE_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    max_items=int(os.getenv("INLINE_CACHE_MAX_ITEMS", "200")),
+    ttl_sec=float(os.getenv("INLINE_CACHE_TTL_SEC", str(10 * 60))),   # 10 minutes
+)
+registry.gauge("yolyap_inline_image_cache_bytes", "Bytes held by the inline image cache") \
+    .set_function(lambda: {(): _INLINE_CACHE.bytes})
 
 def _parse_data_uri(data_uri: str) -> tuple[str, bytes]:
     if not data_uri.startswith("data:image"):
@@ -174,31 +173,17 @@ def _parse_data_uri(data_uri: str) -> tuple[str, bytes]:
     except Exception as e:
         raise RuntimeError(f"invalid data uri: {e}")
 
-def _inline_put(raw: bytes, mime: str) -> str:
-    # evict expired
-    now = _now()
-    if len(_INLINE_CACHE) >= _INLINE_MAX_ITEMS:
-        # drop oldest
-        to_drop = sorted(_INLINE_CACHE.items(), key=lambda kv: kv[1].get("ts", 0))[:50]
-        for k, _ in to_drop:
-            _INLINE_CACHE.pop(k, None)
-    # drop stale
-    stale = [k for k,v in list(_INLINE_CACHE.items()) if now - v.get("ts", 0) > _INLINE_TTL_SEC]
-    for k in stale:
-        _INLINE_CACHE.pop(k, None)
+async def _inline_put(raw: bytes, mime: str) -> str:
     # use sha256 of bytes as stable id, so we can serve from disk if cache is lost
     img_id = hashlib.sha256(raw).hexdigest()
-    _INLINE_CACHE[img_id] = {"bytes": raw, "mime": mime or "image/png", "ts": now}
-    # optional backup to disk to survive reload/worker switch
-    if os.getenv("INLINE_BACKUP_TO_DISK", "true").strip().lower() in ("1","true","yes","on"):
-        try:
-            path = IMAGES_DIR / f"{img_id}.png"
-            if not path.exists():
-                with open(path, "wb") as f:
-                    f.write(raw)
-        except Exception as e:
-            print(f"[inline] disk backup failed: {e}")
-    print(f"[inline] put id={img_id} bytes={len(raw)} path={(IMAGES_DIR / (img_id + '.png')).resolve()}")
+    # LRU + TTL + byte budget
+    if not _INLINE_CACHE.put(img_id, raw, mime or "image/png"):
+        # larger than the whole budget: disk is the only copy, so it must exist before the URL is handed out
+        await image_store.save(raw, "png", img_id)
+    elif os.getenv("INLINE_BACKUP_TO_DISK", "true").strip().lower() in ("1","true","yes","on"):
+        # optional backup to disk to survive reload/worker switch (written in the background)
+        image_store.save_in_background(raw, f"{img_id}.png")
+    logger.debug(f"[inline] put id={img_id} bytes={len(raw)} path={(IMAGES_DIR / (img_id + '.png')).resolve()}")
     return img_id
 
 def _inline_url_for(img_id: str, req: Request) -> str:
@@ -208,10 +193,11 @@ def _inline_url_for(img_id: str, req: Request) -> str:
 @router.get("/gen/image/inline/{img_id}")
 async def get_inline_image(img_id: str):
     item = _INLINE_CACHE.get(img_id)
+    record_cache("inline_image", bool(item))
     if item:
         return Response(
-            content=item["bytes"],
-            media_type=item["mime"],
+            content=item.data,
+            media_type=item.mime,
             headers={
                 "Access-Control-Allow-Origin": "*",
                 "Cache-Control": "public, max-age=300"
@@ -224,7 +210,7 @@ async def get_inline_image(img_id: str):
             "Access-Control-Allow-Origin": "*",
             "Cache-Control": "public, max-age=3600"
         })
-    print(f"[inline] miss id={img_id} tried={(IMAGES_DIR / (img_id + '.png')).resolve()}")
+    logger.debug(f"[inline] miss id={img_id} tried={(IMAGES_DIR / (img_id + '.png')).resolve()}")
     return Response(status_code=404, content="Not Found (inline cache)")
 # --------- OpenAI entegrasyonu (caption + tek cümle + görsel) ---------
 
@@ -243,7 +229,8 @@ async def get_generated_image(name: str):
         f"name: {name}\n"
         f"tried: {path.resolve()}\n"
     )
-    print(f"[persist] miss name={name} tried={path.resolve()}")
+    logger.debug(f"[persist] miss name={name} tried={path.resolve()}")
+    avatar_cache.forget(name)
     return Response(status_code=404, content=detail)
 
 # --- utility: list latest generated images ---
@@ -401,6 +388,12 @@ class GenIn(BaseModel):
     lon: Optional[float] = None
     radius_km: float = 5.0
     limit: int = 2
+    # true: görseli beklemeden dön; image_job ile /gen/image-jobs/{id} üzerinden takip et
+    async_image: bool = False
+
+class ImageJobIn(BaseModel):
+    # Serbest prompt kabul edilmez: avatar prompt'u seçimlerden sunucuda kurulur (/gen/generate ile aynı)
+    selections: list[str]
 
 # --------- LLM-backed recommendation input model ---------
 from typing import Optional
@@ -431,6 +424,77 @@ _PERSONA_QUERIES = {
 
 _DEF_QUERIES = ["point of interest", "poi"]
 
+# --- Mapbox geocoding fan-out ---
+_GEOCODE_URL = "https://api.mapbox.com/geocoding/v5/mapbox.places/{}.json"
+_GEOCODE_MAX_QUERIES = 8
+_GEOCODE_CONCURRENCY = max(1, int(os.getenv("GEOCODE_CONCURRENCY", "4")))
+# Whole-request budget for geocoding (persona queries + fallback together)
+_GEOCODE_DEADLINE_SEC = float(os.getenv("GEOCODE_DEADLINE_SEC", "6"))
+
+# Shared across users: same query around the same map tile -> same Mapbox answer
+geocode_cache = GeocodeCache(
+    max_entries=int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "4096")),
+    ttl_sec=float(os.getenv("GEOCODE_CACHE_TTL_SEC", "21600")),
+    tile_zoom=int(os.getenv("GEOCODE_CACHE_TILE_ZOOM", "12")),
+    enabled=os.getenv("GEOCODE_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on"),
+)
+
+
+# Offline POI index (data/build_poi_index.py); used first when the file exists
+_POI_INDEX_ENABLED = os.getenv("POI_INDEX_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+_POI_INDEX_MAX_CANDIDATES = int(os.getenv("POI_INDEX_MAX_CANDIDATES", "400"))
+
+
+async def _geocode_fanout(queries: list[str], params: dict, deadline: float) -> list[GeoFeature]:
+    """
+    Run up to 8 geocoding queries concurrently (at most GEOCODE_CONCURRENCY in flight).
+    Queries still running at `deadline` (loop time) are cancelled; features of the
+    finished ones are returned in query order, so a slow query only costs its own results.
+    """
+    qs = list(dict.fromkeys(queries))[:_GEOCODE_MAX_QUERIES]  # persona lists overlap ("historic")
+    remaining = deadline - asyncio.get_running_loop().time()
+    if not qs or remaining <= 0:
+        return []
+    sem = asyncio.Semaphore(_GEOCODE_CONCURRENCY)
+    area, params = geocode_cache.area_params(params)
+
+    async with httpx.AsyncClient(timeout=20) as hc:
+        async def _fetch(q: str) -> tuple[GeoFeature, ...]:
+            async with sem:
+                with track_upstream("mapbox", "geocoding") as t:
+                    try:
+                        r = await hc.get(_GEOCODE_URL.format(q), params=params)
+                    except asyncio.CancelledError:
+                        t.outcome = "deadline"
+                        raise
+                    t.status(r.status_code)
+            r.raise_for_status()
+            return parse_features(r.json().get("features", []))
+
+        async def _one(q: str) -> tuple[GeoFeature, ...]:
+            features, hit = await geocode_cache.get_or_fetch(geocode_cache.key(q, area, params), lambda: _fetch(q))
+            if geocode_cache.enabled:
+                record_cache("geocode", hit)
+            return features
+
+        tasks = [asyncio.create_task(_one(q)) for q in qs]
+        done, pending = await asyncio.wait(tasks, timeout=remaining)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"[places] geocoding deadline hit: {len(pending)}/{len(qs)} queries dropped")
+
+    all_feats: list[GeoFeature] = []
+    for q, task in zip(qs, tasks):
+        if task not in done:
+            continue
+        if task.exception() is not None:
+            logger.warning(f"[places] mapbox fetch fail for '{q}': {task.exception()}")
+            continue
+        all_feats.extend(task.result())
+    return all_feats
+
 class PlaceCandidate:
     def __init__(self, name: str, lat: float, lon: float, tags: Optional[list[str]] = None):
         self.name = name
@@ -442,63 +506,102 @@ class PlaceCandidate:
 _DEF_TAG_WEIGHT = 0.6
 _DEF_DIST_WEIGHT = 0.4
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    return R * c
-
-
-def _score_candidate(user_lat: float, user_lon: float, cand: PlaceCandidate, wanted: list[str]) -> dict:
-    """Return distance (km) and simple tag match score in [0,1]."""
-    dist_km = _haversine_km(user_lat, user_lon, cand.lat, cand.lon)
-    tags = set(cand.tags or [])
-    match = len(tags.intersection(set(wanted)))
-    tag_score = 0.0 if not wanted else (match / max(1, len(wanted)))
-    return {"dist_km": dist_km, "tag_score": tag_score}
-
-def _mk_candidates_from_mapbox(features: list[dict], wanted: list[str]) -> list[PlaceCandidate]:
+def _rank_candidates(user_lat: float, user_lon: float, cands: list[PlaceCandidate], wanted: list[str],
+                     radius_km: float, k: int) -> list[dict]:
+    """
+    Score all candidates in one pass and return the best k as response items.
+    Local: candidates within radius_km, or within the relaxed radius max(2r, 10km)
+    when none are - both taken from the same distance list. Nationwide
+    (radius_km <= 0): no distance filter, distance weighed on a 500 km scale.
+    """
+    if not cands:
+        return []
+    wanted_set = set(wanted)
+    tag_den = max(1, len(wanted))
+    cos_lat1 = cos(radians(user_lat))
+    dists: list[float] = []
+    tag_scores: list[float] = []
+    for c in cands:
+        # Haversine (km) with the user's side hoisted out of the loop
+        a = sin(radians(c.lat - user_lat) / 2) ** 2 + cos_lat1 * cos(radians(c.lat)) * sin(radians(c.lon - user_lon) / 2) ** 2
+        dists.append(6371.0 * (2 * asin(sqrt(a))))
+        tag_scores.append(len(wanted_set.intersection(c.tags or ())) / tag_den if wanted else 0.0)
+
+    if radius_km <= 0:
+        idx = range(len(cands))
+        scale, tag_w, dist_w = 500.0, 0.8, 0.2
+    else:
+        idx = [i for i, d in enumerate(dists) if d <= radius_km]
+        scale, tag_w, dist_w = max(0.001, radius_km), _DEF_TAG_WEIGHT, _DEF_DIST_WEIGHT
+        logger.debug(f"[places] scored(within {radius_km}km)={len(idx)}")
+        if not idx:
+            relaxed_radius = max(radius_km * 2, 10.0)
+            logger.info(f"[places] relaxing radius to {relaxed_radius}km")
+            idx = [i for i, d in enumerate(dists) if d <= relaxed_radius]
+            scale = max(0.001, relaxed_radius)
+            logger.debug(f"[places] scored(relaxed)={len(idx)}")
+
+    def score(i: int) -> float:
+        return round(tag_w * tag_scores[i] + dist_w * max(0.0, 1.0 - dists[i] / scale), 4)
+
+    # nlargest == sorted(..., reverse=True)[:k], ties keep candidate order
+    return [{
+        "name": cands[i].name,
+        "lat": cands[i].lat,
+        "lon": cands[i].lon,
+        "distance_km": round(dists[i], 3),
+        "score": score(i),
+        "tags": cands[i].tags or [],
+    } for i in heapq.nlargest(k, idx, key=score)]
+
+# Generic streets/roads/areas - substrings of the lower-cased name
+_DROP_TOKENS = (
+    "sokak", "sokağı", "sokaği", "cadde", "caddesi", "bulvar", "mahalle", "mahallesi",
+    "street", "st.", "avenue", "road", "rd", "blvd", "ave",
+)
+# Allowed venue keywords (name-based); a category matching the persona also allows a place
+_ALLOW_KEYWORDS = (
+    "müze", "museum", "saray", "palace", "antik", "ancient", "arkeoloji", "archaeolog",
+    "ören", "ruin", "restaurant", "restoran", "mağaza", "store", "shop", "market", "bazaar", "çarşı", "mall",
+)
+# One alternation per list instead of a Python-level any() per token
+_DROP_RE = re.compile("|".join(map(re.escape, _DROP_TOKENS)))
+_ALLOW_RE = re.compile("|".join(map(re.escape, _ALLOW_KEYWORDS)))
+
+
+@lru_cache(maxsize=64)
+def _wanted_re(wanted: tuple) -> Optional[re.Pattern]:
+    return re.compile("|".join(map(re.escape, wanted))) if wanted else None
+
+
+@lru_cache(maxsize=4096)
+def _category_tags(category: str, wanted: tuple) -> tuple:
+    """Mapbox categories mentioning a wanted persona; memoised, category strings repeat across features."""
+    matcher = _wanted_re(wanted)
+    if matcher is None or not category:
+        return ()
+    return tuple(t for t in (c.strip().lower() for c in category.split(",")) if t and matcher.search(t))
+
+
+def _mk_candidates_from_mapbox(features: list[GeoFeature], wanted: list[str]) -> list[PlaceCandidate]:
     seen = set()
     out: list[PlaceCandidate] = []
+    wanted_key = tuple(wanted)
+    drop, allow = _DROP_RE.search, _ALLOW_RE.search
     for f in features:
-        try:
-            name = f.get("text") or f.get("place_name")
-            coords = f.get("geometry", {}).get("coordinates") or []
-            lon, lat = float(coords[0]), float(coords[1])
-        except Exception:
-            continue
-        # Skip generic streets/roads/areas
+        name = f.name
         lower_name = (name or "").lower()
-        drop_tokens = [
-            "sokak", "sokağı", "sokaği", "cadde", "caddesi", "bulvar", "mahalle", "mahallesi",
-            "street", "st.", "avenue", "road", "rd", "blvd", "ave"
-        ]
-        if any(tok in lower_name for tok in drop_tokens):
+        if drop(lower_name):
             continue
-        key = (name, round(lat, 6), round(lon, 6))
+        key = (name, round(f.lat, 6), round(f.lon, 6))
         if key in seen:
             continue
         seen.add(key)
-        # tag çıkarımı: Mapbox properties.category varsa bunu dağıt
-        props = f.get("properties") or {}
-        cats = props.get("category") or ""
-        raw_tags = [c.strip().lower() for c in cats.split(",") if c.strip()]
-        # wanted ile kaba eşleme
-        tags = []
-        for t in raw_tags:
-            if any(w in t for w in wanted):
-                tags.append(t)
-        # Allowed venue keywords (name-based OR tag-based)
-        allow_kw = [
-            "müze", "museum", "saray", "palace", "antik", "ancient", "arkeoloji", "archaeolog",
-            "ören", "ruin", "restaurant", "restoran", "mağaza", "store", "shop", "market", "bazaar", "çarşı", "mall"
-        ]
-        allow = any(kw in lower_name for kw in allow_kw) or bool(tags)
-        if not allow:
+        # tag çıkarımı: Mapbox properties.category içinden persona ile eşleşenler
+        tags = _category_tags(f.category, wanted_key)
+        if not tags and not allow(lower_name):
             continue
-        out.append(PlaceCandidate(name=name, lat=lat, lon=lon, tags=tags or None))
+        out.append(PlaceCandidate(name=name, lat=f.lat, lon=f.lon, tags=list(tags) or None))
     return out
 
 
@@ -520,8 +623,10 @@ async def _gemini_image(prompt: str) -> str:
             "parameters": {"sampleCount": 1}
         }
         async with httpx.AsyncClient(timeout=180) as hc:
-            r = await hc.post(url, headers=headers, json=payload)
-            print(f"[gemini] A predict model={model} status={r.status_code}")
+            with track_upstream("gemini", "predict") as t:
+                r = await hc.post(url, headers=headers, json=payload)
+                t.status(r.status_code)
+            logger.debug(f"[gemini] A predict model={model} status={r.status_code}")
             if r.status_code >= 400:
                 # let caller decide fallback
                 raise httpx.HTTPStatusError("predict failed", request=r.request, response=r)
@@ -552,8 +657,10 @@ async def _gemini_image(prompt: str) -> str:
             "imageFormat": "png"
         }
         async with httpx.AsyncClient(timeout=180) as hc:
-            r = await hc.post(url, headers=headers, json=payload)
-            print(f"[gemini] B generateImage model={model} status={r.status_code}")
+            with track_upstream("gemini", "generate_image") as t:
+                r = await hc.post(url, headers=headers, json=payload)
+                t.status(r.status_code)
+            logger.debug(f"[gemini] B generateImage model={model} status={r.status_code}")
             if r.status_code >= 400:
                 raise httpx.HTTPStatusError("generateImage failed", request=r.request, response=r)
             j = r.json()
@@ -584,10 +691,10 @@ async def _gemini_image(prompt: str) -> str:
         except httpx.HTTPStatusError as e:
             body = e.response.text[:500] if e.response is not None else str(e)
             last_err = f"{attempt}:{e.response.status_code if e.response else 'NA'} {body}"
-            print(f"[gemini][error] {last_err}")
+            logger.warning(f"[gemini][error] {last_err}")
         except Exception as e:
             last_err = f"{attempt}: {str(e)[:300]}"
-            print(f"[gemini][error] {last_err}")
+            logger.warning(f"[gemini][error] {last_err}")
 
     raise RuntimeError(f"Gemini image failed (both strategies). last={last_err}")
 
@@ -626,15 +733,17 @@ async def _openai_caption_line(tagline: str, selections: list[str]) -> Dict[str,
     url_chat = "https://api.openai.com/v1/chat/completions"
 
     async with httpx.AsyncClient(timeout=60) as hc:
-        r = await hc.post(url_chat, headers=headers, json={
-            "model": model_name,
-            "response_format": {"type": "json_object"},
-            "temperature": 0.7,
-            "messages": [
-                {"role": "system", "content": sys_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        })
+        with track_upstream("openai", "caption") as t:
+            r = await hc.post(url_chat, headers=headers, json={
+                "model": model_name,
+                "response_format": {"type": "json_object"},
+                "temperature": 0.7,
+                "messages": [
+                    {"role": "system", "content": sys_prompt},
+                    {"role": "user", "content": user_prompt}
+                ]
+            })
+            t.status(r.status_code)
         r.raise_for_status()
         j = r.json()
         text = (
@@ -678,14 +787,16 @@ async def _openai_personal_reco(tagline: str, selections: list[str], items: list
     )
     url_chat = "https://api.openai.com/v1/chat/completions"
     async with httpx.AsyncClient(timeout=45) as hc:
-        r = await hc.post(url_chat, headers=headers, json={
-            "model": model_name,
-            "temperature": 0.7,
-            "messages": [
-                {"role": "system", "content": sys_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        })
+        with track_upstream("openai", "places_blurb") as t:
+            r = await hc.post(url_chat, headers=headers, json={
+                "model": model_name,
+                "temperature": 0.7,
+                "messages": [
+                    {"role": "system", "content": sys_prompt},
+                    {"role": "user", "content": user_prompt}
+                ]
+            })
+            t.status(r.status_code)
         r.raise_for_status()
         j = r.json()
         content = (
@@ -764,10 +875,99 @@ async def _openai_personal_reco(tagline: str, selections: list[str], items: list
 
 
 
+def _public_image_url(image_url: str) -> str:
+    # absolute URL yap
+    base = os.getenv("PUBLIC_BACKEND_URL", "").rstrip("/")
+    if base and isinstance(image_url, str) and image_url.startswith("/"):
+        image_url = f"{base}{image_url}"
+    return image_url
+
+
+async def _store_generated_image(tmp_image: str) -> str:
+    """Provider output -> public URL; data URI ise her zaman diske yaz ve /gen/image/<name> URL'si döndür"""
+    if isinstance(tmp_image, str) and tmp_image.startswith("data:image"):
+        return _public_image_url(await _ensure_local_image(tmp_image))
+    return _public_image_url(str(tmp_image))
+
+
+async def _run_image_job(prompt: str) -> str:
+    with track_stage("image_job", "image"):
+        tmp_image = await _generate_image_by_provider(prompt)
+    with track_stage("image_job", "store"):
+        return await _store_generated_image(tmp_image)
+
+
+image_jobs.runner = _run_image_job
+
+
+# Generated avatars reused per persona prompt (IMAGES_DIR/av-<hash>-<n>.png); prewarm_avatars.py fills it ahead of time
+avatar_cache = AvatarCache(
+    IMAGES_DIR,
+    variants=int(os.getenv("AVATAR_CACHE_VARIANTS", "1")),
+    enabled=os.getenv("AVATAR_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on"),
+)
+
+
+def _avatar_cache_key(selections: list[str], style_suffix: str) -> str:
+    # LLM'in avatar_prompt metni her çağrıda değişir; anahtar yalnızca deterministik kısımlardan
+    model = os.getenv("IMAGEN_MODEL", "imagen-4.0-generate-001").strip()
+    return avatar_key(model, ",".join(selections), style_suffix)
+
+
+def _avatar_creator(prompt: str, stage: Callable[[str], Any]) -> AvatarCreator:
+    """Generate + store under the cache's file stem; stage(name) wraps the image/store steps"""
+    async def _create(stem: Optional[str]) -> str:
+        with stage("image"):
+            tmp_image = await _generate_image_by_provider(prompt)
+        with stage("store"):
+            return await _ensure_local_image(tmp_image, stem)
+    return _create
+
+
+async def _cached_avatar(key: str, create: AvatarCreator) -> tuple[str, bool]:
+    path, hit = await avatar_cache.get_or_create(key, create)
+    record_cache("avatar", hit)
+    return _public_image_url(path), hit
+
+
+def _submit_avatar_job(prompt: str, cache_key: str) -> tuple:
+    """Queue avatar generation through the avatar cache; returns (job, deduplicated)"""
+    create = _avatar_creator(prompt, lambda name: track_stage("image_job", name))
+
+    async def _avatar_job() -> str:
+        return (await _cached_avatar(cache_key, create))[0]
+
+    return image_jobs.submit(prompt, key=f"avatar:{cache_key}", run=_avatar_job)
+
+
+def _job_reference(job, deduplicated: bool = False) -> Dict[str, Any]:
+    return {
+        **job.snapshot(),
+        "deduplicated": deduplicated,
+        "status_url": f"/gen/image-jobs/{job.id}",
+        "events_url": f"/gen/image-jobs/{job.id}/events",
+    }
+
+
+@contextmanager
+def _gen_stage(stages: Dict[str, Dict[str, Any]], name: str):
+    """track_stage plus the per-stage status/timing reported in the /gen/generate response"""
+    info = stages[name] = {"status": "running", "ms": None}
+    start = time.perf_counter()
+    try:
+        with track_stage("gen_generate", name):
+            yield info
+        info["status"] = "ok"
+    except Exception as e:
+        info["status"] = "error"
+        info["error"] = str(e)[:180]
+        raise
+    finally:
+        info["ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+
 @router.post("/gen/generate")
 async def persona_generate(body: GenIn, req: Request):
-    image_url = ""
-    error_msg = ""
     # 1) selections: body'den; yoksa kayıttan
     selections = body.selections
     if selections is None:
@@ -784,58 +984,84 @@ async def persona_generate(body: GenIn, req: Request):
     if body.hint:
         prompt = f"{prompt}. bağlamsal ipucu: {body.hint}"
 
-    # 3) openai'den caption + tek cümle + avatar_prompt
-    text = await _openai_caption_line(tagline, selections)
-    caption = text.get("caption") or "Kişisel seyahat amblemi"
-    line = text.get("line") or tagline
-
-    style_suffix = _avatar_style_prompt(selections)
-    avatar_prompt = text.get("avatar_prompt") or f"travel persona icon for: {', '.join(selections) or 'general traveler'}"
-    full_avatar_prompt = f"{avatar_prompt}. {style_suffix}"
+    started = time.perf_counter()
+    stages: Dict[str, Dict[str, Any]] = {}
 
-    # 4) Görsel üretimi (Gemini) ve kalıcı dosyaya yazma
-    image_url = ""
-    error_msg = ""
-    try:
-        tmp_image = await _generate_image_by_provider(full_avatar_prompt)
-        # data URI ise her zaman diske yaz ve /gen/image/<name> URL'si döndür
-        if isinstance(tmp_image, str) and tmp_image.startswith("data:image"):
-            image_url = await _ensure_local_image(tmp_image)
+    # 3-4) caption -> görsel -> disk; 5) öneriler görselden bağımsız, aynı anda çalışır
+    async def _avatar() -> Dict[str, Any]:
+        text: Dict[str, str] = {}
+        try:
+            with _gen_stage(stages, "caption"):
+                text = await _openai_caption_line(tagline, selections)
+        except Exception as e:
+            logger.warning(f"[gen-caption][error] {str(e)[:180]}")
+        style_suffix = _avatar_style_prompt(selections)
+        avatar_prompt = text.get("avatar_prompt") or f"travel persona icon for: {', '.join(selections) or 'general traveler'}"
+        full_avatar_prompt = f"{avatar_prompt}. {style_suffix}"
+        cache_key = _avatar_cache_key(selections, style_suffix)
+
+        image_url = ""
+        error_msg = ""
+        image_job = None
+        avatar_cached = False
+        if body.async_image:
+            # Önbellekte varsa hemen dön; yoksa görsel arka planda üretilir, istemci image_job ile takip eder
+            cached_path = await avatar_cache.peek(cache_key)
+            if cached_path:
+                record_cache("avatar", True)
+                image_url, avatar_cached = _public_image_url(cached_path), True
+            else:
+                try:
+                    with _gen_stage(stages, "image_submit"):
+                        job, deduplicated = _submit_avatar_job(full_avatar_prompt, cache_key)
+                    image_job = _job_reference(job, deduplicated)
+                except Exception as e:
+                    error_msg = f"image job submit failed: {str(e)[:180]}"
+                    logger.warning(f"[gen-image][error] {error_msg}")
         else:
-            image_url = str(tmp_image)
-        # absolute URL yap
-        base = os.getenv("PUBLIC_BACKEND_URL", "").rstrip("/")
-        if base and isinstance(image_url, str) and image_url.startswith("/"):
-            image_url = f"{base}{image_url}"
-    except Exception as e:
-        error_msg = f"image generate failed: {str(e)[:180]}"
-        print(f"[gen-image][error] {error_msg}")
-
-   
+            try:
+                create = _avatar_creator(full_avatar_prompt, lambda name: _gen_stage(stages, name))
+                image_url, avatar_cached = await _cached_avatar(cache_key, create)
+            except Exception as e:
+                error_msg = f"image generate failed: {str(e)[:180]}"
+                logger.warning(f"[gen-image][error] {error_msg}")
+        return {
+            "caption": text.get("caption") or "Kişisel seyahat amblemi",
+            "line": text.get("line") or tagline,
+            "image_url": image_url,
+            "image_job": image_job,
+            "avatar_cached": avatar_cached,
+            "error": error_msg,
+        }
 
     # 5) İsteğe bağlı: konuma göre LLM önerileri
-    blurb = None
-    items = []
-    if (body.lat is not None) and (body.lon is not None):
+    async def _recommend() -> Dict[str, Any]:
+        if body.lat is None or body.lon is None:
+            stages["recommend"] = {"status": "skipped", "ms": 0.0}
+            return {}
         try:
-            reco = await _recommend_places_llm_core(body.lat, body.lon, selections, body.radius_km, body.limit)
-            blurb = reco.get("blurb") or None
-            items = reco.get("items") or []
+            with _gen_stage(stages, "recommend"):
+                return await _recommend_places_llm_core(body.lat, body.lon, selections, body.radius_km, body.limit)
         except Exception:
-            blurb = None
-            items = []
+            return {}
+
+    avatar, reco = await asyncio.gather(_avatar(), _recommend())
 
     # 6) Sonucu döndür
     return {
         "selections": selections,
         "tagline": tagline,
-        "caption": caption,
-        "line": line,
+        "caption": avatar["caption"],
+        "line": avatar["line"],
         "prompt_used": prompt,
-        "image_url": image_url,
-        "blurb": blurb,
-        "items": items,
-        "error": error_msg,
+        "image_url": avatar["image_url"],
+        "image_job": avatar["image_job"],
+        "avatar_cached": avatar["avatar_cached"],
+        "blurb": reco.get("blurb") or None,
+        "items": reco.get("items") or [],
+        "error": avatar["error"],
+        "stages": stages,
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
     }
 
 
@@ -845,136 +1071,79 @@ async def persona_generate(body: GenIn, req: Request):
 async def _recommend_places_llm_core(lat: float, lon: float, selections: list[str], radius_km: float, limit: int) -> dict:
     wanted = normalize(selections or [])
 
-    # 1) Build Mapbox queries from persona
-    queries: list[str] = []
-    for w in wanted:
-        queries += _PERSONA_QUERIES.get(w, [])
-    if not queries:
-        queries = _DEF_QUERIES
-
-    token = os.getenv("MAPBOX_SERVER_TOKEN", "").strip() or os.getenv("MAPBOX_TOKEN", "").strip()
-    if not token:
-        print("[places] MAPBOX token yok (MAPBOX_SERVER_TOKEN / MAPBOX_TOKEN)")
-        return {"items": [], "wanted": wanted, "blurb": "", "note": "MAPBOX token yok"}
-
-    base = "https://api.mapbox.com/geocoding/v5/mapbox.places/{}.json"
     nationwide = radius_km <= 0
-    # Türkiye bounding box (minLon,minLat,maxLon,maxLat)
-    tr_bbox = "26,36,45,42"
-    if nationwide:
-        params = {"types": "poi,address,place", "limit": 10, "language": "tr", "bbox": tr_bbox, "access_token": token}
-    else:
-        prox = f"{lon},{lat}"  # Mapbox proximity order: lon,lat
-        params = {"proximity": prox, "types": "poi,address,place", "limit": 10, "language": "tr", "access_token": token}
 
-    async def _fetch_features(qs: list[str]) -> list[dict]:
-        all_feats: list[dict] = []
-        async with httpx.AsyncClient(timeout=20) as hc:
-            for q in qs[:8]:
-                try:
-                    url = base.format(q)
-                    r = await hc.get(url, params=params)
-                    r.raise_for_status()
-                    j = r.json()
-                    feats = j.get("features", [])
-                    all_feats.extend(feats)
-                except Exception as e:
-                    print(f"[places] mapbox fetch fail for '{q}': {e}")
-                    continue
-        return all_feats
+    # 1) Offline POI index: in-process query, Mapbox geocoding is only the fallback
+    cands: list[PlaceCandidate] = []
+    if _POI_INDEX_ENABLED and poi_index.available():
+        with track_stage("places_recommend", "poi_index"):
+            if nationwide:
+                # Worst case (user far from any matching POI) scans most of the grid: keep it off the loop
+                features = await asyncio.to_thread(poi_index.nationwide, lat, lon, wanted,
+                                                   limit=_POI_INDEX_MAX_CANDIDATES)
+            else:
+                # Up to the relaxed radius used below, so that fallback has data too
+                features = poi_index.nearby(lat, lon, max(radius_km * 2, 10.0), wanted,
+                                            limit=_POI_INDEX_MAX_CANDIDATES)
+            cands = _mk_candidates_from_mapbox(features, wanted)
+        logger.debug(f"[places] poi index features={len(features)} candidates={len(cands)}")
 
-    # 2) İlk deneme: persona temelli sorgular
-    all_features = await _fetch_features(queries)
-    print(f"[places] features persona-qs={len(all_features)} wanted={wanted}")
+    if not cands:
+        # 2) Build Mapbox queries from persona
+        queries: list[str] = []
+        for w in wanted:
+            queries += _PERSONA_QUERIES.get(w, [])
+        if not queries:
+            queries = _DEF_QUERIES
+
+        token = os.getenv("MAPBOX_SERVER_TOKEN", "").strip() or os.getenv("MAPBOX_TOKEN", "").strip()
+        if not token:
+            logger.warning("[places] MAPBOX token yok (MAPBOX_SERVER_TOKEN / MAPBOX_TOKEN)")
+            return {"items": [], "wanted": wanted, "blurb": "", "note": "MAPBOX token yok"}
+
+        # Türkiye bounding box (minLon,minLat,maxLon,maxLat)
+        tr_bbox = "26,36,45,42"
+        if nationwide:
+            params = {"types": "poi,address,place", "limit": 10, "language": "tr", "bbox": tr_bbox, "access_token": token}
+        else:
+            prox = f"{lon},{lat}"  # Mapbox proximity order: lon,lat
+            params = {"proximity": prox, "types": "poi,address,place", "limit": 10, "language": "tr", "access_token": token}
 
-    cands = _mk_candidates_from_mapbox(all_features, wanted)
-    print(f"[places] candidates={len(cands)}")
+        deadline = asyncio.get_running_loop().time() + _GEOCODE_DEADLINE_SEC
+
+        # 2a) İlk deneme: persona temelli sorgular
+        with track_stage("places_recommend", "geocode"):
+            all_features = await _geocode_fanout(queries, params, deadline)
+        logger.debug(f"[places] features persona-qs={len(all_features)} wanted={wanted}")
 
-    # 2a) Fallback: hiç aday yoksa daha genel sorgularla tekrar dene
-    if not cands:
-        fallback_qs = [
-            "restaurant","cafe","bakery","street food","park","garden","beach",
-            "museum","gallery","theatre","historic","market","bazaar","landmark",
-        ]
-        all_features = await _fetch_features(fallback_qs)
-        print(f"[places] fallback features={len(all_features)}")
         cands = _mk_candidates_from_mapbox(all_features, wanted)
-        print(f"[places] candidates(fallback)={len(cands)}")
+        logger.debug(f"[places] candidates={len(cands)}")
 
-    # 3) Skorla + mesafe filtresi
-    scored = []
-    for c in cands:
-        s = _score_candidate(lat, lon, c, wanted)
-        if nationwide:
-            # Türkiye geneli: mesafe filtresi yok; mesafe etkisini zayıf tut
-            dist_score = max(0.0, 1.0 - (s["dist_km"] / 500.0))  # 500km ölçeğinde normalize
-            score = 0.8 * s["tag_score"] + 0.2 * dist_score
-            scored.append({
-                "name": c.name,
-                "lat": c.lat,
-                "lon": c.lon,
-                "distance_km": round(s["dist_km"], 3),
-                "score": round(score, 4),
-                "tags": c.tags or [],
-            })
-        else:
-            if s["dist_km"] <= radius_km:
-                dist_score = max(0.0, 1.0 - (s["dist_km"] / max(0.001, radius_km)))
-                score = _DEF_TAG_WEIGHT * s["tag_score"] + _DEF_DIST_WEIGHT * dist_score
-                scored.append({
-                    "name": c.name,
-                    "lat": c.lat,
-                    "lon": c.lon,
-                    "distance_km": round(s["dist_km"], 3),
-                    "score": round(score, 4),
-                    "tags": c.tags or [],
-                })
-
-    print(f"[places] scored(within {radius_km}km)={len(scored)}")
-
-    # 3a) Fallback: yarıçapı gevşet (en azından 10km) ve tekrar dene
-    if not scored and cands:
-        relaxed_radius = max(radius_km * 2, 10.0)
-        print(f"[places] relaxing radius to {relaxed_radius}km")
-        for c in cands:
-            s = _score_candidate(lat, lon, c, wanted)
-            if nationwide:
-                dist_score = max(0.0, 1.0 - (s["dist_km"] / 500.0))
-                score = 0.8 * s["tag_score"] + 0.2 * dist_score
-                scored.append({
-                    "name": c.name,
-                    "lat": c.lat,
-                    "lon": c.lon,
-                    "distance_km": round(s["dist_km"], 3),
-                    "score": round(score, 4),
-                    "tags": c.tags or [],
-                })
-            else:
-                if s["dist_km"] <= relaxed_radius:
-                    dist_score = max(0.0, 1.0 - (s["dist_km"] / max(0.001, relaxed_radius)))
-                    score = _DEF_TAG_WEIGHT * s["tag_score"] + _DEF_DIST_WEIGHT * dist_score
-                    scored.append({
-                        "name": c.name,
-                        "lat": c.lat,
-                        "lon": c.lon,
-                        "distance_km": round(s["dist_km"], 3),
-                        "score": round(score, 4),
-                        "tags": c.tags or [],
-                    })
-        print(f"[places] scored(relaxed)={len(scored)}")
-
-    if not scored:
+        # 2b) Fallback: hiç aday yoksa daha genel sorgularla tekrar dene
+        if not cands:
+            fallback_qs = [
+                "restaurant","cafe","bakery","street food","park","garden","beach",
+                "museum","gallery","theatre","historic","market","bazaar","landmark",
+            ]
+            with track_stage("places_recommend", "geocode_fallback"):
+                all_features = await _geocode_fanout(fallback_qs, params, deadline)
+            logger.debug(f"[places] fallback features={len(all_features)}")
+            cands = _mk_candidates_from_mapbox(all_features, wanted)
+            logger.debug(f"[places] candidates(fallback)={len(cands)}")
+
+    # 3) Skorla + mesafe filtresi (strict, gerekirse gevşetilmiş yarıçap) + top-k
+    top = _rank_candidates(lat, lon, cands, wanted, radius_km, min(2, max(1, limit)))
+    if not top:
         return {"items": [], "wanted": wanted, "blurb": ""}
 
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    top = scored[: min(2, max(1, limit))]
-    print(f"[places] mode={'TR' if nationwide else 'local'} results={len(top)} limit={limit}")
+    logger.info(f"[places] mode={'TR' if nationwide else 'local'} results={len(top)} limit={limit}")
 
     tagline = make_tagline(wanted)
     try:
-        blurb = await _openai_personal_reco(tagline, wanted, top)
+        with track_stage("places_recommend", "blurb"):
+            blurb = await _openai_personal_reco(tagline, wanted, top)
     except Exception as e:
-        print(f"[places] blurb fail: {e}")
+        logger.warning(f"[places] blurb fail: {e}")
         blurb = tagline or "Yakınında keşfedilecek yerler var."
 
     return {"items": top, "wanted": wanted, "blurb": blurb}
@@ -985,9 +1154,9 @@ async def _recommend_places_llm_core(lat: float, lon: float, selections: list[st
 @router.post("/gen/places/recommend_llm")
 async def places_recommend_llm(body: RecommendLLMIn, req: Request):
     try:
-        print(f"[places] POST /places/recommend_llm lat={body.lat} lon={body.lon} sel={body.selections} r={body.radius_km} l={body.limit}")
+        logger.debug(f"[places] POST /places/recommend_llm lat={body.lat} lon={body.lon} sel={body.selections} r={body.radius_km} l={body.limit}")
         result = await _recommend_places_llm_core(body.lat, body.lon, body.selections or [], body.radius_km, body.limit)
-        print(f"[places] result: items={len(result.get('items', []))} wanted={result.get('wanted')}")
+        logger.debug(f"[places] result: items={len(result.get('items', []))} wanted={result.get('wanted')}")
         return {
             "items": result.get("items", []),
             "wanted": result.get("wanted", []),
@@ -996,7 +1165,7 @@ async def places_recommend_llm(body: RecommendLLMIn, req: Request):
             "blurb": result.get("blurb", ""),
         }
     except Exception as e:
-        print(f"[places][error] {e}")
+        logger.error(f"[places][error] {e}")
         return {
             "items": [],
             "wanted": body.selections or [],
@@ -1005,3 +1174,98 @@ async def places_recommend_llm(body: RecommendLLMIn, req: Request):
             "blurb": "",
             "error": str(e)[:200]
         }
+
+
+@router.get("/gen/places/cache/stats")
+async def places_cache_stats():
+    """Hit rate and size of the shared geocoding cache."""
+    return geocode_cache.stats()
+
+
+@router.get("/gen/image/inline-cache/stats")
+async def inline_cache_stats():
+    """Entries, bytes and hit rate of the in-memory inline image cache (per worker)."""
+    return _INLINE_CACHE.stats()
+
+
+@router.get("/gen/image-store/stats")
+async def image_store_stats():
+    """Writes, bytes and fsync batching of the image store."""
+    return image_store.stats()
+
+
+@router.get("/gen/avatar-cache/stats")
+async def avatar_cache_stats():
+    """Reuse rate and size of the generated-avatar cache."""
+    return avatar_cache.stats()
+
+
+# --------- Background image jobs ---------
+
+# Per-client limit on /gen/image-jobs submissions (IMAGE_JOB_RATE_PER_MIN)
+image_job_limiter = SubmitRateLimiter()
+
+
+@router.post("/gen/image-jobs")
+async def image_job_submit(body: ImageJobIn, req: Request):
+    """
+    Queue the avatar for persona selections; the prompt is built server-side,
+    so the endpoint cannot be used to generate arbitrary images. The same
+    selections return the existing job while it is fresh.
+    """
+    selections = normalize(body.selections)
+    if not selections:
+        raise HTTPException(400, "geçerli persona seçimi gerekli")
+    try:
+        image_job_limiter.check(req.client.host if req.client else "unknown")
+    except RateLimitedError as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": str(max(1, int(e.retry_after + 0.5)))})
+    style_suffix = _avatar_style_prompt(selections)
+    prompt = f"travel persona icon for: {', '.join(selections)}. {style_suffix}"
+    try:
+        job, deduplicated = _submit_avatar_job(prompt, _avatar_cache_key(selections, style_suffix))
+    except QueueFullError as e:
+        raise HTTPException(503, f"image queue full: {e}")
+    return JSONResponse(status_code=202, content=_job_reference(job, deduplicated))
+
+
+@router.get("/gen/image-jobs/stats")
+async def image_job_stats():
+    return image_jobs.stats()
+
+
+@router.get("/gen/image-jobs/{job_id}")
+async def image_job_status(job_id: str, wait: float = 0.0, since: int = -1):
+    """
+    Job status. Long-poll with ?wait=<sec> (max 60): returns as soon as the job
+    changes past version `since` or finishes.
+    """
+    job = image_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "image job not found")
+    if wait > 0:
+        await image_jobs.wait_for_change(job, since, min(wait, 60.0))
+    return _job_reference(job)
+
+
+@router.get("/gen/image-jobs/{job_id}/events")
+async def image_job_events(job_id: str):
+    """Server-sent events: one `status` event per change, until done/error."""
+    job = image_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "image job not found")
+
+    async def _events():
+        version = -1
+        while True:
+            await image_jobs.wait_for_change(job, version, 15.0)
+            if job.version == version and job.status not in TERMINAL:
+                yield ": keep-alive\n\n"
+                continue
+            version = job.version
+            yield f"event: status\ndata: {json.dumps(_job_reference(job), ensure_ascii=False)}\n\n"
+            if job.status in TERMINAL:
+                return
+
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -14,6 +14,8 @@ from math import radians, sin, cos, asin, sqrt
 # ------------------------------------------------------------
 
 from features.route_suggest import greedy_from, two_opt, total_cost
+from metrics import track_stage
+from tracing import inject_headers
 
 router = APIRouter()
 
@@ -92,14 +94,16 @@ async def _plan_impl(inb: PlanIn):
         raise HTTPException(400, "En az 2 yer seçin")
 
     # 1) Matrix (durations)
-    async with httpx.AsyncClient(timeout=40) as hc:
-        r = await hc.post(
-            "http://localhost:" + os.getenv("PORT", "8080") + "/traffic/matrix",
-            json={"coords": [p.model_dump() for p in inb.places]},
-        )
-        if r.status_code != 200:
-            raise HTTPException(r.status_code, r.text)
-        matrix = r.json()
+    with track_stage("plan", "matrix"):
+        async with httpx.AsyncClient(timeout=40) as hc:
+            r = await hc.post(
+                "http://localhost:" + os.getenv("PORT", "8080") + "/traffic/matrix",
+                json={"coords": [p.model_dump() for p in inb.places]},
+                headers=inject_headers(),
+            )
+            if r.status_code != 200:
+                raise HTTPException(r.status_code, r.text)
+            matrix = r.json()
     durations: List[List[float]] = matrix["durations"]
 
     n = len(durations)
@@ -126,18 +130,20 @@ async def _plan_impl(inb: PlanIn):
     seed_cost = float("inf")
     seed_order: List[int] = []
     seed_start = 0
-    for s in start_indices:
-        g = greedy_from(s, symD)
-        t = two_opt(g, symD)
-        c = total_cost(t, symD)
-        if c < seed_cost:
-            seed_cost, seed_order, seed_start = c, t, s
+    with track_stage("plan", "seed"):
+        for s in start_indices:
+            g = greedy_from(s, symD)
+            t = two_opt(g, symD)
+            c = total_cost(t, symD)
+            if c < seed_cost:
+                seed_cost, seed_order, seed_start = c, t, s
 
     if not seed_order:
         raise HTTPException(404, "Rota optimize edilemedi")
 
     # 4) Directed refine: 2-opt* orijinal (asimetrik) matris
-    best_order = two_opt_star_directed(seed_order, durations, max_passes=3)
+    with track_stage("plan", "refine"):
+        best_order = two_opt_star_directed(seed_order, durations, max_passes=3)
 
     # 5) Directions geometri — anchor'ı gerekiyorsa başa ekle
     ordered_points = [inb.places[i].model_dump() for i in best_order]
@@ -147,14 +153,16 @@ async def _plan_impl(inb: PlanIn):
         if abs(first["lat"] - inb.anchor.lat) > 1e-8 or abs(first["lng"] - inb.anchor.lng) > 1e-8:
             order_for_directions = [inb.anchor.model_dump()] + ordered_points
 
-    async with httpx.AsyncClient(timeout=40) as hc:
-        r = await hc.post(
-            "http://localhost:" + os.getenv("PORT", "8080") + "/traffic/route",
-            json={"order": order_for_directions},
-        )
-        if r.status_code != 200:
-            raise HTTPException(r.status_code, r.text)
-        route = r.json()
+    with track_stage("plan", "directions"):
+        async with httpx.AsyncClient(timeout=40) as hc:
+            r = await hc.post(
+                "http://localhost:" + os.getenv("PORT", "8080") + "/traffic/route",
+                json={"order": order_for_directions},
+                headers=inject_headers(),
+            )
+            if r.status_code != 200:
+                raise HTTPException(r.status_code, r.text)
+            route = r.json()
 
     time_budget_sec = inb.timeBudgetMin * 60 if inb.timeBudgetMin else None
     within = (route.get("duration") <= time_budget_sec) if time_budget_sec else True
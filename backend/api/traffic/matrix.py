@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import os, httpx
 
+from metrics import track_upstream
+
 router = APIRouter()
 
 class Pt(BaseModel):
@@ -24,7 +26,9 @@ async def matrix(inb: MatrixIn):
     params = {"annotations": "duration,distance", "access_token": token}
 
     async with httpx.AsyncClient(timeout=30) as hc:
-        r = await hc.get(url, params=params)
+        with track_upstream("mapbox", "matrix") as t:
+            r = await hc.get(url, params=params)
+            t.status(r.status_code)
         if r.status_code != 200:
             raise HTTPException(502, f"Mapbox Matrix hata: {r.status_code} {r.text[:200]}")
         j = r.json()
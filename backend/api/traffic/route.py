@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import os, httpx
 
+from metrics import track_upstream
+
 router = APIRouter()
 
 class Pt(BaseModel):
@@ -29,7 +31,9 @@ async def route(inb: RouteIn):
     }
 
     async with httpx.AsyncClient(timeout=30) as hc:
-        r = await hc.get(url, params=params)
+        with track_upstream("mapbox", "directions") as t:
+            r = await hc.get(url, params=params)
+            t.status(r.status_code)
         if r.status_code != 200:
             raise HTTPException(502, f"Mapbox Directions hata: {r.status_code} {r.text[:200]}")
         j = r.json()
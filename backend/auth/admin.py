@@ -0,0 +1,24 @@
+#backend/auth/admin.py
+"""
+Admin guard for operational endpoints (cache contents/flush, debug traces)
+
+Send the token from ADMIN_TOKEN in the X-Admin-Token header. Without
+ADMIN_TOKEN set the endpoints are disabled (404), so they are never open by
+default. The user_email cookie is not used here: it is not signed.
+"""
+import hmac
+import os
+
+from fastapi import HTTPException, Request
+
+ADMIN_HEADER = "x-admin-token"
+
+
+def require_admin(request: Request) -> None:
+    """FastAPI dependency: Depends(require_admin)"""
+    expected = os.getenv("ADMIN_TOKEN", "").strip()
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    given = request.headers.get(ADMIN_HEADER, "")
+    if not hmac.compare_digest(given.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Admin token gerekli")
@@ -0,0 +1,181 @@
+# bench/mcp_loadtest.py
+"""
+Load test for TurkishAirlinesMCPClient and /ai/ask against the local MCP stub
+
+Starts bench/mcp_stub.py in-process (or uses --stub-url), then drives
+  client - TurkishAirlinesMCPClient.call_tool with a mix of tools
+  ask    - POST /ai/ask in-process (httpx ASGI transport) with messages that
+           the intent matcher answers straight from MCP, so no OpenAI traffic
+with N concurrent workers and reports throughput and p50/p90/p99 latency.
+
+Usage: python bench/mcp_loadtest.py [--target client|ask|both] [--concurrency 32]
+                                    [--requests 2000] [--pool-size 4]
+                                    [stub options, see mcp_stub.py --help]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Keep the app's own log sinks quiet while measuring
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("HEALTH_PROBE_INTERVAL_SEC", "3600")
+
+from loguru import logger
+
+from mcp_stub import add_stub_arguments, config_from_args, start_stub
+
+CORPUS = Path(__file__).with_name("intent_corpus.txt")
+
+
+def client_workload():
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    return [
+        ("ping", {}),
+        ("get_flight_status_by_number", {"flightNumber": "TK1", "flightDate": tomorrow}),
+        ("get_flight_status_by_route", {"origin": "IST", "destination": "ESB", "flightDate": tomorrow}),
+        ("search_flights", {"origin": "IST", "destination": "JFK", "departureDate": tomorrow, "passengerCount": 1}),
+        ("get_city_guide", {"cityCode": "IST"}),
+    ]
+
+
+def ask_workload() -> List[str]:
+    """Corpus messages that the direct-intent path answers without OpenAI"""
+    from api.ai.intent import classify_intent
+    lines = [l.strip() for l in CORPUS.read_text(encoding="utf-8").splitlines()]
+    return [l for l in lines if l and not l.startswith("#") and classify_intent(l).tool_name]
+
+
+def percentile(sorted_ms: List[float], p: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * p))]
+
+
+async def drive(label: str, op: Callable[[int], Awaitable[None]], total: int, concurrency: int):
+    """Run `op(i)` `total` times over `concurrency` workers and print a latency report"""
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    next_index = iter(range(total))
+
+    async def worker():
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                await op(i)
+                latencies.append((time.perf_counter() - start) * 1000)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"\n{label}: {total} requests, concurrency {concurrency}, {elapsed:.2f}s")
+    print(f"  throughput  {len(latencies) / elapsed:8.1f} ok/s")
+    print(f"  latency ms  p50={percentile(latencies, 0.50):.1f}  p90={percentile(latencies, 0.90):.1f}  "
+          f"p99={percentile(latencies, 0.99):.1f}  max={latencies[-1] if latencies else 0:.1f}")
+    print(f"  errors      {sum(errors.values())} {dict(errors) if errors else ''}")
+
+
+async def run_client(args, stub_url: str):
+    from mcp_client import TurkishAirlinesMCPClient
+
+    client = TurkishAirlinesMCPClient(server_url=stub_url, auth_token="stub", pool_size=args.pool_size)
+    await client.connect()
+    workload = client_workload()
+
+    async def op(i: int):
+        tool_name, arguments = workload[i % len(workload)]
+        await client.call_tool(tool_name, dict(arguments))
+
+    try:
+        await drive(f"TurkishAirlinesMCPClient (pool_size={client.pool_size})", op, args.requests, args.concurrency)
+        print(f"  breaker     {client.breaker.snapshot()['state']}")
+    finally:
+        await client.disconnect()
+
+
+async def run_ask(args, stub_url: str):
+    os.environ.setdefault("OPENAI_API_KEY", "sk-loadtest")  # client must exist; direct intents never call it
+    import httpx
+    import mcp_client
+    from main import app
+
+    client = mcp_client.TurkishAirlinesMCPClient(server_url=stub_url, auth_token="stub", pool_size=args.pool_size)
+    await client.connect()
+    mcp_client._mcp_client = client
+    messages = ask_workload()
+    if not messages:
+        print("No corpus message resolves to a direct MCP intent; skipping /ai/ask")
+        return
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as http:
+        async def op(i: int):
+            response = await http.post("/ai/ask", json={"message": messages[i % len(messages)]})
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            if not response.json().get("used_mcp"):
+                raise RuntimeError("answered without MCP")
+
+        try:
+            await drive(f"POST /ai/ask ({len(messages)} direct-intent messages)", op, args.requests, args.concurrency)
+        finally:
+            await client.disconnect()
+            mcp_client._mcp_client = None
+
+
+async def main_async(args) -> int:
+    runner = None
+    stub = None
+    stub_url = args.stub_url
+    if not stub_url:
+        stub, runner = await start_stub(config_from_args(args), port=args.port)
+        stub_url = f"http://127.0.0.1:{args.port}/mcp"
+        print(f"🧪 MCP stub at {stub_url}: latency {args.latency_ms}±{args.jitter_ms}ms, "
+              f"http errors {args.http_error_rate:.1%}, tool errors {args.tool_error_rate:.1%}, "
+              f"session ttl {args.session_ttl or '∞'}s, payload {args.payload_bytes}B")
+    try:
+        if args.target in ("client", "both"):
+            await run_client(args, stub_url)
+        if args.target in ("ask", "both"):
+            await run_ask(args, stub_url)
+    finally:
+        if stub is not None:
+            s = stub.stats
+            print(f"\nstub: {s.initialize} initialize, {s.calls} calls, {s.batches} batches, "
+                  f"{s.expired_sessions} expired sessions, {s.http_errors} http errors, {s.tool_errors} tool errors")
+        if runner is not None:
+            await runner.cleanup()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("client", "ask", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--stub-url", help="use an already running stub instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=os.environ["LOG_LEVEL"])
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
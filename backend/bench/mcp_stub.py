@@ -0,0 +1,249 @@
+# bench/mcp_stub.py
+"""
+Local stand-in for the Turkish Airlines MCP server (JSON-RPC over HTTP/SSE)
+
+Speaks the subset of MCP that TurkishAirlinesMCPClient uses: initialize with an
+mcp-session-id header, notifications, tools/list, tools/call and JSON-RPC
+batches. Latency, error rates, session expiry and payload size are
+configurable so the client can be load-tested offline.
+
+Usage: python bench/mcp_stub.py [--port 8765] [--latency-ms 50] [--jitter-ms 20]
+                                [--http-error-rate 0.01] [--tool-error-rate 0.01]
+                                [--session-ttl 30] [--payload-bytes 2048] [--json]
+Then: TurkishAirlinesMCPClient(server_url="http://127.0.0.1:8765/mcp", auth_token="stub")
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+_OBJECT = {"type": "object", "properties": {}}
+
+# Same tool names the live server publishes, with the argument shapes mcp_args produces
+TOOLS = [
+    {"name": "ping", "description": "Health check", "inputSchema": _OBJECT},
+    {"name": "search_flights", "description": "Search flights", "inputSchema": {
+        "type": "object",
+        "properties": {
+            "tripType": {"type": "string"},
+            "originDestinations": {"type": "array", "minItems": 1, "items": {"type": "object"}},
+            "passengers": {"type": "array", "items": {"type": "object"}},
+        },
+        "required": ["originDestinations"],
+    }},
+    {"name": "get_flight_status_by_number", "description": "Flight status by number", "inputSchema": {
+        "type": "object",
+        "properties": {"flightNumberFull": {"type": "string"}, "flightDate": {"type": "string"}},
+        "required": ["flightNumberFull", "flightDate"],
+    }},
+    {"name": "get_flight_status_by_route", "description": "Flight status by route", "inputSchema": {
+        "type": "object",
+        "properties": {"fromAirport": {"type": "string"}, "toAirport": {"type": "string"},
+                       "flightDate": {"type": "string"}},
+        "required": ["fromAirport", "toAirport"],
+    }},
+    {"name": "get_booking_details", "description": "Booking details by PNR", "inputSchema": {
+        "type": "object",
+        "properties": {"bookingReference": {"type": "string"}, "surname": {"type": "string"}},
+        "required": ["bookingReference"],
+    }},
+    {"name": "get_booking_baggage_allowance", "description": "Baggage allowance", "inputSchema": _OBJECT},
+    {"name": "get_expiring_miles", "description": "Expiring miles", "inputSchema": _OBJECT},
+    {"name": "list_user_flights", "description": "User flights", "inputSchema": _OBJECT},
+    {"name": "get_current_user_details", "description": "User profile", "inputSchema": _OBJECT},
+    {"name": "get_airline_promotions", "description": "Promotions", "inputSchema": _OBJECT},
+    {"name": "get_city_guide", "description": "City guide", "inputSchema": {
+        "type": "object", "properties": {"cityCode": {"type": "string"}},
+    }},
+]
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 50.0        # mean tools/call latency
+    jitter_ms: float = 20.0         # +/- uniform jitter
+    init_latency_ms: float = 20.0
+    http_error_rate: float = 0.0    # share of calls answered with HTTP 503
+    tool_error_rate: float = 0.0    # share of calls answered with a JSON-RPC error
+    session_ttl: float = 0.0        # seconds until a session id expires (0 = never)
+    payload_bytes: int = 512        # approx. size of each tool result
+    sse: bool = True                # answer tools/call as text/event-stream
+    batch: bool = True              # accept JSON-RPC batches
+
+
+@dataclass
+class StubStats:
+    initialize: int = 0
+    calls: int = 0
+    batches: int = 0
+    expired_sessions: int = 0
+    http_errors: int = 0
+    tool_errors: int = 0
+    by_tool: Dict[str, int] = field(default_factory=dict)
+
+
+class MCPStub:
+    """aiohttp handlers plus in-memory session table"""
+
+    def __init__(self, config: Optional[StubConfig] = None):
+        self.config = config or StubConfig()
+        self.stats = StubStats()
+        self.sessions: Dict[str, float] = {}
+        self._padding = "x" * max(0, self.config.payload_bytes - 120)
+
+    async def _sleep(self, mean_ms: float):
+        jitter = self.config.jitter_ms
+        delay = max(0.0, mean_ms + random.uniform(-jitter, jitter)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _session_valid(self, session_id: Optional[str]) -> bool:
+        created = self.sessions.get(session_id)
+        if created is None:
+            return False
+        if self.config.session_ttl and time.time() - created > self.config.session_ttl:
+            self.sessions.pop(session_id, None)
+            self.stats.expired_sessions += 1
+            return False
+        return True
+
+    def _call_result(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        params = message.get("params") or {}
+        name = params.get("name")
+        self.stats.calls += 1
+        self.stats.by_tool[name] = self.stats.by_tool.get(name, 0) + 1
+        if random.random() < self.config.tool_error_rate:
+            self.stats.tool_errors += 1
+            return {"jsonrpc": "2.0", "id": message.get("id"),
+                    "error": {"code": -32000, "message": f"stub: injected failure for {name}"}}
+        if name not in {t["name"] for t in TOOLS}:
+            return {"jsonrpc": "2.0", "id": message.get("id"),
+                    "error": {"code": -32602, "message": f"Unknown tool: {name}"}}
+        body = {"tool": name, "arguments": params.get("arguments") or {}, "data": self._padding}
+        return {"jsonrpc": "2.0", "id": message.get("id"),
+                "result": {"content": [{"type": "text", "text": json.dumps(body)}]}}
+
+    def _respond(self, payload: Any, sse: bool) -> web.Response:
+        if sse:
+            return web.Response(text=f"event: message\ndata: {json.dumps(payload)}\n\n",
+                                content_type="text/event-stream")
+        return web.json_response(payload)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        try:
+            body = await request.json()
+        except Exception:
+            return web.json_response({"jsonrpc": "2.0", "id": None,
+                                      "error": {"code": -32700, "message": "Parse error"}}, status=400)
+
+        if isinstance(body, list):
+            if not self.config.batch:
+                return web.json_response({"jsonrpc": "2.0", "id": None,
+                                          "error": {"code": -32600, "message": "Batch not supported"}}, status=400)
+            if not self._session_valid(request.headers.get("mcp-session-id")):
+                return web.Response(status=404, text="Session not found")
+            self.stats.batches += 1
+            await self._sleep(self.config.latency_ms)
+            if random.random() < self.config.http_error_rate:
+                self.stats.http_errors += 1
+                return web.Response(status=503, text="stub: injected 503")
+            replies = [self._call_result(m) for m in body if "id" in m]
+            return self._respond(replies, sse=False)
+
+        method = body.get("method")
+        if method == "initialize":
+            self.stats.initialize += 1
+            await self._sleep(self.config.init_latency_ms)
+            session_id = uuid.uuid4().hex
+            self.sessions[session_id] = time.time()
+            result = {"protocolVersion": "2024-11-05", "capabilities": {"tools": {}},
+                      "serverInfo": {"name": "mcp-stub", "version": "1.0.0"}}
+            return web.json_response({"jsonrpc": "2.0", "id": body.get("id"), "result": result},
+                                     headers={"mcp-session-id": session_id})
+
+        if "id" not in body:  # notification
+            return web.Response(status=202)
+
+        if not self._session_valid(request.headers.get("mcp-session-id")):
+            return web.Response(status=404, text="Session not found")
+
+        if method == "tools/list":
+            return self._respond({"jsonrpc": "2.0", "id": body["id"], "result": {"tools": TOOLS}},
+                                 self.config.sse)
+        if method == "tools/call":
+            await self._sleep(self.config.latency_ms)
+            if random.random() < self.config.http_error_rate:
+                self.stats.http_errors += 1
+                return web.Response(status=503, text="stub: injected 503")
+            return self._respond(self._call_result(body), self.config.sse)
+
+        return self._respond({"jsonrpc": "2.0", "id": body["id"],
+                              "error": {"code": -32601, "message": f"Method not found: {method}"}},
+                             self.config.sse)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"config": asdict(self.config), "stats": asdict(self.stats),
+                                  "sessions": len(self.sessions)})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/mcp", self.handle)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+
+async def start_stub(config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 8765):
+    """Start the stub in the running loop; returns (stub, runner) - call runner.cleanup() to stop"""
+    stub = MCPStub(config)
+    runner = web.AppRunner(stub.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return stub, runner
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    defaults = StubConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument("--http-error-rate", type=float, default=defaults.http_error_rate)
+    parser.add_argument("--tool-error-rate", type=float, default=defaults.tool_error_rate)
+    parser.add_argument("--session-ttl", type=float, default=defaults.session_ttl,
+                        help="seconds before a session id expires (0 = never)")
+    parser.add_argument("--payload-bytes", type=int, default=defaults.payload_bytes)
+    parser.add_argument("--json", action="store_true", help="answer tools/call as JSON instead of SSE")
+    parser.add_argument("--no-batch", action="store_true", help="reject JSON-RPC batches")
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        http_error_rate=args.http_error_rate,
+        tool_error_rate=args.tool_error_rate,
+        session_ttl=args.session_ttl,
+        payload_bytes=args.payload_bytes,
+        sse=not args.json,
+        batch=not args.no_batch,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    stub = MCPStub(config_from_args(args))
+    print(f"🧪 MCP stub on http://{args.host}:{args.port}/mcp ({asdict(stub.config)})")
+    web.run_app(stub.app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
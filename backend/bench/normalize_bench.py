@@ -0,0 +1,294 @@
+# bench/normalize_bench.py
+"""
+Benchmark for the table-driven MCP argument normalizers (mcp_args)
+
+Runs a set of tool calls through normalize_arguments and through the previous
+if-chain validate_tool_params, checks both agree, and reports per-call latency
+for each tool. Country codes may differ only where the old 27-airport map fell
+back to 'TR'; those are listed separately.
+
+Usage: python bench/normalize_bench.py [--rounds 2000]
+"""
+
+import argparse
+import copy
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mcp_args import airport_countries, normalize_arguments
+
+TOMORROW = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+CASES = [
+    ("search_flights", {"origin": "IST", "destination": "JFK", "departureDate": TOMORROW, "passengerCount": 2}),
+    ("search_flights", {"origin": "SAW", "destination": "LHR", "departureDate": "tomorrow"}),
+    ("search_flights", {"origin": "ESB", "destination": "ZUR", "departureDate": "2031-1-5"}),
+    ("search_flights", {"origin": "IST", "destination": "DXB", "departureDate": TOMORROW,
+                        "passengers": [{"type": "adult", "count": 2}, {"type": "child", "count": 1}]}),
+    ("search_flights", {"origin": "ADB", "destination": "NRT", "departureDate": "not-a-date", "cabinClass": "ECONOMY"}),
+    ("search_flights", {"originDestinations": [{"originAirportCode": "IST"}], "passengers": []}),
+    ("get_flight_status_by_number", {"flightNumber": "TK1", "flightDate": TOMORROW}),
+    ("get_flight_status_by_number", {"flightNumber": "TK2", "flightDate": "2020-01-01"}),
+    ("get_flight_status_by_number", {"flightNumberFull": "TK3"}),
+    ("get_flight_status_by_route", {"origin": "IST", "destination": "AMS", "flightDate": TOMORROW}),
+    ("get_flight_status_by_route", {"fromAirport": "SAW", "toAirport": "FRA", "flightDate": "garbage"}),
+    ("get_city_guide", {"cityCode": "IST"}),
+    ("search_flights", {}),
+]
+
+
+def legacy_validate(tool_name, arguments):
+    """Previous validate_tool_params (if-chain, map rebuilt per call), kept as the baseline."""
+
+    # Airport code to country mapping for common airports
+    airport_country_map = {
+        'IST': 'TR', 'SAW': 'TR', 'ADB': 'TR', 'AYT': 'TR', 'ESB': 'TR',
+        'JFK': 'US', 'LAX': 'US', 'ORD': 'US', 'DFW': 'US', 'ATL': 'US',
+        'LHR': 'GB', 'LGW': 'GB', 'STN': 'GB', 'MAN': 'GB',
+        'CDG': 'FR', 'ORY': 'FR', 'NCE': 'FR',
+        'FRA': 'DE', 'MUC': 'DE', 'DUS': 'DE',
+        'FCO': 'IT', 'MXP': 'IT', 'VCE': 'IT',
+        'AMS': 'NL', 'MAD': 'ES', 'BCN': 'ES', 'ZUR': 'CH'
+    }
+
+    # Apply transformations for specific tools
+    if tool_name == 'search_flights' and arguments:
+        # Transform to expected format based on error messages
+        new_args = {}
+
+        # Handle trip type
+        new_args['tripType'] = arguments.get('tripType', 'one_way')
+
+        # Handle origin destinations with all required fields
+        if 'origin' in arguments and 'destination' in arguments:
+            origin_code = arguments['origin']
+            destination_code = arguments['destination']
+            departure_date = arguments.get('departureDate', (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'))
+
+            # Convert date to required DD-MM-YYYY HH:mm format using Turkey timezone
+            try:
+                import pytz
+                turkey_tz = pytz.timezone('Europe/Istanbul')
+
+                if departure_date in ['bugün', 'today']:
+                    date_obj = datetime.now(turkey_tz)
+                elif departure_date in ['yarın', 'tomorrow']:
+                    date_obj = datetime.now(turkey_tz) + timedelta(days=1)
+                else:
+                    date_obj = datetime.strptime(departure_date, '%Y-%m-%d')
+                    # If no timezone info, assume Turkey time
+                    if date_obj.tzinfo is None:
+                        date_obj = turkey_tz.localize(date_obj)
+
+                # Format as DD-MM-YYYY HH:mm
+                formatted_date = date_obj.strftime('%d-%m-%Y') + ' 10:00'
+                departure_datetime = {
+                    "departureDate": formatted_date,
+                    "departureTime": "10:00"  # Keep separate time field as well
+                }
+            except Exception as e:
+                logger.warning(f"Date parsing error: {e}, using default")
+                import pytz
+                turkey_tz = pytz.timezone('Europe/Istanbul')
+                future_date = datetime.now(turkey_tz) + timedelta(days=1)
+                formatted_date = future_date.strftime('%d-%m-%Y') + ' 10:00'
+                departure_datetime = {
+                    "departureDate": formatted_date,
+                    "departureTime": "10:00"
+                }
+
+            new_args['originDestinations'] = [{
+                'originAirportCode': origin_code,
+                'originCountryCode': airport_country_map.get(origin_code, 'TR'),
+                'destinationAirportCode': destination_code,
+                'destinationCountryCode': airport_country_map.get(destination_code, 'TR'),
+                'departureDateTime': departure_datetime
+            }]
+        elif 'originDestinations' in arguments:
+            new_args['originDestinations'] = arguments['originDestinations']
+
+        # Handle passengers with correct format
+        if 'passengerCount' in arguments:
+            new_args['passengers'] = [{
+                'passengerType': 'ADT',  # Adult passenger type
+                'quantity': arguments['passengerCount']
+            }]
+        elif 'passengers' in arguments:
+            # Validate passenger format
+            passengers = arguments['passengers']
+            if isinstance(passengers, list) and len(passengers) > 0:
+                # Fix passenger format if needed
+                fixed_passengers = []
+                for passenger in passengers:
+                    if isinstance(passenger, dict):
+                        if 'type' in passenger and 'count' in passenger:
+                            # Convert old format to new format
+                            passenger_type_map = {
+                                'adult': 'ADT',
+                                'child': 'CHD', 
+                                'infant': 'INF',
+                                'youth': 'YAD',
+                                'senior': 'SRC',
+                                'student': 'STD'
+                            }
+                            fixed_passengers.append({
+                                'passengerType': passenger_type_map.get(passenger['type'], 'ADT'),
+                                'quantity': passenger['count']
+                            })
+                        else:
+                            # Assume it's already in correct format
+                            fixed_passengers.append(passenger)
+                new_args['passengers'] = fixed_passengers
+            else:
+                new_args['passengers'] = [{'passengerType': 'ADT', 'quantity': 1}]
+        else:
+            new_args['passengers'] = [{'passengerType': 'ADT', 'quantity': 1}]
+
+        # Copy other parameters
+        for key, value in arguments.items():
+            if key not in ['origin', 'destination', 'departureDate', 'passengerCount', 'tripType', 'originDestinations', 'passengers']:
+                new_args[key] = value
+
+        return new_args
+
+    elif tool_name == 'get_flight_status_by_number' and arguments:
+        new_args = {}
+
+        # Map flightNumber to flightNumberFull
+        if 'flightNumber' in arguments:
+            new_args['flightNumberFull'] = arguments['flightNumber']
+        elif 'flightNumberFull' in arguments:
+            new_args['flightNumberFull'] = arguments['flightNumberFull']
+
+        # Ensure future date
+        if 'flightDate' in arguments:
+            date_str = arguments['flightDate']
+            try:
+                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+                if date_obj.date() < datetime.now().date():
+                    new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+                    logger.warning(f"Updated past date to future: {new_args['flightDate']}")
+                else:
+                    new_args['flightDate'] = date_str
+            except:
+                new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        else:
+            new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+
+        # Copy other parameters
+        for key, value in arguments.items():
+            if key not in ['flightNumber', 'flightDate']:
+                new_args[key] = value
+
+        return new_args
+
+    elif tool_name == 'get_flight_status_by_route' and arguments:
+        new_args = {}
+
+        # Map origin/destination to fromAirport/toAirport
+        if 'origin' in arguments:
+            new_args['fromAirport'] = arguments['origin']
+        elif 'fromAirport' in arguments:
+            new_args['fromAirport'] = arguments['fromAirport']
+
+        if 'destination' in arguments:
+            new_args['toAirport'] = arguments['destination']
+        elif 'toAirport' in arguments:
+            new_args['toAirport'] = arguments['toAirport']
+
+        # Ensure future date
+        if 'flightDate' in arguments:
+            date_str = arguments['flightDate']
+            try:
+                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+                if date_obj.date() < datetime.now().date():
+                    new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+                    logger.warning(f"Updated past date to future: {new_args['flightDate']}")
+                else:
+                    new_args['flightDate'] = date_str
+            except:
+                new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        else:
+            new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+
+        # Copy other parameters
+        for key, value in arguments.items():
+            if key not in ['origin', 'destination', 'flightDate']:
+                new_args[key] = value
+
+        return new_args
+
+    # Return original arguments if no transformation needed
+    return arguments
+
+
+# Airports the old map knew; anything else fell back to 'TR'
+LEGACY_AIRPORTS = {"IST", "SAW", "ADB", "AYT", "ESB", "JFK", "LAX", "ORD", "DFW", "ATL", "LHR", "LGW", "STN",
+                   "MAN", "CDG", "ORY", "NCE", "FRA", "MUC", "DUS", "FCO", "MXP", "VCE", "AMS", "MAD", "BCN", "ZUR"}
+
+
+def _mask_countries(args, new_airports):
+    """Blank out country codes for airports the old map did not know"""
+    for od in args.get("originDestinations", []) if isinstance(args, dict) else []:
+        for side in ("origin", "destination"):
+            if od.get(f"{side}AirportCode") in new_airports:
+                od[f"{side}CountryCode"] = "*"
+    return args
+
+
+def compare(tool_name, arguments):
+    """(new, old, new_airports): both normalizations, country codes masked where only the dataset knows them"""
+    new = normalize_arguments(tool_name, copy.deepcopy(arguments))
+    old = legacy_validate(tool_name, copy.deepcopy(arguments))
+    new_airports = {a for a in (arguments.get("origin"), arguments.get("destination")) if a and a not in LEGACY_AIRPORTS}
+    return _mask_countries(new, new_airports), _mask_countries(old, new_airports), new_airports
+
+
+def time_per_call(fn, tool_name, arguments, rounds: int) -> list[float]:
+    """Microseconds per call, one sample per round of 100 calls."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(100):
+            fn(tool_name, arguments)
+        samples.append((time.perf_counter() - start) / 100 * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    logger.remove()  # date fallbacks log warnings on every call
+
+    mismatches = 0
+    for tool_name, arguments in CASES:
+        new, old, new_airports = compare(tool_name, arguments)
+        if new != old:
+            mismatches += 1
+            print(f"MISMATCH {tool_name} {arguments}:\n  new={new}\n  old={old}")
+        for code in sorted(new_airports):
+            print(f"  coverage: {code} -> {airport_countries.get(code)} (was 'TR')")
+
+    print(f"\n{len(CASES)} calls, {mismatches} mismatches against validate_tool_params; "
+          f"{len(airport_countries)} airports in the dataset\n")
+    seen = set()
+    for tool_name, arguments in CASES:
+        if tool_name in seen:
+            continue
+        seen.add(tool_name)
+        for label, fn in (("table", normalize_arguments), ("legacy", legacy_validate)):
+            samples = time_per_call(fn, tool_name, arguments, args.rounds)
+            print(f"{tool_name:28} {label:7} median={statistics.median(samples):6.2f}us/call  "
+                  f"p99={sorted(samples)[int(len(samples) * 0.99) - 1]:6.2f}us/call")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
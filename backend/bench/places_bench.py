@@ -0,0 +1,222 @@
+# bench/places_bench.py
+"""
+Benchmark for the /gen/places candidate pipeline (api/gen/routes.py)
+
+  extract - _mk_candidates_from_mapbox (compiled drop/allow/category matchers)
+            against the previous per-feature list rebuild + any() scans, over
+            Mapbox geocoding features: recorded responses via --features, or a
+            seeded synthetic set shaped like them
+  rank    - _rank_candidates against the previous per-candidate scoring loop
+            (strict radius, second loop for the relaxed radius, full sort)
+
+Both check that new and old return the same result and report per-call latency.
+
+Usage: python bench/places_bench.py [--rounds 200] [--candidates 50,200,1000]
+                                    [--features recorded.json]
+  recorded.json: a geocoding response ({"features": [...]}), a list of them,
+                 or a plain list of features
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from math import asin, cos, radians, sin, sqrt
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.gen.geocode_cache import parse_features
+from api.gen.routes import (PlaceCandidate, _DEF_DIST_WEIGHT, _DEF_TAG_WEIGHT, _mk_candidates_from_mapbox,
+                            _rank_candidates)
+
+USER = (41.0082, 28.9784)   # Sultanahmet
+PERSONAS = ["food", "culture", "history", "nature", "shopping", "seaside"]
+# (wanted, radius_km): local, local that needs the relaxed radius, nationwide
+SCENARIOS = [(["food", "culture"], 5.0), (["history"], 0.3), (["seaside", "nature"], 0.0)]
+
+
+# ---------------------------------------------------------------- previous implementations
+def legacy_mk_candidates(features, wanted):
+    seen = set()
+    out = []
+    for f in features:
+        name, lon, lat = f.name, f.lon, f.lat
+        lower_name = (name or "").lower()
+        drop_tokens = [
+            "sokak", "sokağı", "sokaği", "cadde", "caddesi", "bulvar", "mahalle", "mahallesi",
+            "street", "st.", "avenue", "road", "rd", "blvd", "ave"
+        ]
+        if any(tok in lower_name for tok in drop_tokens):
+            continue
+        key = (name, round(lat, 6), round(lon, 6))
+        if key in seen:
+            continue
+        seen.add(key)
+        cats = f.category
+        raw_tags = [c.strip().lower() for c in cats.split(",") if c.strip()]
+        tags = []
+        for t in raw_tags:
+            if any(w in t for w in wanted):
+                tags.append(t)
+        allow_kw = [
+            "müze", "museum", "saray", "palace", "antik", "ancient", "arkeoloji", "archaeolog",
+            "ören", "ruin", "restaurant", "restoran", "mağaza", "store", "shop", "market", "bazaar", "çarşı", "mall"
+        ]
+        allow = any(kw in lower_name for kw in allow_kw) or bool(tags)
+        if not allow:
+            continue
+        out.append(PlaceCandidate(name=name, lat=lat, lon=lon, tags=tags or None))
+    return out
+
+
+def legacy_haversine_km(lat1, lon1, lat2, lon2):
+    R = 6371.0
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+    return R * c
+
+
+def legacy_score_candidate(user_lat, user_lon, cand, wanted):
+    dist_km = legacy_haversine_km(user_lat, user_lon, cand.lat, cand.lon)
+    tags = set(cand.tags or [])
+    match = len(tags.intersection(set(wanted)))
+    tag_score = 0.0 if not wanted else (match / max(1, len(wanted)))
+    return {"dist_km": dist_km, "tag_score": tag_score}
+
+
+def legacy_rank(lat, lon, cands, wanted, radius_km, k):
+    nationwide = radius_km <= 0
+
+    def item(c, s, score):
+        return {"name": c.name, "lat": c.lat, "lon": c.lon, "distance_km": round(s["dist_km"], 3),
+                "score": round(score, 4), "tags": c.tags or []}
+
+    scored = []
+    for c in cands:
+        s = legacy_score_candidate(lat, lon, c, wanted)
+        if nationwide:
+            dist_score = max(0.0, 1.0 - (s["dist_km"] / 500.0))
+            scored.append(item(c, s, 0.8 * s["tag_score"] + 0.2 * dist_score))
+        elif s["dist_km"] <= radius_km:
+            dist_score = max(0.0, 1.0 - (s["dist_km"] / max(0.001, radius_km)))
+            scored.append(item(c, s, _DEF_TAG_WEIGHT * s["tag_score"] + _DEF_DIST_WEIGHT * dist_score))
+    if not scored and cands:
+        relaxed_radius = max(radius_km * 2, 10.0)
+        for c in cands:
+            s = legacy_score_candidate(lat, lon, c, wanted)
+            if s["dist_km"] <= relaxed_radius:
+                dist_score = max(0.0, 1.0 - (s["dist_km"] / max(0.001, relaxed_radius)))
+                scored.append(item(c, s, _DEF_TAG_WEIGHT * s["tag_score"] + _DEF_DIST_WEIGHT * dist_score))
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored[:k]
+
+
+# ---------------------------------------------------------------- data
+NAME_PARTS = ["Sultanahmet", "Kadıköy", "Galata", "Moda", "Beyoğlu", "Karaköy", "Üsküdar", "Beşiktaş"]
+NAME_KINDS = ["Restoran", "Cafe", "Müzesi", "Sarayı", "Çarşısı", "Parkı", "Caddesi", "Sokak", "Fırını",
+              "Galerisi", "Plajı", "Mahallesi", "Bar", "Kitabevi", "Antik Kenti", "Street Food"]
+CATEGORIES = ["restaurant, food, food and drink", "cafe, coffee, tea, food and drink", "museum, tourist attraction",
+              "historic site, monument, tourism", "park, garden, outdoors", "shopping, market, bazaar",
+              "bar, nightlife, pub", "beach, sea", "bakery, food", "art gallery, culture", "", "bank, atm"]
+
+
+def make_features(n: int, rng: random.Random):
+    """Mapbox-shaped geocoding features (as parsed by parse_features), ~10% repeated like overlapping queries"""
+    raw = []
+    for i in range(n):
+        if raw and rng.random() < 0.1:
+            raw.append(rng.choice(raw))
+            continue
+        raw.append({
+            "text": f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_KINDS)} {i}",
+            "geometry": {"coordinates": [USER[1] + rng.uniform(-0.1, 0.1), USER[0] + rng.uniform(-0.1, 0.1)]},
+            "properties": {"category": rng.choice(CATEGORIES)},
+        })
+    return list(parse_features(raw))
+
+
+def load_features(path: str):
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        data = [data]
+    if data and "features" not in data[0]:
+        data = [{"features": data}]
+    return [f for r in data for f in parse_features(r.get("features", []))]
+
+
+def _as_tuples(cands):
+    return [(c.name, c.lat, c.lon, c.tags) for c in cands]
+
+
+def make_candidates(n: int, rng: random.Random):
+    cands = []
+    for i in range(n):
+        # Most within ~15 km, a tail across the country
+        spread = 0.15 if rng.random() < 0.9 else 4.0
+        tags = rng.sample(PERSONAS, rng.randint(0, 2)) or None
+        cands.append(PlaceCandidate(f"Yer {i}", USER[0] + rng.uniform(-spread, spread),
+                                    USER[1] + rng.uniform(-spread, spread), tags))
+    return cands
+
+
+def time_per_call(fn, args, rounds: int) -> list:
+    """Microseconds per call, one sample per round of 10 calls."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(10):
+            fn(*args)
+        samples.append((time.perf_counter() - start) / 10 * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--candidates", default="50,200,1000")
+    parser.add_argument("--features", help="recorded Mapbox geocoding response(s) for the extract benchmark")
+    args = parser.parse_args()
+    logger.remove()  # relaxed-radius path logs on every call
+
+    rng = random.Random(42)
+    sizes = [int(n) for n in args.candidates.split(",")]
+    mismatches = 0
+
+    feature_sets = [("recorded", load_features(args.features))] if args.features else \
+        [("synthetic", make_features(n, rng)) for n in sizes]
+    for label, features in feature_sets:
+        for wanted in (["food", "culture"], ["history", "shopping", "seaside"], []):
+            call = (features, wanted)
+            if _as_tuples(_mk_candidates_from_mapbox(*call)) != _as_tuples(legacy_mk_candidates(*call)):
+                mismatches += 1
+                print(f"MISMATCH extract {label} n={len(features)} wanted={wanted}")
+            new = statistics.median(time_per_call(_mk_candidates_from_mapbox, call, args.rounds))
+            old = statistics.median(time_per_call(legacy_mk_candidates, call, args.rounds))
+            print(f"extract {label:9} n={len(features):5} {','.join(wanted) or '-':22} compiled={new:8.1f}us  "
+                  f"legacy={old:8.1f}us  x{old / new:4.1f}")
+    print()
+
+    for n in sizes:
+        cands = make_candidates(n, rng)
+        for wanted, radius in SCENARIOS:
+            call = (USER[0], USER[1], cands, wanted, radius, 2)
+            if _rank_candidates(*call) != legacy_rank(*call):
+                mismatches += 1
+                print(f"MISMATCH n={n} wanted={wanted} radius={radius}")
+            new = statistics.median(time_per_call(_rank_candidates, call, args.rounds))
+            old = statistics.median(time_per_call(legacy_rank, call, args.rounds))
+            print(f"rank n={n:5} r={radius:4}km {','.join(wanted):15} one-pass={new:8.1f}us  "
+                  f"legacy={old:8.1f}us  x{old / new:4.1f}")
+    print(f"\n{mismatches} mismatches against the previous implementations")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
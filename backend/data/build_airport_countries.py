@@ -0,0 +1,36 @@
+"""
+Build data/airports_iata_country.txt from an airportsdata airports.csv
+
+    python data/build_airport_countries.py path/to/airports.csv
+
+Source: https://github.com/mborsetti/airportsdata (MIT License).
+Output is one fixed 6-byte record per IATA code, sorted, e.g. "ISTTR\\n",
+so mcp_args can binary-search it through mmap without parsing.
+"""
+import csv
+import os
+import sys
+
+OUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "airports_iata_country.txt")
+
+
+def build(csv_path: str, out_path: str = OUT_PATH) -> int:
+    records = {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            iata = (row.get("iata") or "").strip().upper()
+            country = (row.get("country") or "").strip().upper()
+            if len(iata) == 3 and len(country) == 2 and iata.isalnum():
+                records.setdefault(iata, country)
+    with open(out_path, "w", encoding="ascii", newline="\n") as f:
+        for iata in sorted(records):
+            f.write(f"{iata}{records[iata]}\n")
+    return len(records)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    count = build(sys.argv[1])
+    print(f"✅ Wrote {count} airports to {OUT_PATH}")
@@ -0,0 +1,95 @@
+"""
+Build data/poi_index_tr.bin (offline POI index for /gen/places)
+
+    python data/build_poi_index.py pois.geojson [--out data/poi_index_tr.bin] [--cell-deg 0.1]
+    python data/build_poi_index.py pois.csv
+
+Input, either:
+  - GeoJSON / GeoJSON-seq of OSM points, e.g. from a Geofabrik extract:
+        osmium tags-filter turkey-latest.osm.pbf n/amenity n/tourism n/historic n/leisure n/shop n/natural -o pois.pbf
+        osmium export pois.pbf -f geojsonseq -o pois.geojsonseq
+    (OSM data © OpenStreetMap contributors, ODbL - keep the attribution with the built file)
+  - CSV with columns name,lat,lon,category (category: "restaurant, food")
+
+Points outside --bbox (default Türkiye) and unnamed points are skipped.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from api.gen.poi_index import POI_INDEX_PATH, write_index  # noqa: E402
+
+TR_BBOX = "26,36,45,42.2"  # minLon,minLat,maxLon,maxLat
+OSM_KEYS = ("amenity", "tourism", "historic", "leisure", "shop", "natural")
+
+
+def _osm_categories(props: dict) -> list:
+    cats = []
+    for key in OSM_KEYS:
+        value = str(props.get(key) or "").strip().lower()
+        if not value:
+            continue
+        if value == "yes" or key in ("historic", "shop"):
+            cats.append(key)
+        if value != "yes":
+            cats.append(value)
+    return cats
+
+
+def _read_geojson(path: str):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".geojsonseq"):
+            features = (json.loads(line.lstrip("\x1e")) for line in f if line.strip())
+        else:
+            features = json.load(f).get("features", [])
+        for feat in features:
+            geom = feat.get("geometry") or {}
+            if geom.get("type") != "Point":
+                continue
+            props = feat.get("properties") or {}
+            name = props.get("name:tr") or props.get("name")
+            cats = _osm_categories(props)
+            if name and cats:
+                lon, lat = geom["coordinates"][:2]
+                yield name.strip(), float(lat), float(lon), ", ".join(cats)
+
+
+def _read_csv(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                name = (row.get("name") or "").strip()
+                lat, lon = float(row["lat"]), float(row["lon"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if name:
+                yield name, lat, lon, (row.get("category") or "").strip().lower()
+
+
+def build(src: str, out_path: str = POI_INDEX_PATH, bbox: str = TR_BBOX, cell_deg: float = 0.1) -> int:
+    min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    reader = _read_csv if src.endswith(".csv") else _read_geojson
+    seen, pois = set(), []
+    for name, lat, lon, category in reader(src):
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            continue
+        key = (name.casefold(), round(lat, 4), round(lon, 4))
+        if key not in seen:
+            seen.add(key)
+            pois.append((name, lat, lon, category))
+    return write_index(pois, out_path, cell_deg=cell_deg)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("src")
+    parser.add_argument("--out", default=POI_INDEX_PATH)
+    parser.add_argument("--bbox", default=TR_BBOX)
+    parser.add_argument("--cell-deg", type=float, default=0.1)
+    args = parser.parse_args()
+    count = build(args.src, args.out, args.bbox, args.cell_deg)
+    print(f"✅ Wrote {count} POIs to {os.path.abspath(args.out)} ({os.path.getsize(args.out)} bytes)")
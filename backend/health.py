@@ -0,0 +1,156 @@
+# health.py
+"""
+Background health prober - /health endpoints serve its cached results
+
+Upstream checks (MCP ping, OpenAI) run on a fixed interval off the request
+path, so load-balancer probes never create traffic to THY MCP or OpenAI.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from loguru import logger
+
+HEALTH_PROBE_INTERVAL_SEC = float(os.getenv("HEALTH_PROBE_INTERVAL_SEC", "30"))
+HEALTH_PROBE_TIMEOUT_SEC = float(os.getenv("HEALTH_PROBE_TIMEOUT_SEC", "10"))
+# Components that must be healthy for /health/ready (comma separated, e.g. "mcp,openai").
+# Defaults to MCP: without it no flight tool works, so the instance should leave rotation.
+HEALTH_CRITICAL = {c.strip() for c in os.getenv("HEALTH_CRITICAL", "mcp").split(",") if c.strip()}
+
+# A check returns a dict with at least "status" ("healthy" = ok); raising counts as "error"
+HealthCheck = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class ComponentHealth:
+    """Last probe result for one component"""
+    name: str
+    check: HealthCheck = field(repr=False)
+    status: str = "unknown"
+    detail: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    last_checked: Optional[float] = None
+    last_ok: Optional[float] = None
+    last_latency_ms: Optional[float] = None
+    avg_latency_ms: Optional[float] = None
+    consecutive_failures: int = 0
+    checks: int = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.status == "healthy"
+
+    def snapshot(self, now: float, stale_after: float) -> Dict[str, Any]:
+        stale = self.last_checked is None or now - self.last_checked > stale_after
+        return {
+            "status": self.status,
+            "stale": stale,
+            "age_sec": round(now - self.last_checked, 1) if self.last_checked else None,
+            "last_latency_ms": self.last_latency_ms,
+            "avg_latency_ms": self.avg_latency_ms,
+            "last_ok_age_sec": round(now - self.last_ok, 1) if self.last_ok else None,
+            "consecutive_failures": self.consecutive_failures,
+            "checks": self.checks,
+            "error": self.error,
+            "detail": self.detail,
+        }
+
+
+class HealthProber:
+    """Runs registered checks every `interval` seconds and caches the results"""
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL_SEC, timeout: float = HEALTH_PROBE_TIMEOUT_SEC,
+                 critical: Optional[Set[str]] = None):
+        self.interval = interval
+        self.timeout = timeout
+        self.critical = set(HEALTH_CRITICAL if critical is None else critical)
+        self.started_at = time.time()
+        self.components: Dict[str, ComponentHealth] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, check: HealthCheck):
+        self.components[name] = ComponentHealth(name=name, check=check)
+
+    async def _probe(self, component: ComponentHealth):
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(component.check(), timeout=self.timeout)
+            component.detail = detail or {}
+            component.status = component.detail.get("status", "healthy")
+            component.error = component.detail.get("error")
+        except asyncio.TimeoutError:
+            component.status, component.error = "timeout", f"no answer within {self.timeout:.0f}s"
+        except Exception as e:
+            component.status, component.error = "error", str(e)
+        latency = round((time.perf_counter() - start) * 1000, 1)
+        component.last_checked = time.time()
+        component.last_latency_ms = latency
+        # EWMA so one slow probe doesn't hide the trend
+        component.avg_latency_ms = latency if component.avg_latency_ms is None else \
+            round(component.avg_latency_ms * 0.8 + latency * 0.2, 1)
+        component.checks += 1
+        if component.healthy:
+            component.last_ok = component.last_checked
+            component.consecutive_failures = 0
+        else:
+            component.consecutive_failures += 1
+            if component.consecutive_failures == 1:  # log transitions, not every round
+                logger.warning(f"🩺 {component.name} unhealthy: {component.status} ({component.error})")
+
+    async def probe_all(self):
+        """Run every check once, concurrently"""
+        await asyncio.gather(*(self._probe(c) for c in self.components.values()))
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.warning(f"Health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the background prober (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"🩺 Health prober every {self.interval:.0f}s: {list(self.components)}")
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+    def component(self, name: str) -> Dict[str, Any]:
+        """Cached status of one component"""
+        comp = self.components.get(name)
+        if comp is None:
+            return {"status": "unknown", "error": f"no health check registered for {name}"}
+        return comp.snapshot(time.time(), self.interval * 3)
+
+    def ready(self) -> Dict[str, Any]:
+        """Readiness from cached results; never calls upstream"""
+        now = time.time()
+        stale_after = self.interval * 3
+        components = {name: c.snapshot(now, stale_after) for name, c in self.components.items()}
+        failing = [
+            name for name in sorted(self.critical)
+            if name not in components or components[name]["stale"] or components[name]["status"] != "healthy"
+        ]
+        return {
+            "ready": not failing,
+            "failing": failing,
+            "critical": sorted(self.critical),
+            "uptime_sec": round(now - self.started_at, 1),
+            "probe_interval_sec": self.interval,
+            "components": components,
+        }
+
+
+health_prober = HealthProber()
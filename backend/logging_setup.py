@@ -0,0 +1,111 @@
+# logging_setup.py
+"""
+Loguru configuration: background (enqueued) sinks, JSON file output and
+per-route sampling for the one-line-per-request access log.
+
+Env:
+  LOG_LEVEL          INFO
+  LOG_FILE           logs/app.log ("" disables the file sink)
+  LOG_FILE_JSON      true  -> one JSON object per line in LOG_FILE
+  LOG_STDOUT_JSON    false
+  LOG_SAMPLE_RATES   "/health*=0,/metrics=0,/gen/image/*=0.05,*=1"
+                     first matching route template wins; 0 = never, 1 = always
+  LOG_SLOW_MS        1000  -> slower requests are always logged
+"""
+
+import os
+import random
+import sys
+from fnmatch import fnmatchcase
+from typing import Dict, List, Tuple
+
+from loguru import logger
+
+DEFAULT_SAMPLE_RATES = "/health*=0,/metrics=0,/gen/image/*=0.05,*=1"
+LOG_SLOW_MS = float(os.getenv("LOG_SLOW_MS", "1000"))
+
+_STDOUT_FORMAT = (
+    "<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
+_FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+def parse_sample_rates(spec: str) -> List[Tuple[str, float]]:
+    """'pattern=rate,...' -> [(pattern, rate)]; malformed entries are skipped"""
+    rules = []
+    for part in spec.split(","):
+        pattern, sep, rate = part.strip().rpartition("=")
+        if not sep or not pattern:
+            continue
+        try:
+            rules.append((pattern.strip(), min(1.0, max(0.0, float(rate)))))
+        except ValueError:
+            continue
+    return rules
+
+
+class RequestSampler:
+    """Decides per route template whether a request line is written; rates are cached per template"""
+
+    def __init__(self, spec: str):
+        self.rules = parse_sample_rates(spec)
+        self._rates: Dict[str, float] = {}
+
+    def rate(self, route: str) -> float:
+        rate = self._rates.get(route)
+        if rate is None:
+            rate = next((r for pattern, r in self.rules if fnmatchcase(route, pattern)), 1.0)
+            self._rates[route] = rate
+        return rate
+
+    def should_log(self, route: str, status: int, duration_ms: float) -> bool:
+        # Errors and slow requests are never sampled away
+        if status >= 500 or duration_ms >= LOG_SLOW_MS:
+            return True
+        rate = self.rate(route)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+request_sampler = RequestSampler(os.getenv("LOG_SAMPLE_RATES", DEFAULT_SAMPLE_RATES))
+
+
+def configure_logging():
+    """Replace loguru's default sink with enqueued stdout and file sinks"""
+    level = os.getenv("LOG_LEVEL", "INFO")
+    logger.remove()
+
+    # enqueue=True: records go through a queue and are written by a background thread
+    if _env_flag("LOG_STDOUT_JSON", "false"):
+        logger.add(sys.stdout, level=level, serialize=True, enqueue=True)
+    else:
+        logger.add(sys.stdout, format=_STDOUT_FORMAT, level=level, colorize=True, enqueue=True)
+
+    log_file = os.getenv("LOG_FILE", "logs/app.log")
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        file_json = _env_flag("LOG_FILE_JSON", "true")
+        logger.add(
+            log_file,
+            format=_FILE_FORMAT,
+            serialize=file_json,
+            level=level,
+            rotation="1 day",
+            retention="30 days",
+            enqueue=True
+        )
+
+
+def log_request(method: str, path: str, route: str, status: int, duration_ms: float):
+    """The single access-log line for a request (query strings are left out on purpose)"""
+    if not request_sampler.should_log(route, status, duration_ms):
+        return
+    level = "ERROR" if status >= 500 else "WARNING" if duration_ms >= LOG_SLOW_MS else "INFO"
+    logger.bind(
+        kind="access", method=method, path=path, route=route, status=status,
+        duration_ms=round(duration_ms, 1), sample_rate=request_sampler.rate(route)
+    ).opt(depth=1).log(level, f"{method} {path} {status} {duration_ms:.0f}ms")
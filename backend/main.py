@@ -1,11 +1,13 @@
 # main.py
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from dotenv import load_dotenv
 import os
+import asyncio
 from loguru import logger
 import sys
+import time
 from contextlib import asynccontextmanager
 
 # Import existing routers
@@ -19,6 +21,13 @@ from api.gen.routes import router as gen_router
 
 # Import MCP client (YENİ)
 from mcp_client import get_mcp_client, ensure_mcp_connection, mcp_health_check
+from health import health_prober
+from api.gen.image_jobs import image_jobs
+from api.gen.routes import image_store
+import metrics
+from logging_setup import configure_logging, log_request
+from tracing import start_span, memory_exporter
+from auth.admin import require_admin
 
 load_dotenv()
 
@@ -56,7 +65,8 @@ async def lifespan(app: FastAPI):
         mcp_client = await get_mcp_client()
         
         if mcp_client._connected:
-            await mcp_client.load_tools()
+            # connect() already loaded the tool list; keep it fresh off the request path
+            mcp_client.start_background_refresh()
             logger.success(f"✅ Turkish Airlines MCP ready - {len(mcp_client.tools_cache)} tools available")
             optional_vars["TURKISH_AIRLINES_MCP_TOKEN"] = "Turkish Airlines MCP integration (CONNECTED)"
         else:
@@ -99,6 +109,11 @@ async def lifespan(app: FastAPI):
     logger.info("   /persona/* - User Personas")
     logger.info("   /gen/* - Content Generation")
     
+    # Upstream health is probed in the background; /health* only read the cache
+    health_prober.start()
+    # Image generation jobs (/gen/image-jobs) run on a bounded worker pool
+    image_jobs.start()
+    
     port = os.getenv("PORT", "8080")
     logger.success(f"✅ Server ready on port {port}")
     
@@ -106,12 +121,18 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Yol/Route Backend + THY MCP + LLM API shutting down...")
+    await health_prober.stop()
+    await image_jobs.stop()
+    # Finish queued image writes and fsync the last batch
+    await asyncio.to_thread(image_store.close)
     try:
         mcp_client = await get_mcp_client()
         await mcp_client.disconnect()
         logger.info("✅ Turkish Airlines MCP disconnected cleanly")
     except Exception as e:
         logger.warning(f"MCP disconnect error: {e}")
+    # Flush the enqueued log sinks
+    await logger.complete()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -139,31 +160,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure logging
-logger.remove()  # Remove default handler
-log_level = os.getenv("LOG_LEVEL", "INFO")
-
-logger.add(
-    sys.stdout,
-    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level=log_level,
-    colorize=True
-)
-
-# Add file logging
-os.makedirs("logs", exist_ok=True)
-logger.add(
-    "logs/app.log",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-    level=log_level,
-    rotation="1 day",
-    retention="30 days"
-)
+# Configure logging: enqueued stdout + JSON file sinks (see logging_setup.py)
+configure_logging()
 
 # Exception handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    logger.error(f"HTTP {exc.status_code} error on {request.method} {request.url}: {exc.detail}")
+    logger.error(f"HTTP {exc.status_code} error on {request.method} {request.url.path}: {exc.detail}")
     return JSONResponse(
         status_code=exc.status_code,
         content={
@@ -178,7 +181,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception on {request.method} {request.url}: {str(exc)}", exc_info=True)
+    logger.opt(exception=exc).error(f"Unhandled exception on {request.method} {request.url.path}: {str(exc)}")
     return JSONResponse(
         status_code=500,
         content={
@@ -192,18 +195,80 @@ async def general_exception_handler(request: Request, exc: Exception):
         }
     )
 
-# Request logging middleware
+def _route_template(request: Request) -> str:
+    """Matched route path incl. router prefix, e.g. /gen/image/{name}; 'unmatched' for 404s."""
+    # Set by the router once it matched; include_router() bakes the prefix into route.path
+    return getattr(request.scope.get("route"), "path", None) or "unmatched"
+
+# Request middleware: metrics + one sampled access-log line per request
+# (label = route template, so /gen/image/{name} is one series)
 @app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"Request: {request.method} {request.url}")
-    response = await call_next(request)
-    logger.info(f"Response: {request.method} {request.url} - Status: {response.status_code}")
-    return response
+async def observe_requests(request: Request, call_next):
+    metrics.HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    # Root span; continues the caller's trace when a traceparent header is sent (e.g. /plan loopback)
+    with start_span(f"{request.method} {request.url.path}", traceparent=request.headers.get("traceparent"),
+                    method=request.method, path=request.url.path) as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            if span is not None:
+                response.headers["X-Trace-Id"] = span.trace_id
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.HTTP_IN_FLIGHT.dec()
+            route_path = _route_template(request)
+            metrics.HTTP_LATENCY.observe(elapsed, method=request.method, route=route_path)
+            metrics.HTTP_REQUESTS.inc(method=request.method, route=route_path, status=str(status))
+            log_request(request.method, request.url.path, route_path, status, elapsed * 1000)
+            if span is not None:
+                span.name = f"{request.method} {route_path}"
+                span.set_attribute("status", status)
+                if status >= 500:
+                    span.status = "error"
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus text format: route latency, upstream timings, /plan stages, caches."""
+    return Response(content=metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
+
+# Recent traces from the in-memory exporter (TRACE_EXPORTERS=memory); admin only (X-Admin-Token)
+@app.get("/debug/traces", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def debug_traces(limit: int = 50, min_ms: float = 0.0):
+    """Newest first; min_ms filters to slow requests."""
+    return {"traces": memory_exporter.recent(limit=limit, min_ms=min_ms)}
+
+@app.get("/debug/traces/{trace_id}", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def debug_trace(trace_id: str):
+    """All spans of one trace, ordered by start time (trace id comes from the X-Trace-Id header)."""
+    spans = memory_exporter.get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "spans": spans}
+
+# MCP ping runs in the background prober, never per request
+health_prober.register("mcp", mcp_health_check)
+
+# Liveness: the process is up and serving; no dependencies checked
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe - constant time, no upstream calls."""
+    return {"status": "alive"}
+
+# Readiness: cached component status from the background prober
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness probe - 503 when a HEALTH_CRITICAL component is failing or stale."""
+    ready = health_prober.ready()
+    return JSONResponse(status_code=200 if ready["ready"] else 503, content=ready)
 
 # Enhanced health check endpoint
 @app.get("/health")
 async def health():
-    """Enhanced health check with all components including MCP status."""
+    """Enhanced health check with all components including cached MCP status."""
     checks = {
         "ok": True,
         "service": "Yol/Route Backend + THY MCP + LLM",
@@ -222,36 +287,21 @@ async def health():
     for component, available in components.items():
         checks["components"][component] = "✓" if available else "✗"
     
-    # Test MCP connection
-    try:
-        mcp_health = await mcp_health_check()
-        checks["mcp_status"] = mcp_health
-        checks["components"]["turkish_airlines_mcp"] = "✓" if mcp_health.get("status") == "healthy" else "✗"
-        
-        if mcp_health.get("status") != "healthy":
-            checks["ok"] = False
-    except Exception as e:
-        checks["mcp_status"] = {
-            "status": "error",
-            "error": str(e),
-            "connected": False
-        }
-        checks["components"]["turkish_airlines_mcp"] = "✗"
+    # Last MCP probe result (refreshed every HEALTH_PROBE_INTERVAL_SEC)
+    mcp_health = health_prober.component("mcp")
+    checks["mcp_status"] = mcp_health
+    checks["components"]["turkish_airlines_mcp"] = "✓" if mcp_health.get("status") == "healthy" else "✗"
+    if mcp_health.get("status") != "healthy":
+        checks["ok"] = False
     
     return checks
 
 # MCP-specific health check endpoint (NEW)
 @app.get("/mcp/health")
 async def mcp_health():
-    """Dedicated Turkish Airlines MCP health check."""
-    try:
-        return await mcp_health_check()
-    except Exception as e:
-        return {
-            "status": "error",
-            "error": str(e),
-            "connected": False
-        }
+    """Dedicated Turkish Airlines MCP health check (cached probe result)."""
+    mcp_health = health_prober.component("mcp")
+    return {**mcp_health.get("detail", {}), **{k: v for k, v in mcp_health.items() if k != "detail"}}
 
 # API Info endpoint
 @app.get("/")
@@ -270,7 +320,10 @@ def root():
         ],
         "endpoints": {
             "health": "/health",
+            "health_live": "/health/live",
+            "health_ready": "/health/ready",
             "mcp_health": "/mcp/health",  # NEW
+            "metrics": "/metrics",
             "auth": "/auth/*",
             "ai_chat": "/ai/ask",
             "ai_tools": "/ai/tools",  # NEW
@@ -0,0 +1,272 @@
+"""
+Table-driven argument normalizers for MCP tools.
+
+Each tool maps to a pipeline of small steps that read the caller's arguments
+and write the shape the Turkish Airlines MCP server expects. Keys a pipeline
+does not consume are copied through unchanged. Everything here is built once
+at import.
+"""
+
+import mmap
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+import pytz
+from loguru import logger
+
+_TURKEY_TZ = pytz.timezone('Europe/Istanbul')
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+# ---------------------------------------------------------------------------
+# IATA airport -> ISO country lookup
+# ---------------------------------------------------------------------------
+
+AIRPORTS_PATH = os.getenv(
+    "AIRPORTS_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "airports_iata_country.txt")
+)
+_RECORD = 6  # "ISTTR\n"
+DEFAULT_COUNTRY = 'TR'
+
+# Entries from the old hardcoded map that the dataset does not agree with
+COUNTRY_OVERRIDES: Dict[str, str] = {
+    'ZUR': 'CH',
+}
+
+
+class AirportCountries:
+    """Binary search over the sorted fixed-width airport file, memory-mapped on first use"""
+
+    def __init__(self, path: str = AIRPORTS_PATH):
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+        self._count = 0
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._count = len(self._map) // _RECORD
+            logger.info(f"✈️ Loaded {self._count} airports from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Airport dataset unavailable ({e}); using overrides and default country only")
+
+    def get(self, code: Any, default: Optional[str] = None) -> Optional[str]:
+        if not isinstance(code, str):
+            return default
+        if code in COUNTRY_OVERRIDES:
+            return COUNTRY_OVERRIDES[code]
+        if len(code) != 3:
+            return default
+        if not self._loaded:
+            self._load()
+        if not self._count:
+            return default
+        key = code.upper().encode("ascii", "replace")
+        data, lo, hi = self._map, 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mid * _RECORD
+            probe = data[start:start + 3]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return data[start + 3:start + 5].decode("ascii")
+        return default
+
+    def __len__(self) -> int:
+        if not self._loaded:
+            self._load()
+        return self._count
+
+
+airport_countries = AirportCountries()
+
+
+def airport_country(code: Any) -> str:
+    """Country code for an IATA airport code, 'TR' when unknown"""
+    return airport_countries.get(code, DEFAULT_COUNTRY)
+
+
+# ---------------------------------------------------------------------------
+# Dates
+# ---------------------------------------------------------------------------
+
+def _tomorrow_local() -> str:
+    return (date.today() + timedelta(days=1)).isoformat()
+
+
+def _future_date(value: Any) -> str:
+    """YYYY-MM-DD, moved to tomorrow when in the past or unparseable"""
+    try:
+        m = _ISO_DATE_RE.fullmatch(value)
+        day = date(int(m.group(1)), int(m.group(2)), int(m.group(3))) if m else datetime.strptime(value, '%Y-%m-%d').date()
+    except Exception:
+        return _tomorrow_local()
+    if day < date.today():
+        tomorrow = _tomorrow_local()
+        logger.warning(f"Updated past date to future: {tomorrow}")
+        return tomorrow
+    return value
+
+
+def _departure_datetime(value: str) -> Dict[str, str]:
+    """YYYY-MM-DD / today / tomorrow -> the DD-MM-YYYY HH:mm shape search_flights expects"""
+    try:
+        if value in ('bugün', 'today'):
+            formatted = datetime.now(_TURKEY_TZ).strftime('%d-%m-%Y')
+        elif value in ('yarın', 'tomorrow'):
+            formatted = (datetime.now(_TURKEY_TZ) + timedelta(days=1)).strftime('%d-%m-%Y')
+        else:
+            m = _ISO_DATE_RE.fullmatch(value)
+            if m:
+                date(int(m.group(1)), int(m.group(2)), int(m.group(3)))  # reject 2025-02-30
+                formatted = f"{m.group(3)}-{m.group(2)}-{m.group(1)}"
+            else:
+                formatted = datetime.strptime(value, '%Y-%m-%d').strftime('%d-%m-%Y')
+    except Exception as e:
+        logger.warning(f"Date parsing error: {e}, using default")
+        formatted = (datetime.now(_TURKEY_TZ) + timedelta(days=1)).strftime('%d-%m-%Y')
+    return {
+        "departureDate": formatted + ' 10:00',
+        "departureTime": "10:00"  # Keep separate time field as well
+    }
+
+
+# ---------------------------------------------------------------------------
+# Pipeline steps: step(arguments, new_args) -> None
+# ---------------------------------------------------------------------------
+
+Step = Callable[[Dict[str, Any], Dict[str, Any]], None]
+
+PASSENGER_TYPES: Dict[str, str] = {
+    'adult': 'ADT',
+    'child': 'CHD',
+    'infant': 'INF',
+    'youth': 'YAD',
+    'senior': 'SRC',
+    'student': 'STD'
+}
+_DEFAULT_PASSENGERS = ({'passengerType': 'ADT', 'quantity': 1},)
+
+
+def default(key: str, value: Any) -> Step:
+    """new_args[key] = arguments.get(key, value)"""
+    def step(args, out):
+        out[key] = args.get(key, value)
+    return step
+
+
+def rename(target: str, *sources: str) -> Step:
+    """new_args[target] = first of sources present in the arguments"""
+    def step(args, out):
+        for source in sources:
+            if source in args:
+                out[target] = args[source]
+                return
+    return step
+
+
+def future_date(key: str) -> Step:
+    """Always set key to a non-past YYYY-MM-DD (tomorrow by default)"""
+    def step(args, out):
+        out[key] = _future_date(args[key]) if key in args else _tomorrow_local()
+    return step
+
+
+def origin_destinations(args, out):
+    """origin/destination/departureDate -> originDestinations[] with country codes"""
+    if 'origin' in args and 'destination' in args:
+        origin_code = args['origin']
+        destination_code = args['destination']
+        departure_date = args['departureDate'] if 'departureDate' in args else _tomorrow_local()
+        out['originDestinations'] = [{
+            'originAirportCode': origin_code,
+            'originCountryCode': airport_country(origin_code),
+            'destinationAirportCode': destination_code,
+            'destinationCountryCode': airport_country(destination_code),
+            'departureDateTime': _departure_datetime(departure_date)
+        }]
+    elif 'originDestinations' in args:
+        out['originDestinations'] = args['originDestinations']
+
+
+def passengers(args, out):
+    """passengerCount or legacy {type, count} entries -> [{passengerType, quantity}]"""
+    if 'passengerCount' in args:
+        out['passengers'] = [{'passengerType': 'ADT', 'quantity': args['passengerCount']}]
+        return
+    given = args.get('passengers')
+    if given is None or not isinstance(given, list) or not given:
+        out['passengers'] = [dict(p) for p in _DEFAULT_PASSENGERS]
+        return
+    fixed = []
+    for passenger in given:
+        if not isinstance(passenger, dict):
+            continue
+        if 'type' in passenger and 'count' in passenger:
+            fixed.append({
+                'passengerType': PASSENGER_TYPES.get(passenger['type'], 'ADT'),
+                'quantity': passenger['count']
+            })
+        else:
+            fixed.append(passenger)
+    out['passengers'] = fixed
+
+
+@dataclass(frozen=True, slots=True)
+class ToolNormalizer:
+    """Runs the steps in order, then copies every argument not in `consumed`"""
+    steps: Tuple[Step, ...]
+    consumed: FrozenSet[str]
+
+    def __call__(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        new_args: Dict[str, Any] = {}
+        for step in self.steps:
+            step(arguments, new_args)
+        consumed = self.consumed
+        for key, value in arguments.items():
+            if key not in consumed:
+                new_args[key] = value
+        return new_args
+
+
+def normalizer(*steps: Step, consumes: Tuple[str, ...]) -> ToolNormalizer:
+    return ToolNormalizer(tuple(steps), frozenset(consumes))
+
+
+NORMALIZERS: Dict[str, ToolNormalizer] = {
+    'search_flights': normalizer(
+        default('tripType', 'one_way'),
+        origin_destinations,
+        passengers,
+        consumes=('origin', 'destination', 'departureDate', 'passengerCount',
+                  'tripType', 'originDestinations', 'passengers'),
+    ),
+    'get_flight_status_by_number': normalizer(
+        rename('flightNumberFull', 'flightNumber', 'flightNumberFull'),
+        future_date('flightDate'),
+        consumes=('flightNumber', 'flightDate'),
+    ),
+    'get_flight_status_by_route': normalizer(
+        rename('fromAirport', 'origin', 'fromAirport'),
+        rename('toAirport', 'destination', 'toAirport'),
+        future_date('flightDate'),
+        consumes=('origin', 'destination', 'flightDate'),
+    ),
+}
+
+
+def normalize_arguments(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Rewrite arguments into the server's expected shape; unknown tools pass through"""
+    pipeline = NORMALIZERS.get(tool_name)
+    if pipeline is None or not arguments:
+        return arguments
+    return pipeline(arguments)
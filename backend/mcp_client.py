@@ -7,21 +7,242 @@ import aiohttp
 import json
 import os
 import ssl
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, FrozenSet
 from loguru import logger
 import time
-from dataclasses import dataclass
+from mcp_schema import Validator, compile_schema
+from mcp_args import normalize_arguments
+from metrics import track_upstream
+from tracing import inject_headers
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 import certifi
+import itertools
+import random
 import uuid
 from datetime import datetime, timedelta
 
 
-@dataclass
+@dataclass(slots=True)
 class MCPTool:
-    """MCP Tool definition"""
+    """MCP Tool definition with its argument validator compiled once per tools version"""
     name: str
     description: str
     input_schema: Dict[str, Any]
+    validator: Optional[Validator] = field(default=None, repr=False, compare=False)
+    
+    def validate(self, arguments: Dict[str, Any]) -> List[str]:
+        if self.validator is None:
+            self.validator = compile_schema(self.input_schema)
+        return self.validator(arguments)
+
+
+class SSEDecoder:
+    """
+    Incremental text/event-stream decoder.
+
+    Bytes are appended to one buffer and scanned in place; only `data:` field
+    values are sliced out. Multi-line `data:` fields are joined with newlines
+    and an event is emitted on the blank line that terminates it. The partial
+    line left over from earlier chunks is not rescanned, so a long line
+    arriving in many small chunks costs O(n), not O(n^2).
+    """
+    
+    def __init__(self):
+        self._buf = bytearray()
+        self._scanned = 0   # leading bytes of _buf already known to hold no newline
+        self._data: List[bytes] = []
+    
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Consume a chunk and return the data payloads of every completed event"""
+        buf = self._buf
+        buf += chunk
+        events: List[bytes] = []
+        start = 0
+        pos = self._scanned
+        while True:
+            end = buf.find(b"\n", pos)
+            if end < 0:
+                break
+            line_end = end - 1 if end > start and buf[end - 1] == 0x0D else end  # strip \r
+            if line_end == start:
+                self._dispatch(events)
+            elif buf.startswith(b"data:", start):
+                value_start = start + 5
+                if value_start < line_end and buf[value_start] == 0x20:
+                    value_start += 1
+                self._data.append(bytes(buf[value_start:line_end]))
+            # other fields (event:, id:, retry:) and comments are ignored
+            start = pos = end + 1
+        if start:
+            del buf[:start]
+        self._scanned = len(buf)
+        return events
+    
+    def close(self) -> List[bytes]:
+        """Flush an event left open by a stream that ended without a blank line"""
+        events: List[bytes] = []
+        if self._buf:
+            events.extend(self.feed(b"\n"))
+        self._dispatch(events)
+        return events
+    
+    def _dispatch(self, events: List[bytes]):
+        if not self._data:
+            return
+        events.append(self._data[0] if len(self._data) == 1 else b"\n".join(self._data))
+        self._data = []
+
+
+def _iter_messages(message: Any):
+    """Flatten a JSON-RPC message or batch array into individual messages"""
+    if isinstance(message, list):
+        for item in message:
+            if isinstance(item, dict):
+                yield item
+    elif isinstance(message, dict):
+        yield message
+
+
+async def iter_jsonrpc_messages(response: aiohttp.ClientResponse):
+    """Yield every JSON-RPC message from a plain JSON or SSE body as it arrives"""
+    content_type = response.headers.get('content-type', '').lower()
+    
+    if 'text/event-stream' not in content_type:
+        body = await response.read()
+        try:
+            for message in _iter_messages(json.loads(body)):
+                yield message
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid JSON in MCP response: {body[:200]!r}")
+        return
+    
+    decoder = SSEDecoder()
+    async for chunk in response.content.iter_any():
+        for payload in decoder.feed(chunk):
+            try:
+                parsed = json.loads(payload)
+            except json.JSONDecodeError:
+                continue
+            for message in _iter_messages(parsed):
+                yield message
+    for payload in decoder.close():
+        try:
+            parsed = json.loads(payload)
+        except json.JSONDecodeError:
+            continue
+        for message in _iter_messages(parsed):
+            yield message
+
+
+async def read_jsonrpc_response(response: aiohttp.ClientResponse, request_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Read the JSON-RPC response with the given id from a plain JSON or SSE body.
+    Notifications and responses to other ids are skipped.
+    """
+    async for message in iter_jsonrpc_messages(response):
+        if message.get("id") == request_id and ("result" in message or "error" in message):
+            return message
+    return None
+
+
+class MCPError(Exception):
+    """MCP call failed"""
+
+
+class MCPTransientError(MCPError):
+    """Network error, timeout, 5xx or 429 - safe to retry"""
+
+
+class MCPToolError(MCPError):
+    """The MCP server answered with a JSON-RPC error"""
+
+
+class MCPCircuitOpenError(MCPError):
+    """Call rejected locally because the MCP circuit breaker is open"""
+
+
+class MCPValidationError(MCPError):
+    """Arguments rejected locally by the tool's input schema; nothing was sent upstream"""
+
+
+# Read-only tools that may be sent twice (hedged) without side effects
+HEDGEABLE_TOOLS = frozenset({
+    "ping",
+    "search_flights",
+    "get_flight_status_by_number",
+    "get_flight_status_by_route",
+    "get_city_guide",
+    "get_airline_promotions",
+})
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive transient failures.
+    After `reset_timeout` seconds one trial call is let through (half-open);
+    its outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._trial_in_flight = False
+    
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.time())
+    
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.retry_in() <= 0:
+            self.state = "half_open"
+            self._trial_in_flight = False
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+    
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+    
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.open_count += 1
+                logger.warning(f"🔌 MCP circuit opened after {self.consecutive_failures} failures")
+            self.state = "open"
+            self.opened_at = time.time()
+            self._trial_in_flight = False
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "open_count": self.open_count,
+            "retry_in_sec": round(self.retry_in(), 1) if self.state == "open" else 0.0,
+        }
+
+
+@dataclass
+class MCPSessionSlot:
+    """One initialized MCP session (mcp-session-id) sharing the client's HTTP connection pool"""
+    index: int
+    session_id: Optional[str] = None
+    in_flight: int = 0
+    generation: int = 0
+    initialized_at: float = 0.0
+    init_failures: int = 0              # consecutive failed initialize calls
+    retry_at: float = 0.0               # pooled slot skipped until then after a failed initialize
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
 
 
 class TurkishAirlinesMCPClient:
@@ -34,7 +255,8 @@ class TurkishAirlinesMCPClient:
         server_url: str = "https://mcp.turkishtechlab.com/mcp",
         auth_token: str = None,
         session_id: str = None,
-        verify_ssl: bool = None
+        verify_ssl: bool = None,
+        pool_size: int = None
     ):
         self.server_url = server_url.rstrip('/')
         self.auth_token = auth_token or os.getenv("TURKISH_AIRLINES_MCP_TOKEN")
@@ -51,8 +273,46 @@ class TurkishAirlinesMCPClient:
         
         self.tools_cache = []
         self.last_tools_fetch = 0
+        self.tools_ttl = float(os.getenv("MCP_TOOLS_TTL_SEC", "300"))
+        self._tools_refresh_task: Optional[asyncio.Task] = None
+        self._tools_refresher: Optional[asyncio.Task] = None
+        self._tools_retry_at = 0.0
+        # OpenAI tool specs are precomputed per tools_cache version
+        self.tools_version = 0
+        self._openai_tools_key = None
+        self._openai_tools: List[Dict[str, Any]] = []
+        self._openai_tool_subsets: Dict[FrozenSet[str], List[Dict[str, Any]]] = {}
+        # Name index over tools_cache, rebuilt with the same version key
+        self._tools_index_key = None
+        self._tools_by_name: Dict[str, MCPTool] = {}
+        self.validate_args = os.getenv("MCP_VALIDATE_ARGS", "true").lower() in ("true", "1", "yes", "on")
         self.session = None
         self._connected = False
+        self._connect_lock = asyncio.Lock()
+        
+        # JSON-RPC: monotonically increasing ids and the futures waiting on them
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        # None = not tried yet; flips to False the first time the server rejects a batch
+        self.batch_supported: Optional[bool] = None if os.getenv("MCP_BATCH_ENABLED", "true").lower() in ("true", "1", "yes", "on") else False
+        
+        # Small pool of MCP sessions; concurrent calls go to the least busy one
+        self.pool_size = max(1, pool_size or int(os.getenv("MCP_SESSION_POOL_SIZE", "1")))
+        self._slots = [MCPSessionSlot(index=i) for i in range(self.pool_size)]
+        
+        # Retry / hedging / circuit breaker configuration
+        self.max_retries = int(os.getenv("MCP_RETRIES", "2"))
+        self.retry_base_delay = float(os.getenv("MCP_RETRY_BASE_MS", "200")) / 1000
+        self.retry_max_delay = float(os.getenv("MCP_RETRY_MAX_MS", "2000")) / 1000
+        self.hedge_delay = float(os.getenv("MCP_HEDGE_DELAY_MS", "0")) / 1000
+        self.call_timeout = float(os.getenv("MCP_CALL_TIMEOUT_SEC", "30"))
+        # Backoff for pooled slots whose initialize failed: base * 2^(failures-1), capped
+        self.slot_retry_base = float(os.getenv("MCP_SLOT_RETRY_SEC", "5"))
+        self.slot_retry_max = float(os.getenv("MCP_SLOT_RETRY_MAX_SEC", "60"))
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("MCP_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("MCP_BREAKER_RESET_SEC", "30"))
+        )
         
         if not self.auth_token:
             logger.warning("Turkish Airlines MCP token not provided")
@@ -86,6 +346,36 @@ class TurkishAirlinesMCPClient:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.disconnect()
     
+    def _ensure_http_session(self):
+        """Create the shared aiohttp session (connection pool) if needed"""
+        if self.session and not self.session.closed:
+            return
+        
+        # Create SSL context
+        ssl_context = self._create_ssl_context()
+        
+        connector = aiohttp.TCPConnector(
+            ssl=ssl_context,
+            limit=100,
+            limit_per_host=30,
+            ttl_dns_cache=300,
+            use_dns_cache=True,
+        )
+        
+        # Base headers WITHOUT session ID; it is sent per request for the chosen slot
+        initial_headers = {
+            'User-Agent': 'TurkishAirlines-MCP-Client/1.0',
+            'Accept': 'application/json, text/event-stream',
+            'Authorization': f'Bearer {self.auth_token}',
+            'Content-Type': 'application/json'
+        }
+        
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=30, connect=10),
+            headers=initial_headers
+        )
+    
     async def connect(self) -> bool:
         """Connect to MCP server - first get valid session, then use it"""
         if self._connected:
@@ -95,513 +385,617 @@ class TurkishAirlinesMCPClient:
             logger.error("Cannot connect: No Turkish Airlines MCP token provided")
             return False
         
-        try:
-            if not self.session:
-                # Create SSL context
-                ssl_context = self._create_ssl_context()
-                
-                connector = aiohttp.TCPConnector(
-                    ssl=ssl_context,
-                    limit=100,
-                    limit_per_host=30,
-                    ttl_dns_cache=300,
-                    use_dns_cache=True,
-                )
+        # Concurrent first calls wait here instead of each running initialize
+        async with self._connect_lock:
+            if self._connected:
+                return True
+            
+            try:
+                self._ensure_http_session()
+                logger.info("Getting session from Turkish Airlines MCP server...")
                 
-                # Initial headers WITHOUT session ID for getting session
-                initial_headers = {
-                    'User-Agent': 'TurkishAirlines-MCP-Client/1.0',
-                    'Accept': 'application/json, text/event-stream',
-                    'Authorization': f'Bearer {self.auth_token}',
-                    'Content-Type': 'application/json'
-                }
+                if not await self._initialize_slot(self._slots[0]):
+                    return False
                 
-                self.session = aiohttp.ClientSession(
-                    connector=connector,
-                    timeout=aiohttp.ClientTimeout(total=30, connect=10),
-                    headers=initial_headers
-                )
-            
-            logger.info("Getting session from Turkish Airlines MCP server...")
+                self._connected = True
+                await self.load_tools()
+                return True
             
-            # Step 1: Get session ID from server using initialize
-            init_payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {
-                        "tools": {},
-                        "logging": {}
-                    },
-                    "clientInfo": {
-                        "name": "turkish-airlines-client",
-                        "version": "1.0.0"
-                    }
-                }
-            }
-            
-            try:
-                async with self.session.post(
-                    self.server_url,
-                    json=init_payload
-                ) as response:
-                    logger.debug(f"Initialize response status: {response.status}")
-                    logger.debug(f"Initialize response headers: {dict(response.headers)}")
-                    
-                    if response.status == 200:
-                        # Check for session ID in headers
-                        server_session_id = response.headers.get('mcp-session-id')
-                        if server_session_id:
-                            self.session_id = server_session_id
-                            logger.success(f"✅ Got session from server: {self.session_id}")
-                            
-                            # Update session headers with the real session ID
-                            self.session.headers.update({
-                                'mcp-session-id': self.session_id
-                            })
-                            
-                            self._connected = True
-                            await self.load_tools()
-                            return True
-                        
-                        # If no session ID in headers, try to parse response
-                        content_type = response.headers.get('content-type', '').lower()
-                        
-                        if 'text/event-stream' in content_type:
-                            # Handle SSE response for session
-                            async for line in response.content:
-                                line = line.decode('utf-8').strip()
-                                if line.startswith('data: '):
-                                    try:
-                                        data = json.loads(line[6:])
-                                        if "result" in data:
-                                            # Check if result has session info
-                                            result = data["result"]
-                                            # Session ID should be in headers, but check result too
-                                            self.session_id = server_session_id or result.get("sessionId", self.session_id)
-                                            self._connected = True
-                                            logger.success(f"✅ Connected via SSE - Session: {self.session_id}")
-                                            
-                                            # Update headers
-                                            self.session.headers.update({
-                                                'mcp-session-id': self.session_id
-                                            })
-                                            
-                                            await self.load_tools()
-                                            return True
-                                        break
-                                    except json.JSONDecodeError:
-                                        continue
-                        else:
-                            # Handle JSON response
-                            data = await response.json()
-                            if "result" in data:
-                                self.session_id = server_session_id or data["result"].get("sessionId", self.session_id)
-                                self._connected = True
-                                logger.success(f"✅ Connected via JSON - Session: {self.session_id}")
-                                
-                                # Update headers
-                                self.session.headers.update({
-                                    'mcp-session-id': self.session_id
-                                })
-                                
-                                await self.load_tools()
-                                return True
-                    
-                    elif response.status == 401:
-                        logger.error("❌ Authentication failed - check your Turkish Airlines MCP token")
-                        return False
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Initialize failed {response.status}: {error_text}")
-                        return False
-                        
             except Exception as e:
-                logger.error(f"❌ Initialize request failed: {e}")
+                logger.error(f"MCP connection error: {e}")
                 return False
+    
+    async def _initialize_slot(self, slot: MCPSessionSlot) -> bool:
+        """Run MCP initialize and store the server-issued session ID on the slot"""
+        # Step 1: Get session ID from server using initialize
+        init_payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {
+                    "tools": {},
+                    "logging": {}
+                },
+                "clientInfo": {
+                    "name": "turkish-airlines-client",
+                    "version": "1.0.0"
+                }
+            }
+        }
+        
+        session_id = None
+        try:
+            async with self.session.post(
+                self.server_url,
+                json=init_payload
+            ) as response:
+                logger.debug(f"Initialize response status: {response.status}")
+                logger.debug(f"Initialize response headers: {dict(response.headers)}")
+                
+                if response.status == 200:
+                    # Check for session ID in headers, then in the result
+                    session_id = response.headers.get('mcp-session-id')
+                    if not session_id:
+                        data = await read_jsonrpc_response(response, init_payload["id"])
+                        if data and "result" in data:
+                            session_id = data["result"].get("sessionId", slot.session_id or self.session_id)
+                
+                elif response.status == 401:
+                    logger.error("❌ Authentication failed - check your Turkish Airlines MCP token")
+                    return False
+                else:
+                    error_text = await response.text()
+                    logger.error(f"❌ Initialize failed {response.status}: {error_text}")
+                    return False
         
         except Exception as e:
-            logger.error(f"MCP connection error: {e}")
+            logger.error(f"❌ Initialize request failed: {e}")
+            return False
+        
+        if not session_id:
             return False
+        
+        slot.session_id = session_id
+        slot.generation += 1
+        slot.initialized_at = time.time()
+        if slot.index == 0:
+            self.session_id = session_id
+        logger.success(f"✅ Got session from server (slot {slot.index}): {session_id}")
+        return True
+    
+    async def _reinitialize_slot(self, slot: MCPSessionSlot, seen_generation: int) -> bool:
+        """Re-initialize an expired session once, even if many requests noticed it at the same time"""
+        async with slot.lock:
+            if slot.generation != seen_generation and slot.session_id:
+                return True
+            logger.warning(f"♻️ MCP session {slot.session_id} (slot {slot.index}) expired - re-initializing")
+            return await self._init_slot_with_backoff(slot)
+    
+    async def _init_slot_with_backoff(self, slot: MCPSessionSlot) -> bool:
+        """
+        Initialize a slot (caller holds slot.lock). A failed pooled slot drops its
+        session and is skipped by _acquire_slot until its backoff elapses, so a
+        failing server is not hit with an initialize round trip on every call.
+        """
+        if await self._initialize_slot(slot):
+            slot.init_failures = 0
+            slot.retry_at = 0.0
+            return True
+        slot.init_failures += 1
+        if slot.index > 0:
+            slot.session_id = None
+            delay = min(self.slot_retry_max, self.slot_retry_base * 2 ** (slot.init_failures - 1))
+            slot.retry_at = time.time() + delay
+            logger.warning(f"MCP slot {slot.index} initialize failed {slot.init_failures}x; skipping it for {delay:.0f}s")
+        return False
+    
+    async def _acquire_slot(self) -> MCPSessionSlot:
+        """Pick the least busy usable session slot, initializing pooled slots lazily"""
+        now = time.time()
+        usable = [s for s in self._slots if s.session_id is not None or s.retry_at <= now]
+        slot = min(usable, key=lambda s: s.in_flight) if usable else self._slots[0]
+        if slot.session_id is None:
+            async with slot.lock:
+                if slot.session_id is None and not await self._init_slot_with_backoff(slot):
+                    return self._slots[0]
+        return slot
+    
+    @staticmethod
+    async def _is_session_expired(response: aiohttp.ClientResponse) -> bool:
+        """404/401 (and 400 complaining about the session) mean the MCP session is gone"""
+        if response.status in (401, 404):
+            return True
+        if response.status == 400:
+            body = await response.text()
+            return "session" in body.lower()
+        return False
+    
+    @asynccontextmanager
+    async def _post(self, payload: Dict[str, Any], timeout: Optional[float] = None):
+        """
+        POST a JSON-RPC payload on a pooled MCP session.
+        An expired session is re-initialized and the request retried once.
+        """
+        if not self.session or self.session.closed:
+            self._connected = False
+            if not await self.connect():
+                raise Exception("Not connected to MCP server")
+        
+        slot = await self._acquire_slot()
+        slot.in_flight += 1
+        # No override: leave the kwarg out so the session's 30s total / 10s connect limits apply
+        # (timeout=None would mean ClientTimeout(total=None), i.e. no limit at all)
+        timeout_kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout, connect=10)} if timeout else {}
+        try:
+            for attempt in range(2):
+                seen_generation = slot.generation
+                headers = inject_headers({'mcp-session-id': slot.session_id} if slot.session_id else None)
+                response = await self.session.post(self.server_url, json=payload, headers=headers, **timeout_kwargs)
+                if attempt == 0 and await self._is_session_expired(response):
+                    try:
+                        reinitialized = await self._reinitialize_slot(slot, seen_generation)
+                    except BaseException:
+                        response.release()
+                        raise
+                    if reinitialized:
+                        response.release()
+                        continue
+                    # Could not re-initialize: surface the original 401/404 as is.
+                    # Never re-send the payload, tools/call is not idempotent.
+                try:
+                    yield response
+                finally:
+                    response.release()
+                return
+        finally:
+            slot.in_flight -= 1
     
     async def disconnect(self):
         """Disconnect from MCP server"""
+        await self.stop_background_refresh()
         if self.session:
             await self.session.close()
             self.session = None
+        for slot in self._slots:
+            slot.session_id = None
         self._connected = False
         logger.info("Disconnected from MCP server")
     
     async def load_tools(self) -> List[MCPTool]:
-        """Load available tools from MCP server"""
+        """
+        Return MCP tools, stale-while-revalidate: a stale list is returned at once
+        and refreshed in the background; only an empty cache waits for the server.
+        """
         if not self._connected:
             await self.connect()
         
-        # Cache tools for 5 minutes
-        now = time.time()
-        if self.tools_cache and (now - self.last_tools_fetch) < 300:
+        if self.tools_cache:
+            now = time.time()
+            if (now - self.last_tools_fetch) >= self.tools_ttl and now >= self._tools_retry_at:
+                self._schedule_tools_refresh()
             return self.tools_cache
         
+        await self._schedule_tools_refresh()
+        return self.tools_cache
+    
+    def _schedule_tools_refresh(self) -> asyncio.Task:
+        """Start a tools/list refresh unless one is already running (single flight)"""
+        if self._tools_refresh_task is None or self._tools_refresh_task.done():
+            self._tools_refresh_task = asyncio.create_task(self._refresh_tools())
+        return self._tools_refresh_task
+    
+    async def _tools_refresh_loop(self):
+        """Refresh tool metadata on a fixed schedule so requests never wait for tools/list"""
+        while True:
+            await asyncio.sleep(self.tools_ttl)
+            try:
+                if self._connected:
+                    await self._schedule_tools_refresh()
+            except Exception as e:
+                logger.warning(f"Background tools refresh failed: {e}")
+    
+    def start_background_refresh(self):
+        """Start the periodic tools/list refresher (idempotent)"""
+        if self._tools_refresher is None or self._tools_refresher.done():
+            self._tools_refresher = asyncio.create_task(self._tools_refresh_loop())
+            logger.info(f"🔄 MCP tools refresh every {self.tools_ttl:.0f}s in background")
+    
+    async def stop_background_refresh(self):
+        """Stop the periodic refresher and any in-flight refresh"""
+        for task in (self._tools_refresher, self._tools_refresh_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._tools_refresher = None
+        self._tools_refresh_task = None
+    
+    async def _refresh_tools(self) -> List[MCPTool]:
+        """Fetch tools/list and replace tools_cache"""
+        now = time.time()
+        # A failed refresh is not retried from the request path for 30s
+        self._tools_retry_at = now + 30
         try:
-            tools_payload = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "tools/list",
-                "params": {}
-            }
+            data = await self._request("tools/list", {})
+            logger.debug(f"Tools response: {data}")
             
-            async with self.session.post(
-                self.server_url,
-                json=tools_payload
-            ) as response:
-                logger.debug(f"Tools request status: {response.status}")
+            if "result" not in data:
+                logger.warning("No result in tools response")
+                return []
+            tools_data = data["result"].get("tools", [])
+            
+            if tools_data:
+                self.tools_cache = [
+                    MCPTool(
+                        name=tool["name"],
+                        description=tool.get("description", ""),
+                        input_schema=tool.get("inputSchema", {})
+                    )
+                    for tool in tools_data
+                ]
                 
-                if response.status == 200:
-                    content_type = response.headers.get('content-type', '').lower()
-                    
-                    if 'text/event-stream' in content_type:
-                        # Handle SSE response
-                        tools_data = []
-                        async for line in response.content:
-                            line = line.decode('utf-8').strip()
-                            if line.startswith('data: '):
-                                try:
-                                    data = json.loads(line[6:])
-                                    if "result" in data and "tools" in data["result"]:
-                                        tools_data = data["result"]["tools"]
-                                        break
-                                except json.JSONDecodeError:
-                                    continue
-                    else:
-                        # Handle JSON response
-                        data = await response.json()
-                        logger.debug(f"Tools response: {data}")
-                        
-                        if "result" in data:
-                            tools_data = data["result"].get("tools", [])
-                        else:
-                            logger.warning("No result in tools response")
-                            return []
-                    
-                    if tools_data:
-                        self.tools_cache = [
-                            MCPTool(
-                                name=tool["name"],
-                                description=tool.get("description", ""),
-                                input_schema=tool.get("inputSchema", {})
-                            )
-                            for tool in tools_data
-                        ]
-                        
-                        self.last_tools_fetch = now
-                        logger.success(f"✅ Loaded {len(self.tools_cache)} MCP tools")
-                        
-                        # Log first few tools for debugging
-                        for i, tool in enumerate(self.tools_cache[:5]):
-                            logger.debug(f"   {i+1}. {tool.name}: {tool.description}")
-                        
-                        return self.tools_cache
-                    else:
-                        logger.warning("No tools found in response")
-                else:
-                    error_text = await response.text()
-                    logger.warning(f"Tools request failed {response.status}: {error_text}")
+                self.last_tools_fetch = now
+                self.tools_version += 1
+                logger.success(f"✅ Loaded {len(self.tools_cache)} MCP tools")
+                
+                # Log first few tools for debugging
+                for i, tool in enumerate(self.tools_cache[:5]):
+                    logger.debug(f"   {i+1}. {tool.name}: {tool.description}")
+                
+                return self.tools_cache
+            else:
+                logger.warning("No tools found in response")
         
         except Exception as e:
             logger.error(f"Error loading tools: {e}")
         
         return []
     
+    def _tools_key(self) -> tuple:
+        return (self.tools_version, id(self.tools_cache), len(self.tools_cache))
+    
+    @property
+    def tools_by_name(self) -> Dict[str, MCPTool]:
+        """Name -> tool index; validators are compiled here, once per tools version"""
+        key = self._tools_key()
+        if key != self._tools_index_key:
+            index = {}
+            for tool in self.tools_cache:
+                tool.validator = compile_schema(tool.input_schema)
+                index[tool.name] = tool
+            self._tools_by_name = index
+            self._tools_index_key = key
+        return self._tools_by_name
+    
+    def get_tool(self, tool_name: str) -> Optional[MCPTool]:
+        """Look up a tool by name (O(1))"""
+        return self.tools_by_name.get(tool_name)
+    
     def get_tool_schema(self, tool_name: str) -> Dict[str, Any]:
         """Get the input schema for a specific tool"""
-        tool = next((t for t in self.tools_cache if t.name == tool_name), None)
+        tool = self.get_tool(tool_name)
         return tool.input_schema if tool else {}
     
+    def check_tool_args(self, tool_name: str, validated_args: Dict[str, Any]):
+        """Reject unknown tools and schema-invalid arguments before any network call (2.0 -> 2 for integer fields)"""
+        if not self.validate_args or not self.tools_cache:
+            return
+        tool = self.get_tool(tool_name)
+        if tool is None:
+            raise MCPValidationError(f"Unknown MCP tool: {tool_name}")
+        errors = tool.validate(validated_args)
+        if errors:
+            raise MCPValidationError(f"Invalid arguments for {tool_name}: {'; '.join(errors[:5])}")
+    
     async def print_tool_schema(self, tool_name: str):
         """Debug helper to print tool schema"""
         schema = self.get_tool_schema(tool_name)
         logger.info(f"Schema for {tool_name}: {json.dumps(schema, indent=2)}")
     
     def validate_tool_params(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate and potentially fix tool parameters based on common patterns"""
-        schema = self.get_tool_schema(tool_name)
+        """Validate and potentially fix tool parameters (see mcp_args.NORMALIZERS)"""
+        return normalize_arguments(tool_name, arguments)
+    
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Execute an MCP tool with retries, optional hedging and a circuit breaker"""
+        arguments = arguments or {}
         
-        # Airport code to country mapping for common airports
-        airport_country_map = {
-            'IST': 'TR', 'SAW': 'TR', 'ADB': 'TR', 'AYT': 'TR', 'ESB': 'TR',
-            'JFK': 'US', 'LAX': 'US', 'ORD': 'US', 'DFW': 'US', 'ATL': 'US',
-            'LHR': 'GB', 'LGW': 'GB', 'STN': 'GB', 'MAN': 'GB',
-            'CDG': 'FR', 'ORY': 'FR', 'NCE': 'FR',
-            'FRA': 'DE', 'MUC': 'DE', 'DUS': 'DE',
-            'FCO': 'IT', 'MXP': 'IT', 'VCE': 'IT',
-            'AMS': 'NL', 'MAD': 'ES', 'BCN': 'ES', 'ZUR': 'CH'
-        }
+        # Validate and fix parameters, then check them against the compiled schema.
+        # Done before the breaker: a locally rejected call must not use up the half-open trial.
+        validated_args = self.validate_tool_params(tool_name, arguments)
+        try:
+            self.check_tool_args(tool_name, validated_args)
+        except MCPValidationError as e:
+            logger.warning(f"⛔ Rejected {tool_name} locally: {e}")
+            raise MCPValidationError(f"Tool {tool_name} failed: {str(e)}") from e
         
-        # Apply transformations for specific tools
-        if tool_name == 'search_flights' and arguments:
-            # Transform to expected format based on error messages
-            new_args = {}
-            
-            # Handle trip type
-            new_args['tripType'] = arguments.get('tripType', 'one_way')
-            
-            # Handle origin destinations with all required fields
-            if 'origin' in arguments and 'destination' in arguments:
-                origin_code = arguments['origin']
-                destination_code = arguments['destination']
-                departure_date = arguments.get('departureDate', (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'))
-                
-                # Convert date to required DD-MM-YYYY HH:mm format using Turkey timezone
-                try:
-                    import pytz
-                    turkey_tz = pytz.timezone('Europe/Istanbul')
-                    
-                    if departure_date in ['bugün', 'today']:
-                        date_obj = datetime.now(turkey_tz)
-                    elif departure_date in ['yarın', 'tomorrow']:
-                        date_obj = datetime.now(turkey_tz) + timedelta(days=1)
-                    else:
-                        date_obj = datetime.strptime(departure_date, '%Y-%m-%d')
-                        # If no timezone info, assume Turkey time
-                        if date_obj.tzinfo is None:
-                            date_obj = turkey_tz.localize(date_obj)
-                    
-                    # Format as DD-MM-YYYY HH:mm
-                    formatted_date = date_obj.strftime('%d-%m-%Y') + ' 10:00'
-                    departure_datetime = {
-                        "departureDate": formatted_date,
-                        "departureTime": "10:00"  # Keep separate time field as well
-                    }
-                except Exception as e:
-                    logger.warning(f"Date parsing error: {e}, using default")
-                    import pytz
-                    turkey_tz = pytz.timezone('Europe/Istanbul')
-                    future_date = datetime.now(turkey_tz) + timedelta(days=1)
-                    formatted_date = future_date.strftime('%d-%m-%Y') + ' 10:00'
-                    departure_datetime = {
-                        "departureDate": formatted_date,
-                        "departureTime": "10:00"
-                    }
-                
-                new_args['originDestinations'] = [{
-                    'originAirportCode': origin_code,
-                    'originCountryCode': airport_country_map.get(origin_code, 'TR'),
-                    'destinationAirportCode': destination_code,
-                    'destinationCountryCode': airport_country_map.get(destination_code, 'TR'),
-                    'departureDateTime': departure_datetime
-                }]
-            elif 'originDestinations' in arguments:
-                new_args['originDestinations'] = arguments['originDestinations']
+        if not self.breaker.allow():
+            raise MCPCircuitOpenError(
+                f"Tool {tool_name} failed: MCP circuit open (retry in {self.breaker.retry_in():.0f}s)"
+            )
+        
+        # Every exit after allow() reports to the breaker; cancellation (e.g. a caller's
+        # wait_for timeout) and unexpected errors count as failures, so a half-open
+        # trial can never stay in flight forever
+        settled = False
+        try:
+            if not self._connected:
+                await self.connect()
             
-            # Handle passengers with correct format
-            if 'passengerCount' in arguments:
-                new_args['passengers'] = [{
-                    'passengerType': 'ADT',  # Adult passenger type
-                    'quantity': arguments['passengerCount']
-                }]
-            elif 'passengers' in arguments:
-                # Validate passenger format
-                passengers = arguments['passengers']
-                if isinstance(passengers, list) and len(passengers) > 0:
-                    # Fix passenger format if needed
-                    fixed_passengers = []
-                    for passenger in passengers:
-                        if isinstance(passenger, dict):
-                            if 'type' in passenger and 'count' in passenger:
-                                # Convert old format to new format
-                                passenger_type_map = {
-                                    'adult': 'ADT',
-                                    'child': 'CHD', 
-                                    'infant': 'INF',
-                                    'youth': 'YAD',
-                                    'senior': 'SRC',
-                                    'student': 'STD'
-                                }
-                                fixed_passengers.append({
-                                    'passengerType': passenger_type_map.get(passenger['type'], 'ADT'),
-                                    'quantity': passenger['count']
-                                })
-                            else:
-                                # Assume it's already in correct format
-                                fixed_passengers.append(passenger)
-                    new_args['passengers'] = fixed_passengers
-                else:
-                    new_args['passengers'] = [{'passengerType': 'ADT', 'quantity': 1}]
-            else:
-                new_args['passengers'] = [{'passengerType': 'ADT', 'quantity': 1}]
+            if not self._connected:
+                raise MCPTransientError("Not connected to MCP server")
             
-            # Copy other parameters
-            for key, value in arguments.items():
-                if key not in ['origin', 'destination', 'departureDate', 'passengerCount', 'tripType', 'originDestinations', 'passengers']:
-                    new_args[key] = value
-                    
-            return new_args
-        
-        elif tool_name == 'get_flight_status_by_number' and arguments:
-            new_args = {}
+            logger.info(f"🔧 Calling MCP tool: {tool_name}")
+            logger.debug(f"Original arguments: {arguments}")
+            logger.debug(f"Validated arguments: {validated_args}")
             
-            # Map flightNumber to flightNumberFull
-            if 'flightNumber' in arguments:
-                new_args['flightNumberFull'] = arguments['flightNumber']
-            elif 'flightNumberFull' in arguments:
-                new_args['flightNumberFull'] = arguments['flightNumberFull']
+            with track_upstream("mcp", tool_name) as timer:
+                hedge = self.hedge_delay > 0 and tool_name in HEDGEABLE_TOOLS
+                last_error: Optional[Exception] = None
+                for attempt in range(self.max_retries + 1):
+                    settled = False
+                    try:
+                        if hedge:
+                            result = await self._call_tool_hedged(tool_name, validated_args)
+                        else:
+                            result = await self._call_tool_once(tool_name, validated_args)
+                        self.breaker.record_success()
+                        settled = True
+                        return result
+                    except MCPTransientError as e:
+                        last_error = e
+                        self.breaker.record_failure()
+                        settled = True
+                        if attempt >= self.max_retries or not self.breaker.allow():
+                            break
+                        settled = False  # allow() may have handed us the half-open trial
+                        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+                        logger.warning(f"⏳ Tool {tool_name} transient failure ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                        await asyncio.sleep(delay)
+                    except MCPError as e:
+                        # The server answered: tool/protocol errors are not retried and keep the breaker closed
+                        self.breaker.record_success()
+                        settled = True
+                        timer.outcome = "tool_error"
+                        logger.error(f"❌ Error calling tool {tool_name}: {e}")
+                        raise type(e)(f"Tool {tool_name} failed: {str(e)}") from e
             
-            # Ensure future date
-            if 'flightDate' in arguments:
-                date_str = arguments['flightDate']
-                try:
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                    if date_obj.date() < datetime.now().date():
-                        new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-                        logger.warning(f"Updated past date to future: {new_args['flightDate']}")
-                    else:
-                        new_args['flightDate'] = date_str
-                except:
-                    new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-            else:
-                new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+                logger.error(f"❌ Error calling tool {tool_name}: {last_error}")
+                raise MCPTransientError(f"Tool {tool_name} failed: {str(last_error)}") from last_error
+        finally:
+            if not settled:
+                self.breaker.record_failure()
+    
+    async def _call_tool_hedged(self, tool_name: str, validated_args: Dict[str, Any]) -> Dict[str, Any]:
+        """Start a second identical request if the first is slow; the first success wins"""
+        primary = asyncio.create_task(self._call_tool_once(tool_name, validated_args))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        # The finally also covers the first wait: a caller cancelled before the hedge
+        # starts must not leave the primary request (and its pool slot) running
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay)
+            if done:
+                return primary.result()
             
-            # Copy other parameters
-            for key, value in arguments.items():
-                if key not in ['flightNumber', 'flightDate']:
-                    new_args[key] = value
-                    
-            return new_args
+            logger.debug(f"Hedging {tool_name} after {self.hedge_delay:.2f}s")
+            pending.add(asyncio.create_task(self._call_tool_once(tool_name, validated_args)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _new_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a JSON-RPC request with a fresh id"""
+        return {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+    
+    async def _request(self, method: str, params: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send one JSON-RPC request and return its response message"""
+        return (await self._send([self._new_request(method, params)], timeout=timeout))[0]
+    
+    async def _send(self, payloads: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        POST one request, or several as a JSON-RPC batch, and return the response
+        messages in request order. Responses are routed to waiting futures by id,
+        so out-of-order or interleaved SSE events are matched correctly.
+        """
+        loop = asyncio.get_running_loop()
+        futures: Dict[int, asyncio.Future] = {}
+        for payload in payloads:
+            futures[payload["id"]] = self._pending[payload["id"]] = loop.create_future()
         
-        elif tool_name == 'get_flight_status_by_route' and arguments:
-            new_args = {}
-            
-            # Map origin/destination to fromAirport/toAirport
-            if 'origin' in arguments:
-                new_args['fromAirport'] = arguments['origin']
-            elif 'fromAirport' in arguments:
-                new_args['fromAirport'] = arguments['fromAirport']
+        try:
+            body = payloads[0] if len(payloads) == 1 else payloads
+            async with self._post(body, timeout=timeout) as response:
+                logger.debug(f"MCP {len(payloads)} request(s) status: {response.status}")
                 
-            if 'destination' in arguments:
-                new_args['toAirport'] = arguments['destination']
-            elif 'toAirport' in arguments:
-                new_args['toAirport'] = arguments['toAirport']
-            
-            # Ensure future date
-            if 'flightDate' in arguments:
-                date_str = arguments['flightDate']
-                try:
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                    if date_obj.date() < datetime.now().date():
-                        new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-                        logger.warning(f"Updated past date to future: {new_args['flightDate']}")
-                    else:
-                        new_args['flightDate'] = date_str
-                except:
-                    new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-            else:
-                new_args['flightDate'] = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"❌ MCP request failed {response.status}: {error_text}")
+                    if response.status >= 500 or response.status == 429:
+                        raise MCPTransientError(f"Tool execution failed: {response.status}")
+                    raise MCPError(f"Tool execution failed: {response.status}")
+                
+                remaining = len(futures)
+                async for message in iter_jsonrpc_messages(response):
+                    if message.get("id") is None and "error" in message:
+                        # Error not tied to a request, e.g. a rejected batch or parse error
+                        raise MCPError(f"JSON-RPC error: {(message['error'] or {}).get('message', 'Unknown error')}")
+                    future = self._pending.get(message.get("id"))
+                    if future is None or future.done():
+                        continue
+                    future.set_result(message)
+                    if message.get("id") in futures:
+                        remaining -= 1
+                        if remaining == 0:
+                            break
             
-            # Copy other parameters
-            for key, value in arguments.items():
-                if key not in ['origin', 'destination', 'flightDate']:
-                    new_args[key] = value
-                    
-            return new_args
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(MCPTransientError("No result in MCP response"))
+            return [futures[payload["id"]].result() for payload in payloads]
         
-        # Return original arguments if no transformation needed
-        return arguments
+        except MCPError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise MCPTransientError(f"{type(e).__name__}: {e}") from e
+        finally:
+            for request_id, future in futures.items():
+                self._pending.pop(request_id, None)
+                if not future.done():
+                    future.cancel()
     
-    async def call_tool(self, tool_name: str, arguments: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Execute an MCP tool"""
-        if not self._connected:
-            await self.connect()
-        
-        if not self._connected:
-            raise Exception("Not connected to MCP server")
+    @staticmethod
+    def _tool_result(tool_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Unwrap a tools/call response message or raise MCPToolError"""
+        if "result" in data:
+            logger.success(f"✅ Tool {tool_name} executed successfully")
+            return data["result"]
+        error_msg = (data.get("error") or {}).get("message", "Unknown error")
+        logger.error(f"❌ MCP tool error: {error_msg}")
+        raise MCPToolError(f"MCP tool error: {error_msg}")
+    
+    async def _call_tool_once(self, tool_name: str, validated_args: Dict[str, Any]) -> Dict[str, Any]:
+        """Single tools/call round-trip; raises MCPTransientError for retryable failures"""
+        data = await self._request(
+            "tools/call",
+            {"name": tool_name, "arguments": validated_args},
+            timeout=self.call_timeout
+        )
+        return self._tool_result(tool_name, data)
+    
+    async def call_tools_batch(self, calls: List[tuple]) -> List[Any]:
+        """
+        Execute several (tool_name, arguments) calls, in one HTTP POST as a JSON-RPC
+        batch when the server supports it, otherwise concurrently.
+        Returns results in call order; failed calls are returned as exceptions.
+        """
+        if len(calls) < 2 or self.batch_supported is False:
+            return await self._call_tools_concurrently(calls)
         
-        arguments = arguments or {}
+        # Invalid calls are answered locally (before the breaker); the rest share one batch
+        results: List[Any] = [None] * len(calls)
+        payloads, positions = [], []
+        for i, (name, args) in enumerate(calls):
+            validated_args = self.validate_tool_params(name, args or {})
+            try:
+                self.check_tool_args(name, validated_args)
+            except MCPValidationError as e:
+                results[i] = MCPValidationError(f"Tool {name} failed: {str(e)}")
+                continue
+            payloads.append(self._new_request("tools/call", {"name": name, "arguments": validated_args}))
+            positions.append(i)
+        if not payloads:
+            return results
         
-        # Validate and fix parameters
-        validated_args = self.validate_tool_params(tool_name, arguments)
+        if not self.breaker.allow():
+            error = MCPCircuitOpenError(f"MCP circuit open (retry in {self.breaker.retry_in():.0f}s)")
+            return [results[i] or error for i in range(len(calls))]
         
-        logger.info(f"🔧 Calling MCP tool: {tool_name}")
-        logger.debug(f"Original arguments: {arguments}")
-        logger.debug(f"Validated arguments: {validated_args}")
+        logger.info(f"🔧 Calling {len(payloads)} MCP tools in one batch: {[calls[i][0] for i in positions]}")
         
+        # As in call_tool: any exit that is not reported below (cancellation,
+        # "Not connected", unexpected errors) counts as a failure
+        settled = False
         try:
-            tool_payload = {
-                "jsonrpc": "2.0",
-                "id": int(time.time()),
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": validated_args
-                }
-            }
-            
-            async with self.session.post(
-                self.server_url,
-                json=tool_payload
-            ) as response:
-                logger.debug(f"Tool call status: {response.status}")
-                
-                if response.status == 200:
-                    content_type = response.headers.get('content-type', '').lower()
-                    
-                    if 'text/event-stream' in content_type:
-                        # Handle SSE response
-                        async for line in response.content:
-                            line = line.decode('utf-8').strip()
-                            if line.startswith('data: '):
-                                try:
-                                    data = json.loads(line[6:])
-                                    if "result" in data:
-                                        result = data["result"]
-                                        logger.success(f"✅ Tool {tool_name} executed successfully")
-                                        return result
-                                    elif "error" in data:
-                                        error_msg = data["error"].get("message", "Unknown error")
-                                        logger.error(f"❌ MCP tool error: {error_msg}")
-                                        raise Exception(f"MCP tool error: {error_msg}")
-                                    break
-                                except json.JSONDecodeError:
-                                    continue
-                    else:
-                        # Handle JSON response
-                        data = await response.json()
-                        logger.debug(f"Tool response: {data}")
-                        
-                        if "result" in data:
-                            result = data["result"]
-                            logger.success(f"✅ Tool {tool_name} executed successfully")
-                            return result
-                        elif "error" in data:
-                            error_msg = data["error"].get("message", "Unknown error")
-                            logger.error(f"❌ MCP tool error: {error_msg}")
-                            raise Exception(f"MCP tool error: {error_msg}")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ Tool execution failed {response.status}: {error_text}")
-                    raise Exception(f"Tool execution failed: {response.status}")
+            if not self._connected:
+                await self.connect()
+            with track_upstream("mcp", "batch"):
+                messages = await self._send(payloads, timeout=self.call_timeout)
+            self.breaker.record_success()
+            settled = True
+        except MCPTransientError as e:
+            self.breaker.record_failure()
+            settled = True
+            logger.warning(f"MCP batch failed ({e}); falling back to individual calls")
+            return await self._call_tools_concurrently(calls)
+        except MCPError as e:
+            # 4xx on an array body: the server does not accept batches
+            self.breaker.record_success()
+            settled = True
+            self.batch_supported = False
+            logger.info(f"MCP server rejected JSON-RPC batch ({e}); using concurrent calls")
+            return await self._call_tools_concurrently(calls)
+        finally:
+            if not settled:
+                self.breaker.record_failure()
         
-        except Exception as e:
-            logger.error(f"❌ Error calling tool {tool_name}: {e}")
-            raise Exception(f"Tool {tool_name} failed: {str(e)}")
-    
-    def get_openai_tools(self) -> List[Dict[str, Any]]:
-        """Convert MCP tools to OpenAI tools format"""
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.input_schema
+        self.batch_supported = True
+        for i, message in zip(positions, messages):
+            name = calls[i][0]
+            try:
+                results[i] = self._tool_result(name, message)
+            except MCPError as e:
+                results[i] = type(e)(f"Tool {name} failed: {str(e)}")
+        return results
+    
+    async def _call_tools_concurrently(self, calls: List[tuple]) -> List[Any]:
+        """Concurrent individual calls (with retries) for the given (tool_name, arguments) list"""
+        return await asyncio.gather(
+            *(self.call_tool(name, args) for name, args in calls),
+            return_exceptions=True
+        )
+    
+    def get_openai_tools(self, names: Optional[FrozenSet[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Convert MCP tools to OpenAI tools format.
+        Specs are rebuilt only when tools_cache changes; `names` selects a cached subset.
+        """
+        key = self._tools_key()
+        if key != self._openai_tools_key:
+            self._openai_tools = [
+                {
+                    "type": "function",
+                    "function": {
+                        "name": tool.name,
+                        "description": tool.description,
+                        "parameters": tool.input_schema
+                    }
                 }
-            }
-            for tool in self.tools_cache
-        ]
+                for tool in self.tools_cache
+            ]
+            self._openai_tool_subsets = {}
+            self._openai_tools_key = key
+        
+        if not names:
+            return self._openai_tools
+        
+        subset = self._openai_tool_subsets.get(names)
+        if subset is None:
+            subset = [spec for spec in self._openai_tools if spec["function"]["name"] in names]
+            # Unknown names only: fall back to the full list rather than no tools
+            if not subset:
+                subset = self._openai_tools
+            self._openai_tool_subsets[names] = subset
+        return subset
     
     async def health_check(self) -> Dict[str, Any]:
-        """Check MCP server health"""
+        """Check MCP server health, including circuit breaker state"""
+        if self.breaker.state == "open":
+            health = {
+                "status": "circuit_open",
+                "connected": self._connected,
+                "tools_count": len(self.tools_cache),
+                "ssl_verified": self.verify_ssl,
+                "error": "MCP circuit breaker open - calls are failing fast"
+            }
+        else:
+            health = await self._probe_health()
+        health["circuit_breaker"] = self.breaker.snapshot()
+        return health
+    
+    async def _probe_health(self) -> Dict[str, Any]:
+        """Connect if needed and ping the server"""
         try:
             if not self._connected:
                 await self.connect()
@@ -615,7 +1009,7 @@ class TurkishAirlinesMCPClient:
             
             # Try to ping the server if ping tool is available
             start_time = time.time()
-            ping_available = any(tool.name == "ping" for tool in self.tools_cache)
+            ping_available = self.get_tool("ping") is not None
             
             if ping_available:
                 try:
@@ -662,6 +1056,7 @@ class TurkishAirlinesMCPClient:
 
 # Global MCP client instance
 _mcp_client: Optional[TurkishAirlinesMCPClient] = None
+_mcp_client_lock = asyncio.Lock()
 
 
 async def get_mcp_client() -> TurkishAirlinesMCPClient:
@@ -669,8 +1064,11 @@ async def get_mcp_client() -> TurkishAirlinesMCPClient:
     global _mcp_client
     
     if _mcp_client is None:
-        _mcp_client = TurkishAirlinesMCPClient()
-        await _mcp_client.connect()
+        async with _mcp_client_lock:
+            if _mcp_client is None:
+                client = TurkishAirlinesMCPClient()
+                await client.connect()
+                _mcp_client = client
     
     return _mcp_client
 
@@ -692,11 +1090,17 @@ async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any] = None) -> Dic
     return await client.call_tool(tool_name, arguments)
 
 
-async def get_mcp_tools() -> List[Dict[str, Any]]:
-    """Get MCP tools in OpenAI format (convenience function)"""
+async def call_mcp_tools(calls: List[tuple]) -> List[Any]:
+    """Execute several (tool_name, arguments) calls at once; failures come back as exceptions (convenience function)"""
+    client = await ensure_mcp_connection()
+    return await client.call_tools_batch(calls)
+
+
+async def get_mcp_tools(names: Optional[FrozenSet[str]] = None) -> List[Dict[str, Any]]:
+    """Get MCP tools in OpenAI format, optionally only the named subset (convenience function)"""
     client = await ensure_mcp_connection()
     await client.load_tools()
-    return client.get_openai_tools()
+    return client.get_openai_tools(names)
 
 
 async def mcp_health_check() -> Dict[str, Any]:
@@ -0,0 +1,208 @@
+"""
+Compiled JSON-schema validators for MCP tool arguments
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+
+# A compiled validator returns a list of error messages (empty = valid).
+# Integral floats (2.0) under an "integer" property or item are coerced to int in place.
+Validator = Callable[[Any], List[str]]
+
+
+def _integral_float(v: Any) -> bool:
+    """LLM tool arguments often carry integers as 2.0"""
+    return isinstance(v, float) and v.is_integer()
+
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool)) or _integral_float(v),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "null": lambda v: v is None,
+}
+
+
+def _always_valid(value: Any, path: str = "") -> List[str]:
+    return []
+
+
+# Patterns Python's re cannot compile, already logged once
+_BAD_PATTERNS: Set[str] = set()
+
+
+def _compile_pattern(pattern: Any) -> Optional[re.Pattern]:
+    """
+    JSON-schema patterns are ECMA-262 regexes; the ones Python does not accept
+    (\\p{L}, (?<name>...), ...) are skipped instead of failing the whole schema.
+    """
+    if not isinstance(pattern, str):
+        return None
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        if pattern not in _BAD_PATTERNS:
+            _BAD_PATTERNS.add(pattern)
+            logger.warning(f"⚠️ Skipping unsupported schema pattern {pattern!r}: {e}")
+        return None
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """
+    Compile the JSON-schema subset MCP servers publish into a validator.
+
+    Supported: type, enum, const, required, properties, additionalProperties,
+    items, min/maxLength, pattern, minimum/maximum, min/maxItems, anyOf/oneOf.
+    Unknown keywords are ignored so an unfamiliar schema never blocks a call.
+    """
+    check = _compile(schema or {})
+    return lambda value: check(value, "")
+
+
+def _wants_int(schema: Any) -> bool:
+    """True when the schema admits integers but not other numbers"""
+    if not isinstance(schema, dict):
+        return False
+    types = schema.get("type")
+    type_list = [types] if isinstance(types, str) else list(types or [])
+    return "integer" in type_list and "number" not in type_list
+
+
+def _compile(schema: Dict[str, Any]):
+    if not isinstance(schema, dict) or not schema:
+        return _always_valid
+
+    checks: List[Callable[[Any, str], List[str]]] = []
+
+    types = schema.get("type")
+    if types:
+        type_list = [types] if isinstance(types, str) else list(types)
+        type_fns = [_TYPE_CHECKS[t] for t in type_list if t in _TYPE_CHECKS]
+        if type_fns:
+            expected = "/".join(type_list)
+
+            def check_type(v, path, type_fns=type_fns, expected=expected):
+                if any(fn(v) for fn in type_fns):
+                    return []
+                return [f"{path or 'arguments'}: expected {expected}, got {type(v).__name__}"]
+            checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(v, path, allowed=allowed):
+            return [] if v in allowed else [f"{path or 'arguments'}: {v!r} not in {allowed}"]
+        checks.append(check_enum)
+
+    if "const" in schema:
+        const = schema["const"]
+        checks.append(lambda v, path, const=const: [] if v == const else [f"{path or 'arguments'}: must be {const!r}"])
+
+    for key in ("anyOf", "oneOf"):
+        if isinstance(schema.get(key), list):
+            options = [_compile(s) for s in schema[key]]
+
+            def check_any(v, path, options=options, key=key):
+                if any(not opt(v, path) for opt in options):
+                    return []
+                return [f"{path or 'arguments'}: does not match {key}"]
+            checks.append(check_any)
+
+    # strings
+    min_len, max_len = schema.get("minLength"), schema.get("maxLength")
+    pattern = _compile_pattern(schema.get("pattern"))
+    if min_len is not None or max_len is not None or pattern:
+        def check_string(v, path, min_len=min_len, max_len=max_len, pattern=pattern):
+            if not isinstance(v, str):
+                return []
+            if min_len is not None and len(v) < min_len:
+                return [f"{path}: shorter than {min_len}"]
+            if max_len is not None and len(v) > max_len:
+                return [f"{path}: longer than {max_len}"]
+            if pattern and not pattern.search(v):
+                return [f"{path}: does not match {pattern.pattern}"]
+            return []
+        checks.append(check_string)
+
+    # numbers
+    minimum, maximum = schema.get("minimum"), schema.get("maximum")
+    if minimum is not None or maximum is not None:
+        def check_range(v, path, minimum=minimum, maximum=maximum):
+            if not isinstance(v, (int, float)) or isinstance(v, bool):
+                return []
+            if minimum is not None and v < minimum:
+                return [f"{path}: below minimum {minimum}"]
+            if maximum is not None and v > maximum:
+                return [f"{path}: above maximum {maximum}"]
+            return []
+        checks.append(check_range)
+
+    # objects
+    properties = schema.get("properties") or {}
+    required = list(schema.get("required") or [])
+    additional = schema.get("additionalProperties", True)
+    if properties or required or additional is not True:
+        prop_checks = {name: _compile(sub) for name, sub in properties.items()}
+        int_props = {name for name, sub in properties.items() if _wants_int(sub)}
+        extra_check = _compile(additional) if isinstance(additional, dict) else None
+
+        def check_object(v, path, prop_checks=prop_checks, required=required,
+                         additional=additional, extra_check=extra_check, int_props=int_props):
+            if not isinstance(v, dict):
+                return []
+            errors = [f"{path}.{name}: required" if path else f"{name}: required"
+                      for name in required if name not in v]
+            for key, item in list(v.items()):
+                sub_path = f"{path}.{key}" if path else key
+                if key in int_props and _integral_float(item):
+                    v[key] = item = int(item)
+                sub = prop_checks.get(key)
+                if sub is not None:
+                    errors.extend(sub(item, sub_path))
+                elif additional is False:
+                    errors.append(f"{sub_path}: unexpected property")
+                elif extra_check is not None:
+                    errors.extend(extra_check(item, sub_path))
+            return errors
+        checks.append(check_object)
+
+    # arrays
+    items = schema.get("items")
+    min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+    if isinstance(items, dict) or min_items is not None or max_items is not None:
+        item_check = _compile(items) if isinstance(items, dict) else None
+        int_items = _wants_int(items)
+
+        def check_array(v, path, item_check=item_check, min_items=min_items, max_items=max_items,
+                        int_items=int_items):
+            if not isinstance(v, list):
+                return []
+            errors = []
+            if min_items is not None and len(v) < min_items:
+                errors.append(f"{path}: fewer than {min_items} items")
+            if max_items is not None and len(v) > max_items:
+                errors.append(f"{path}: more than {max_items} items")
+            if item_check is not None:
+                for i, item in enumerate(v):
+                    if int_items and _integral_float(item):
+                        v[i] = item = int(item)
+                    errors.extend(item_check(item, f"{path}[{i}]"))
+            return errors
+        checks.append(check_array)
+
+    if not checks:
+        return _always_valid
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(v, path, checks=checks):
+        errors = []
+        for c in checks:
+            errors.extend(c(v, path))
+        return errors
+    return check_all
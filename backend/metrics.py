@@ -0,0 +1,281 @@
+# metrics.py
+"""
+In-process metrics exposed at /metrics in the Prometheus text format
+
+Counters, gauges and histograms with labels, plus helpers to time upstream
+calls (Mapbox, OpenAI, Gemini, MCP) and handler stages (/plan, /gen/generate).
+No client library needed; values live in memory per worker process.
+The stage/upstream timers also open a tracing span (see tracing.py).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from tracing import start_span
+
+# Seconds; covers in-process work (ms) up to slow image generation (minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; can also be computed at scrape time via set_function"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: List[Callable[[], Dict[LabelValues, float]]] = []
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], Dict[LabelValues, float]]):
+        """fn() -> {label values tuple: value}, evaluated on every scrape"""
+        self._functions.append(fn)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        for fn in self._functions:
+            try:
+                values.update(fn())
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (seconds unless stated otherwise)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(k, list(counts), total[0]) for k, (counts, total) in self._series.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ---------------------------------------------------------------- HTTP
+HTTP_REQUESTS = registry.counter(
+    "yolyap_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram(
+    "yolyap_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"))
+HTTP_IN_FLIGHT = registry.gauge(
+    "yolyap_http_requests_in_flight", "Requests currently being handled")
+
+# ---------------------------------------------------------------- upstreams
+UPSTREAM_LATENCY = registry.histogram(
+    "yolyap_upstream_request_duration_seconds",
+    "Outbound call latency (service: mapbox|openai|gemini|mcp)", ("service", "operation", "outcome"))
+UPSTREAM_IN_FLIGHT = registry.gauge(
+    "yolyap_upstream_requests_in_flight", "Outbound calls currently waiting", ("service",))
+
+# ---------------------------------------------------------------- handler stages
+STAGE_LATENCY = registry.histogram(
+    "yolyap_stage_duration_seconds", "Time spent in each stage of a handler", ("handler", "stage"))
+
+# ---------------------------------------------------------------- caches
+CACHE_REQUESTS = registry.counter(
+    "yolyap_cache_requests_total", "Cache lookups by result (hit|miss)", ("cache", "result"))
+CACHE_HIT_RATIO = registry.gauge(
+    "yolyap_cache_hit_ratio", "Hits / lookups since start", ("cache",))
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    with CACHE_REQUESTS._lock:
+        items = list(CACHE_REQUESTS._values.items())
+    hits: Dict[str, float] = {}
+    totals: Dict[str, float] = {}
+    for (cache, result), value in items:
+        totals[cache] = totals.get(cache, 0.0) + value
+        if result == "hit":
+            hits[cache] = hits.get(cache, 0.0) + value
+    return {(cache,): hits.get(cache, 0.0) / total for cache, total in totals.items() if total}
+
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratios)
+
+
+class _Timer:
+    """Handed out by the context managers below; set .outcome to label the result"""
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = "ok"
+
+    def status(self, status_code: int):
+        """Label an HTTP response: ok for 2xx, http_<code> otherwise"""
+        self.outcome = "ok" if 200 <= status_code < 300 else f"http_{status_code}"
+
+
+@contextmanager
+def track_upstream(service: str, operation: str):
+    """Time an outbound call; exceptions are recorded as outcome=error"""
+    timer = _Timer()
+    UPSTREAM_IN_FLIGHT.inc(service=service)
+    start = time.perf_counter()
+    with start_span(f"{service} {operation}", service=service, operation=operation) as span:
+        try:
+            yield timer
+        except BaseException:
+            if timer.outcome == "ok":
+                timer.outcome = "error"
+            raise
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, service=service, operation=operation,
+                                     outcome=timer.outcome)
+            UPSTREAM_IN_FLIGHT.dec(service=service)
+            if span is not None:
+                span.set_attribute("outcome", timer.outcome)
+                if timer.outcome != "ok":
+                    span.status = "error"
+
+
+@contextmanager
+def track_stage(handler: str, stage: str):
+    """Time one stage of a handler (e.g. /plan matrix, seed, refine, directions)"""
+    start = time.perf_counter()
+    with start_span(f"{handler}.{stage}", handler=handler, stage=stage):
+        try:
+            yield
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - start, handler=handler, stage=stage)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render_latest() -> str:
+    return registry.render()
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,92 @@
+# prewarm_avatars.py
+"""
+Pre-generate /gen/generate avatars for common persona combinations
+
+    python prewarm_avatars.py [--max-size 2] [--from-store 20] [--concurrency 2] [--dry-run]
+
+Combinations: every single persona and ordered pair (order matters, the first
+selection picks palette and shape) up to --max-size, plus the N most common
+selections saved in persona_data.json. Each one is filled up to
+AVATAR_CACHE_VARIANTS images; combinations already in the cache are skipped,
+so the script can be re-run after an interrupted or partial pass.
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from contextlib import nullcontext
+from itertools import permutations
+
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+from api.gen.routes import (_ALLOWED, _avatar_cache_key, _avatar_creator, _avatar_style_prompt,  # noqa: E402
+                            _load, _openai_caption_line, avatar_cache, make_tagline, normalize)
+
+
+def combinations(max_size: int, from_store: int) -> list:
+    combos = [[]]
+    for size in range(1, max_size + 1):
+        combos += [list(p) for p in permutations(sorted(_ALLOWED), size)]
+    if from_store > 0:
+        counts = Counter(tuple(normalize(rec.get("selections") or [])) for rec in _load().values())
+        combos += [list(sel) for sel, _ in counts.most_common(from_store)]
+    seen, out = set(), []
+    for combo in combos:
+        if tuple(combo) not in seen:
+            seen.add(tuple(combo))
+            out.append(combo)
+    return out
+
+
+async def prewarm_one(selections: list, sem: asyncio.Semaphore) -> int:
+    style_suffix = _avatar_style_prompt(selections)
+    key = _avatar_cache_key(selections, style_suffix)
+    made = 0
+    while await avatar_cache.missing_variants(key):
+        async with sem:
+            try:
+                text = await _openai_caption_line(make_tagline(selections), selections)
+            except Exception as e:
+                logger.warning(f"[prewarm] caption failed for {selections}: {str(e)[:120]}")
+                text = {}
+            avatar_prompt = text.get("avatar_prompt") or \
+                f"travel persona icon for: {', '.join(selections) or 'general traveler'}"
+            create = _avatar_creator(f"{avatar_prompt}. {style_suffix}", lambda _: nullcontext())
+            path, _ = await avatar_cache.get_or_create(key, create)
+        made += 1
+        logger.info(f"🖼️ {','.join(selections) or '-'} -> {path}")
+    return made
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-size", type=int, default=2, help="longest selection list to enumerate")
+    parser.add_argument("--from-store", type=int, default=20, help="most common saved selections to add")
+    parser.add_argument("--concurrency", type=int, default=2, help="parallel image generations")
+    parser.add_argument("--dry-run", action="store_true", help="only list the combinations still missing")
+    args = parser.parse_args()
+
+    combos = combinations(args.max_size, args.from_store)
+    todo = [c for c in combos if await avatar_cache.missing_variants(_avatar_cache_key(c, _avatar_style_prompt(c)))]
+    logger.info(f"🚀 {len(combos)} combinations, {len(todo)} need images "
+                f"({avatar_cache.variants} variant(s) each)")
+    if args.dry_run:
+        for combo in todo:
+            print(",".join(combo) or "-")
+        return 0
+
+    sem = asyncio.Semaphore(max(1, args.concurrency))
+    results = await asyncio.gather(*(prewarm_one(c, sem) for c in todo), return_exceptions=True)
+    failed = [(c, r) for c, r in zip(todo, results) if isinstance(r, Exception)]
+    for combo, err in failed:
+        logger.error(f"❌ {','.join(combo) or '-'}: {str(err)[:180]}")
+    made = sum(r for r in results if not isinstance(r, Exception))
+    logger.info(f"✅ Generated {made} avatars, {len(failed)} combinations failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,65 @@
+# backend/tests/test_avatar_cache.py
+import asyncio
+
+from api.gen.avatar_cache import AvatarCache
+
+
+def test_waiter_takes_over_when_the_owner_is_cancelled(tmp_path):
+    async def run():
+        cache = AvatarCache(tmp_path, variants=1)
+        started = asyncio.Event()
+
+        async def slow(stem):
+            started.set()
+            await asyncio.sleep(3600)
+
+        async def quick(stem):
+            (tmp_path / f"{stem}.png").write_bytes(b"png")
+            return f"/gen/image/{stem}.png"
+
+        owner = asyncio.create_task(cache.get_or_create("k" * 32, slow))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_create("k" * 32, quick))
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        url, hit = await waiter
+        assert url == f"/gen/image/av-{'k' * 32}-0.png" and hit is False
+        assert owner.cancelled()
+        assert cache.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_index_is_authoritative_after_the_first_listing(tmp_path, monkeypatch):
+    import api.gen.avatar_cache as avatar_module
+
+    key = "0" * 32
+    (tmp_path / f"av-{key}-0.png").write_bytes(b"png")
+    scans = []
+    real_to_thread = asyncio.to_thread
+
+    async def spy(fn, *args):
+        scans.append(args)
+        return await real_to_thread(fn, *args)
+
+    monkeypatch.setattr(avatar_module.asyncio, "to_thread", spy)
+
+    async def run():
+        cache = AvatarCache(tmp_path, variants=1)
+
+        async def never(stem):
+            raise AssertionError("cached avatar must not be regenerated")
+
+        for _ in range(3):
+            assert await cache.get_or_create(key, never) == (f"/gen/image/av-{key}-0.png", True)
+        assert await cache.peek(key) == f"/gen/image/av-{key}-0.png"
+        assert scans == [("av-*",)]
+
+        # A file deleted behind our back is forgotten once serving it 404s
+        (tmp_path / f"av-{key}-0.png").unlink()
+        assert cache.forget(f"av-{key}-0.png")
+        assert await cache.peek(key) is None
+        assert scans[-1] == (f"av-{key}-*",)
+
+    asyncio.run(run())
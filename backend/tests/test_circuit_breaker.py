@@ -0,0 +1,90 @@
+# backend/tests/test_circuit_breaker.py
+import asyncio
+
+import pytest
+
+from mcp_client import MCPTool, MCPValidationError, TurkishAirlinesMCPClient
+
+
+def _half_open_client() -> TurkishAirlinesMCPClient:
+    client = TurkishAirlinesMCPClient(server_url="http://127.0.0.1:1/mcp", auth_token="test")
+    client._connected = True
+    client.max_retries = 0
+    breaker = client.breaker
+    breaker.state = "open"
+    breaker.opened_at = 0.0  # reset_timeout long past: next allow() is the half-open trial
+    return client
+
+
+def test_cancelled_half_open_trial_is_released():
+    async def run():
+        client = _half_open_client()
+
+        async def hang(tool_name, args):
+            await asyncio.sleep(3600)
+
+        client._call_tool_once = hang
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.call_tool("ping"), timeout=0.05)
+
+        # The cancelled trial counts as a failure: open again, not stuck in half-open
+        assert client.breaker.state == "open"
+        assert client.breaker._trial_in_flight is False
+        client.breaker.opened_at = 0.0
+        assert client.breaker.allow() is True
+
+    asyncio.run(run())
+
+
+def test_local_validation_error_does_not_take_the_trial():
+    async def run():
+        client = _half_open_client()
+        client.tools_cache = [MCPTool("ping", "", {"type": "object", "required": ["x"]})]
+
+        with pytest.raises(MCPValidationError):
+            await client.call_tool("ping", {})
+
+        assert client.breaker._trial_in_flight is False
+        assert client.breaker.allow() is True
+
+    asyncio.run(run())
+
+
+def test_unexpected_error_closes_the_trial_as_failure():
+    async def run():
+        client = _half_open_client()
+
+        async def boom(tool_name, args):
+            raise Exception("Not connected to MCP server")
+
+        client._call_tool_once = boom
+        with pytest.raises(Exception, match="Not connected"):
+            await client.call_tool("ping")
+
+        assert client.breaker.state == "open"
+        assert client.breaker._trial_in_flight is False
+
+    asyncio.run(run())
+
+
+def test_cancelled_hedged_call_cancels_the_primary():
+    async def run():
+        client = _half_open_client()
+        client.hedge_delay = 10
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def hang(tool_name, args):
+            started.set()
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        client._call_tool_once = hang
+        call = asyncio.create_task(client._call_tool_hedged("ping", {}))
+        await started.wait()
+        call.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    asyncio.run(run())
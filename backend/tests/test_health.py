@@ -0,0 +1,53 @@
+# backend/tests/test_health.py
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import health
+import main
+
+
+async def _healthy():
+    return {"status": "healthy"}
+
+
+async def _down():
+    raise ConnectionError("connection refused")
+
+
+def _prober(mcp_check) -> health.HealthProber:
+    prober = health.HealthProber(interval=30, timeout=1)
+    prober.register("mcp", mcp_check)
+    prober.register("openai", _healthy)
+    asyncio.run(prober.probe_all())
+    return prober
+
+
+def test_mcp_is_critical_by_default():
+    assert "mcp" in health.HEALTH_CRITICAL
+    assert health.HealthProber().critical == health.HEALTH_CRITICAL
+
+
+def test_unprobed_critical_component_is_not_ready():
+    prober = health.HealthProber(critical={"mcp"})
+    prober.register("mcp", _healthy)
+    ready = prober.ready()
+    assert ready["ready"] is False
+    assert ready["failing"] == ["mcp"]
+
+
+def test_ready_endpoint_returns_503_when_critical_probe_fails(monkeypatch):
+    monkeypatch.setattr(main, "health_prober", _prober(_down))
+    resp = TestClient(main.app).get("/health/ready")
+    assert resp.status_code == 503
+    body = resp.json()
+    assert body["ready"] is False
+    assert body["failing"] == ["mcp"]
+    assert body["components"]["mcp"]["status"] == "error"
+
+
+def test_ready_endpoint_returns_200_when_critical_probes_pass(monkeypatch):
+    monkeypatch.setattr(main, "health_prober", _prober(_healthy))
+    resp = TestClient(main.app).get("/health/ready")
+    assert resp.status_code == 200
+    assert resp.json()["ready"] is True
@@ -0,0 +1,82 @@
+# backend/tests/test_image_jobs.py
+import asyncio
+import time
+
+import pytest
+
+from api.gen.image_jobs import ImageJobQueue, RateLimitedError, SubmitRateLimiter
+
+
+async def _forever(prompt: str) -> str:
+    await asyncio.sleep(3600)
+    return ""
+
+
+def test_stop_fails_jobs_left_in_the_queue():
+    async def run():
+        queue = ImageJobQueue(workers=1, max_queue=8)
+        queue.runner = _forever
+        running, _ = queue.submit("a")
+        waiting, _ = queue.submit("b")
+        await asyncio.sleep(0.01)
+        assert (running.status, waiting.status) == ("running", "queued")
+
+        await queue.stop()
+        assert (running.status, waiting.status) == ("error", "error")
+        assert waiting.error == "image jobs stopped"
+        assert queue.stats()["queued"] == 0
+
+    asyncio.run(run())
+
+
+def test_prune_expires_stuck_jobs():
+    async def run():
+        queue = ImageJobQueue(workers=1, max_queue=8, timeout=10, ttl=60)
+        queue.runner = _forever
+        stuck, _ = queue.submit("a")
+        queued, _ = queue.submit("b")
+        stuck.created_at = queued.created_at = time.time() - 71
+        await asyncio.sleep(0.01)
+
+        fresh, deduplicated = queue.submit("b")  # prunes first
+        assert not deduplicated and fresh is not queued
+        assert stuck.id not in queue.jobs and queued.id not in queue.jobs
+        assert (stuck.status, queued.status) == ("error", "error")
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_rate_limiter_sliding_window(monkeypatch):
+    import api.gen.image_jobs as jobs_module
+
+    now = [1000.0]
+    monkeypatch.setattr(jobs_module.time, "time", lambda: now[0])
+    limiter = SubmitRateLimiter(limit=2, window=60)
+    limiter.check("a")
+    limiter.check("a")
+    limiter.check("b")
+    with pytest.raises(RateLimitedError) as e:
+        limiter.check("a")
+    assert e.value.retry_after == 60
+    now[0] += 60
+    limiter.check("a")
+
+
+def test_submit_endpoint_takes_selections_not_prompts(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api.gen import routes
+
+    app = FastAPI()
+    app.include_router(routes.router)
+    client = TestClient(app)
+    limiter = SubmitRateLimiter(limit=1)
+    limiter.check("testclient")
+    monkeypatch.setattr(routes, "image_job_limiter", limiter)
+
+    assert client.post("/gen/image-jobs", json={"prompt": "anything at all"}).status_code == 422
+    assert client.post("/gen/image-jobs", json={"selections": ["not-a-persona"]}).status_code == 400
+    limited = client.post("/gen/image-jobs", json={"selections": ["food"]})
+    assert limited.status_code == 429 and int(limited.headers["retry-after"]) > 0
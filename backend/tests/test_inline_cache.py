@@ -0,0 +1,91 @@
+# backend/tests/test_inline_cache.py
+import asyncio
+
+from starlette.responses import FileResponse, Response
+
+from api.gen import routes
+from api.gen.image_store import ImageStore
+from api.gen.inline_cache import InlineImageCache
+
+
+def test_lru_evicts_least_recently_used_past_max_items():
+    cache = InlineImageCache(max_bytes=1 << 20, max_items=2)
+    cache.put("a", b"1", "image/png")
+    cache.put("b", b"2", "image/png")
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", b"3", "image/png")
+
+    assert cache.get("b") is None
+    assert cache.get("a").data == b"1" and cache.get("c").data == b"3"
+    assert cache.stats()["evicted"] == 1
+
+
+def test_lru_evicts_until_under_the_byte_budget():
+    cache = InlineImageCache(max_bytes=10, max_items=100)
+    cache.put("a", b"x" * 4, "image/png")
+    cache.put("b", b"x" * 4, "image/png")
+    cache.put("c", b"x" * 8, "image/png")
+
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.bytes == 8
+    assert cache.stats()["evicted"] == 2
+
+
+def test_refresh_replaces_the_entry_and_its_bytes():
+    cache = InlineImageCache(max_bytes=100, max_items=10)
+    cache.put("a", b"x" * 10, "image/png")
+    cache.put("a", b"x" * 3, "image/webp")
+    assert cache.bytes == 3
+    assert cache.get("a").mime == "image/webp"
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    import api.gen.inline_cache as inline_module
+
+    now = [1000.0]
+    monkeypatch.setattr(inline_module.time, "time", lambda: now[0])
+    cache = InlineImageCache(max_bytes=100, max_items=10, ttl_sec=5)
+    cache.put("a", b"x", "image/png")
+    now[0] += 6
+
+    assert cache.get("a") is None
+    assert cache.bytes == 0
+    assert cache.stats()["expired"] == 1
+
+
+def test_image_over_the_budget_is_rejected():
+    cache = InlineImageCache(max_bytes=10, max_items=10)
+    cache.put("small", b"x" * 5, "image/png")
+    assert cache.put("big", b"x" * 11, "image/png") is False
+
+    assert cache.get("big") is None
+    assert cache.get("small") is not None  # rejection evicts nothing
+    assert cache.stats()["too_large"] == 1
+
+
+def test_over_budget_image_is_served_from_disk(tmp_path, monkeypatch):
+    store = ImageStore(tmp_path)
+    monkeypatch.setattr(routes, "IMAGES_DIR", tmp_path)
+    monkeypatch.setattr(routes, "image_store", store)
+    monkeypatch.setattr(routes, "_INLINE_CACHE", InlineImageCache(max_bytes=10, max_items=10))
+    monkeypatch.setenv("INLINE_BACKUP_TO_DISK", "false")
+
+    async def run():
+        big = await routes._inline_put(b"x" * 100, "image/png")
+        # The disk copy exists before the id is handed out, even with backups off
+        assert (tmp_path / f"{big}.png").read_bytes() == b"x" * 100
+        assert isinstance(await routes.get_inline_image(big), FileResponse)
+
+        small = await routes._inline_put(b"y", "image/png")
+        assert not (tmp_path / f"{small}.png").exists()
+        resp = await routes.get_inline_image(small)
+        assert not isinstance(resp, FileResponse) and resp.body == b"y"
+
+        missing = await routes.get_inline_image("0" * 64)
+        assert isinstance(missing, Response) and missing.status_code == 404
+
+    try:
+        asyncio.run(run())
+    finally:
+        store.close()
@@ -0,0 +1,18 @@
+# backend/tests/test_intent.py
+from api.ai.intent import KEYWORD_GROUPS, classify_intent, keyword_groups
+from bench.intent_bench import legacy_extract, load_corpus
+
+
+def test_matches_the_legacy_matcher_on_the_corpus():
+    for message in load_corpus():
+        match = classify_intent(message)
+        assert (match.tool_name, match.arguments) == legacy_extract(message), message
+
+
+def test_keyword_groups_equal_plain_substring_checks():
+    texts = [m.strip().lower() for m in load_corpus()]
+    # overlapping keywords: "ping"/"guide", "durum"/"my flights", contained ones: "mil" in "miles"
+    texts += ["pinguide", "durumy flights", "expiring miles", "uçuşlarım", "hesapnr", ""]
+    for text in texts:
+        expected = {group for group, kws in KEYWORD_GROUPS.items() if any(kw in text for kw in kws)}
+        assert keyword_groups(text) == expected, text
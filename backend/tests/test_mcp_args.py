@@ -0,0 +1,21 @@
+# backend/tests/test_mcp_args.py
+from bench.normalize_bench import CASES, compare
+from mcp_args import normalize_arguments
+
+
+def test_matches_the_legacy_if_chain():
+    for tool_name, arguments in CASES:
+        new, old, _ = compare(tool_name, arguments)
+        assert new == old, (tool_name, arguments)
+
+
+def test_airports_outside_the_old_map_get_their_country():
+    args = normalize_arguments("search_flights", {"origin": "IST", "destination": "NRT", "departureDate": "tomorrow"})
+    od = args["originDestinations"][0]
+    assert (od["originCountryCode"], od["destinationCountryCode"]) == ("TR", "JP")
+
+
+def test_arguments_are_not_mutated():
+    arguments = {"origin": "IST", "destination": "JFK", "passengers": [{"type": "adult", "count": 2}]}
+    normalize_arguments("search_flights", arguments)
+    assert arguments == {"origin": "IST", "destination": "JFK", "passengers": [{"type": "adult", "count": 2}]}
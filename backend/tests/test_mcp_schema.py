@@ -0,0 +1,41 @@
+# backend/tests/test_mcp_schema.py
+from mcp_schema import compile_schema
+
+
+def test_ecma_only_patterns_are_skipped():
+    validate = compile_schema({
+        "type": "object",
+        "required": ["city", "code"],
+        "properties": {
+            "city": {"type": "string", "pattern": r"^\p{L}+$"},
+            "code": {"type": "string", "minLength": 3, "pattern": r"^(?<iata>[A-Z]{3})$"},
+            "pnr": {"type": "string", "pattern": r"^[A-Z0-9]{6}$"},
+        },
+    })
+
+    # The unsupported patterns are ignored, the other constraints still apply
+    assert validate({"city": "İstanbul", "code": "ist"}) == []
+    assert validate({"city": "İstanbul", "code": "IS"}) == ["code: shorter than 3"]
+    assert validate({"city": 1, "code": "IST"}) == ["city: expected string, got int"]
+    assert validate({"city": "Ankara", "code": "ESB", "pnr": "ab"}) == ["pnr: does not match ^[A-Z0-9]{6}$"]
+
+
+def test_integral_floats_are_coerced_for_integer_fields():
+    validate = compile_schema({
+        "type": "object",
+        "properties": {
+            "passengers": {"type": "integer", "minimum": 1},
+            "seats": {"type": "array", "items": {"type": "integer"}},
+            "price": {"type": "number"},
+        },
+    })
+
+    args = {"passengers": 2.0, "seats": [12.0, 14], "price": 99.0}
+    assert validate(args) == []
+    assert args == {"passengers": 2, "seats": [12, 14], "price": 99.0}
+    assert type(args["passengers"]) is int and type(args["seats"][0]) is int
+    assert type(args["price"]) is float
+
+    assert validate({"passengers": 2.5}) == ["passengers: expected integer, got float"]
+    assert validate({"passengers": 0.0}) == ["passengers: below minimum 1"]
+    assert validate({"passengers": True}) == ["passengers: expected integer, got bool"]
@@ -0,0 +1,214 @@
+# backend/tests/test_mcp_session.py
+import asyncio
+import json
+
+import pytest
+
+from mcp_client import MCPToolError, MCPTransientError, TurkishAirlinesMCPClient
+
+
+class FakeResponse:
+    def __init__(self, status: int = 200, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self.released = False
+
+    async def text(self):
+        return ""
+
+    def release(self):
+        self.released = True
+
+
+class FakeRequest:
+    """Awaitable and async context manager, like aiohttp's request context manager"""
+
+    def __init__(self, response: FakeResponse):
+        self.response = response
+
+    def __await__(self):
+        async def resolve():
+            return self.response
+        return resolve().__await__()
+
+    async def __aenter__(self):
+        return self.response
+
+    async def __aexit__(self, *exc):
+        self.response.release()
+
+
+class SSEResponse(FakeResponse):
+    """200 text/event-stream response delivering `chunks` one read at a time"""
+
+    def __init__(self, chunks):
+        super().__init__(headers={"content-type": "text/event-stream"})
+        self.content = self
+        self.chunks = chunks
+
+    async def iter_any(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class FakeSession:
+    """
+    initialize hands out s1, s2, ... (or fails while init_status != 200); other posts
+    answer 200, or whatever `answer(body)` returns when set
+    """
+    closed = False
+
+    def __init__(self):
+        self.posts = []
+        self.inits = 0
+        self.init_status = 200
+        self.expired = set()
+        self.answer = None
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        self.posts.append({"json": json, "headers": headers or {}, **kwargs})
+        if isinstance(json, dict) and json["method"] == "initialize":
+            self.inits += 1
+            if self.init_status != 200:
+                return FakeRequest(FakeResponse(self.init_status))
+            return FakeRequest(FakeResponse(headers={"mcp-session-id": f"s{self.inits}"}))
+        if (headers or {}).get("mcp-session-id") in self.expired:
+            return FakeRequest(FakeResponse(404))
+        if self.answer is not None:
+            return FakeRequest(self.answer(json))
+        return FakeRequest(FakeResponse())
+
+
+def _client(pool_size: int = 1) -> TurkishAirlinesMCPClient:
+    client = TurkishAirlinesMCPClient(server_url="http://127.0.0.1:1/mcp", auth_token="test", pool_size=pool_size)
+    client.session = FakeSession()
+    client._connected = True
+    client._slots[0].session_id = "s0"
+    return client
+
+
+def _session_ids(client) -> list:
+    return [p["headers"].get("mcp-session-id") for p in client.session.posts
+            if isinstance(p["json"], list) or p["json"]["method"] != "initialize"]
+
+
+def test_post_without_override_keeps_the_session_timeout():
+    async def run():
+        client = _client()
+        async with client._post({"method": "tools/list"}):
+            pass
+        async with client._post({"method": "tools/call"}, timeout=5):
+            pass
+        default, override = client.session.posts
+        assert "timeout" not in default
+        assert override["timeout"].total == 5 and override["timeout"].connect == 10
+
+    asyncio.run(run())
+
+
+def test_pooled_slots_are_initialized_once_and_reused():
+    async def run():
+        client = _client(pool_size=2)
+        async with client._post({"method": "tools/call"}):
+            # slot 0 is busy: the second call initializes slot 1
+            async with client._post({"method": "tools/call"}):
+                pass
+        for _ in range(3):
+            async with client._post({"method": "tools/call"}):
+                pass
+        assert client.session.inits == 1
+        assert _session_ids(client) == ["s0", "s1", "s0", "s0", "s0"]
+        assert [s.in_flight for s in client._slots] == [0, 0]
+
+    asyncio.run(run())
+
+
+def test_expired_session_is_reinitialized_and_the_call_retried_once():
+    async def run():
+        client = _client()
+        client.session.expired.add("s0")
+        async with client._post({"method": "tools/call"}) as response:
+            assert response.status == 200
+        assert client.session.inits == 1
+        assert _session_ids(client) == ["s0", "s1"]
+        assert client._slots[0].session_id == "s1" and client._slots[0].generation == 1
+
+    asyncio.run(run())
+
+
+def test_failed_pooled_slot_backs_off():
+    async def run():
+        client = _client(pool_size=2)
+        client.session.init_status = 500
+        async with client._post({"method": "tools/call"}):
+            async with client._post({"method": "tools/call"}):
+                pass
+            # slot 1 failed: skipped during its backoff instead of initializing again
+            async with client._post({"method": "tools/call"}):
+                pass
+        assert client.session.inits == 1
+        assert client._slots[1].init_failures == 1 and client._slots[1].retry_at > 0
+
+        client._slots[1].retry_at = 0.0
+        client.session.init_status = 200
+        async with client._post({"method": "tools/call"}):
+            async with client._post({"method": "tools/call"}):
+                pass
+        assert client.session.inits == 2
+        assert client._slots[1].session_id == "s2" and client._slots[1].init_failures == 0
+
+    asyncio.run(run())
+
+
+def _sse(message) -> bytes:
+    return f"event: message\ndata: {json.dumps(message)}\n\n".encode()
+
+
+def test_batch_responses_are_matched_to_calls_by_id():
+    async def run():
+        client = _client()
+
+        def answer(body):
+            assert isinstance(body, list) and len(body) == 3
+            replies = [
+                {"jsonrpc": "2.0", "id": p["id"], "result": {"tool": p["params"]["name"]}}
+                if p["params"]["name"] != "broken" else
+                {"jsonrpc": "2.0", "id": p["id"], "error": {"message": "boom"}}
+                for p in body
+            ]
+            # Reversed, with a notification and a stale id in between, split mid-event
+            stream = b"".join([
+                _sse(replies[2]),
+                _sse({"jsonrpc": "2.0", "method": "notifications/progress", "params": {}}),
+                _sse({"jsonrpc": "2.0", "id": 999999, "result": {"tool": "stale"}}),
+                _sse(replies[1]),
+                _sse(replies[0]),
+            ])
+            return SSEResponse([stream[:37], stream[37:150], stream[150:]])
+
+        client.session.answer = answer
+        results = await client.call_tools_batch([("first", {}), ("broken", {}), ("third", {})])
+
+        assert results[0] == {"tool": "first"}
+        assert isinstance(results[1], MCPToolError) and "boom" in str(results[1])
+        assert results[2] == {"tool": "third"}
+        assert client.batch_supported is True
+        assert client._pending == {}
+
+    asyncio.run(run())
+
+
+def test_batch_missing_a_reply_is_a_transient_error():
+    async def run():
+        client = _client()
+
+        def answer(body):
+            return SSEResponse([_sse({"jsonrpc": "2.0", "id": body[0]["id"], "result": {}})])
+
+        client.session.answer = answer
+        payloads = [client._new_request("tools/call", {"name": n}) for n in ("a", "b")]
+        with pytest.raises(MCPTransientError, match="No result"):
+            await client._send(payloads)
+        assert client._pending == {}
+
+    asyncio.run(run())
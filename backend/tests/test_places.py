@@ -0,0 +1,33 @@
+# backend/tests/test_places.py
+import random
+
+from api.gen.routes import PlaceCandidate, _mk_candidates_from_mapbox, _rank_candidates
+from bench.places_bench import (SCENARIOS, USER, _as_tuples, legacy_mk_candidates, legacy_rank,
+                                make_candidates, make_features)
+
+
+def test_candidate_extraction_matches_the_legacy_scan():
+    rng = random.Random(7)
+    for n in (0, 50, 400):
+        features = make_features(n, rng)
+        for wanted in (["food", "culture"], ["history", "shopping", "seaside"], []):
+            assert _as_tuples(_mk_candidates_from_mapbox(features, wanted)) == \
+                _as_tuples(legacy_mk_candidates(features, wanted)), (n, wanted)
+
+
+def test_ranking_matches_the_legacy_loop():
+    rng = random.Random(11)
+    for n in (0, 1, 30, 500):
+        cands = make_candidates(n, rng)
+        for wanted, radius in SCENARIOS + [([], 2.0), (["food"], 50.0)]:
+            for k in (1, 2, 10):
+                call = (USER[0], USER[1], cands, wanted, radius, k)
+                assert _rank_candidates(*call) == legacy_rank(*call), (n, wanted, radius, k)
+
+
+def test_ties_keep_the_legacy_order():
+    # Same spot, same tags: only input order separates them, as with the old stable sort
+    cands = [PlaceCandidate(f"Yer {i}", USER[0] + 0.001, USER[1], ["food"]) for i in range(6)]
+    for radius in (5.0, 0.0, 0.01):
+        call = (USER[0], USER[1], cands, ["food"], radius, 3)
+        assert _rank_candidates(*call) == legacy_rank(*call)
@@ -0,0 +1,43 @@
+# backend/tests/test_poi_index.py
+import random
+
+import pytest
+
+from api.gen import poi_index as poi_module
+from api.gen.poi_index import POIIndex, persona_mask, write_index
+
+CATEGORIES = ["restaurant", "museum", "park", "beach", "shop", "bar", "historic", "cinema", "office"]
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    rng = random.Random(3)
+    pois = []
+    for k in range(6000):
+        if k % 3:
+            lat, lon = rng.gauss(41.0, 0.3), rng.gauss(29.0, 0.3)
+        else:
+            lat, lon = rng.uniform(36, 42), rng.uniform(26, 45)
+        pois.append((f"poi {k}", lat, lon, ", ".join(rng.sample(CATEGORIES, 2))))
+    path = tmp_path_factory.mktemp("poi") / "index.bin"
+    write_index(pois, str(path))
+    idx = POIIndex(str(path))
+    assert idx.available()
+    return idx
+
+
+def _brute_force(idx, lat, lon, personas, limit):
+    ids = idx._nearest(range(idx.count), lat, lon, limit, mask=persona_mask(personas))
+    return [idx.feature(i) for i in ids]
+
+
+CASES = [(41.0, 29.0, ["food"]), (39.0, 35.0, ["seaside"]), (37.5, 44.0, ["history", "culture"]),
+         (45.0, 20.0, ["nature"]), (41.2, 29.1, ["food", "entertainment", "shopping"])]
+
+
+@pytest.mark.parametrize("scan_max", [0, 10 ** 9], ids=["rings", "postings"])
+def test_nationwide_persona_query_is_exact(index, monkeypatch, scan_max):
+    monkeypatch.setattr(poi_module, "POSTINGS_SCAN_MAX", scan_max)
+    for lat, lon, personas in CASES:
+        for limit in (1, 25, 200):
+            assert index.nationwide(lat, lon, personas, limit) == _brute_force(index, lat, lon, personas, limit)
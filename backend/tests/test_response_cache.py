@@ -0,0 +1,94 @@
+# backend/tests/test_response_cache.py
+import asyncio
+
+from api.ai.response_cache import ResponseCache
+
+
+async def _same_vector(text: str):
+    # Worst case for the semantic layer: every message embeds identically
+    return [1.0, 0.0, 0.0]
+
+
+def _cache() -> ResponseCache:
+    return ResponseCache(similarity_threshold=0.92, embed_fn=_same_vector)
+
+
+def test_near_identical_flight_numbers_do_not_share_answers():
+    async def run():
+        cache = _cache()
+        ns = ResponseCache.namespace_for(True, 0.2)
+        probe = await cache.lookup("TK1234 uçuşum ne zaman", ns)
+        cache.store(probe, {"reply": "TK1234 14:05'te kalkıyor"}, ["get_flight_status_by_number"])
+
+        other = await cache.lookup("TK1243 uçuşum ne zaman", ns)
+        assert other.entry is None
+        assert other.embedding is None
+
+        same = await cache.lookup("tk1234 uçuşum ne zaman?", ns)
+        assert same.layer == "exact"
+
+    asyncio.run(run())
+
+
+def test_pnr_queries_do_not_share_answers():
+    async def run():
+        cache = _cache()
+        ns = ResponseCache.namespace_for(True, 0.2)
+        probe = await cache.lookup("rezervasyonum ABC123 detayları", ns)
+        cache.store(probe, {"reply": "ABC123: İstanbul - Ankara"}, ["get_booking_details"])
+        assert (await cache.lookup("rezervasyonum xyz789 detayları", ns)).entry is None
+
+    asyncio.run(run())
+
+
+def test_entity_free_messages_still_match_semantically():
+    async def run():
+        cache = _cache()
+        ns = ResponseCache.namespace_for(True, 0.2)
+        probe = await cache.lookup("bagaj hakkım ne kadar", ns)
+        cache.store(probe, {"reply": "Ekonomi sınıfında 20 kg"})
+        hit = await cache.lookup("bagaj hakkım ne kadardır", ns)
+        assert hit.layer == "semantic"
+
+    asyncio.run(run())
+
+
+def test_flight_intents_without_codes_are_exact_only():
+    async def run():
+        cache = _cache()
+        ns = ResponseCache.namespace_for(True, 0.2)
+        probe = await cache.lookup("istanbul ankara uçuş", ns)
+        assert probe.entities == () and probe.embedding is None
+        cache.store(probe, {"reply": "İstanbul - Ankara: 07:00, 09:30"}, ["search_flights"])
+
+        other = await cache.lookup("istanbul izmir uçuş", ns)
+        assert other.entry is None
+        assert (await cache.lookup("Istanbul Ankara uçuş?", ns)).layer == "exact"
+
+    asyncio.run(run())
+
+
+def test_large_semantic_scan_runs_off_the_loop(monkeypatch):
+    import api.ai.response_cache as rc
+
+    calls = []
+    real_to_thread = asyncio.to_thread
+
+    async def spy(fn, *args):
+        calls.append(fn)
+        return await real_to_thread(fn, *args)
+
+    monkeypatch.setattr(rc.asyncio, "to_thread", spy)
+    monkeypatch.setattr(rc, "SEMANTIC_INLINE_MAX", 2)
+
+    async def run():
+        cache = _cache()
+        ns = ResponseCache.namespace_for(True, 0.2)
+        for word in ("bir", "iki", "üç"):
+            probe = await cache.lookup(f"promosyonlar hakkında bilgi sayfa {word}", ns)
+            cache.store(probe, {"reply": f"cevap {word}"})
+        assert calls == []
+        hit = await cache.lookup("kampanyalar hakkında bilgi", ns)
+        assert hit.layer == "semantic" and calls == [rc._nearest]
+
+    asyncio.run(run())
@@ -0,0 +1,26 @@
+# backend/tests/test_sse_decoder.py
+from mcp_client import SSEDecoder
+
+
+STREAM = b'event: message\r\ndata: {"id": 1,\r\ndata: "result": {}}\r\n\r\n: keep-alive\n\ndata: {"id": 2}\n\n'
+EXPECTED = [b'{"id": 1,\n"result": {}}', b'{"id": 2}']
+
+
+def test_events_split_across_chunks():
+    for size in (1, 2, 3, 7, len(STREAM)):
+        decoder = SSEDecoder()
+        events = []
+        for i in range(0, len(STREAM), size):
+            events += decoder.feed(STREAM[i:i + size])
+        events += decoder.close()
+        assert events == EXPECTED, size
+
+
+def test_long_line_in_small_chunks_is_not_rescanned():
+    decoder = SSEDecoder()
+    payload = b"x" * 50_000
+    for i in range(0, len(payload), 16):
+        assert decoder.feed((b"data: " if i == 0 else b"") + payload[i:i + 16]) == []
+        assert decoder._scanned == len(decoder._buf)
+    assert decoder.feed(b"\n\n") == [payload]
+    assert decoder._scanned == 0
@@ -0,0 +1,249 @@
+# tracing.py
+"""
+Lightweight request tracing (OpenTelemetry-style spans, no SDK needed)
+
+Spans live in a contextvar, so nested `with start_span(...)` blocks build a
+tree per request across awaits. The W3C `traceparent` header carries the
+trace over loopback calls (/plan -> /traffic/*) and to the MCP server; it is
+never sent to third-party APIs.
+
+Exporters (TRACE_EXPORTERS, comma separated):
+  memory   - last TRACE_MEMORY_MAX traces, served at /debug/traces (admin)
+  console  - one log line per finished span (DEBUG)
+  file     - JSON lines in TRACE_FILE, written by a background thread
+"""
+
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+TRACE_EXPORTERS = [e.strip() for e in os.getenv("TRACE_EXPORTERS", "memory").split(",") if e.strip()]
+TRACE_MEMORY_MAX = int(os.getenv("TRACE_MEMORY_MAX", "200"))
+TRACE_FILE = os.getenv("TRACE_FILE", "logs/traces.jsonl")
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass(slots=True)
+class Span:
+    """One timed operation; times are perf_counter_ns-based, wall clock kept for display"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_wall: float = 0.0
+    start_ns: int = 0
+    end_ns: Optional[int] = None
+    status: str = "ok"
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return round((self.end_ns - self.start_ns) / 1e6, 3)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start_wall,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+# ---------------------------------------------------------------- exporters
+
+class InMemoryExporter:
+    """Keeps the spans of the most recent traces, grouped by trace id"""
+
+    def __init__(self, max_traces: int = TRACE_MEMORY_MAX):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+
+    def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            spans = list(self._traces.get(trace_id, ()))
+        return [s.to_dict() for s in sorted(spans, key=lambda s: s.start_ns)]
+
+    def recent(self, limit: int = 50, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """Root span summary of recent traces, newest first"""
+        with self._lock:
+            traces = list(self._traces.items())
+        out = []
+        for trace_id, spans in reversed(traces):
+            # Root = the span whose parent is not in this process' part of the trace
+            ids = {s.span_id for s in spans}
+            root = next((s for s in spans if s.parent_id not in ids), spans[0])
+            if (root.duration_ms or 0.0) < min_ms:
+                continue
+            out.append({
+                "trace_id": trace_id,
+                "name": root.name,
+                "start": root.start_wall,
+                "duration_ms": root.duration_ms,
+                "status": root.status,
+                "spans": len(spans),
+            })
+            if len(out) >= limit:
+                break
+        return out
+
+
+class ConsoleExporter:
+    def export(self, span: Span):
+        logger.debug(f"🧵 {span.name} {span.duration_ms}ms trace={span.trace_id[:8]} status={span.status}")
+
+
+class FileExporter:
+    """JSON lines, written off the event loop by a daemon thread"""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Span]" = queue.SimpleQueue()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        threading.Thread(target=self._writer, name="trace-file-exporter", daemon=True).start()
+
+    def export(self, span: Span):
+        self._queue.put(span)
+
+    def _writer(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < 256:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in batch))
+            except Exception as e:
+                logger.warning(f"Trace file export failed: {e}")
+
+
+memory_exporter = InMemoryExporter()
+_exporters: list = []
+if TRACING_ENABLED:
+    for name in TRACE_EXPORTERS:
+        if name == "memory":
+            _exporters.append(memory_exporter)
+        elif name == "console":
+            _exporters.append(ConsoleExporter())
+        elif name == "file":
+            _exporters.append(FileExporter())
+        else:
+            logger.warning(f"Unknown trace exporter: {name}")
+
+
+def _export(span: Span):
+    for exporter in _exporters:
+        try:
+            exporter.export(span)
+        except Exception as e:
+            logger.warning(f"Trace export failed: {e}")
+
+
+# ---------------------------------------------------------------- API
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[tuple]:
+    """traceparent header -> (trace_id, parent_span_id) or None"""
+    if not value:
+        return None
+    m = _TRACEPARENT_RE.match(value.strip().lower())
+    if not m or m.group(1) == "0" * 32 or m.group(2) == "0" * 16:
+        return None
+    return m.group(1), m.group(2)
+
+
+@contextmanager
+def start_span(name: str, traceparent: Optional[str] = None, **attributes):
+    """
+    Open a span as a child of the current one (or of an incoming traceparent,
+    or as a new trace). Exceptions mark the span as errored and propagate.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+    parent = _current_span.get()
+    remote = parse_traceparent(traceparent) if parent is None else None
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    elif remote:
+        trace_id, parent_id = remote
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    span = Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_id=parent_id,
+        attributes=attributes,
+        start_wall=time.time(),
+        start_ns=time.perf_counter_ns(),
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.error = f"{type(e).__name__}: {str(e)[:200]}"
+        raise
+    finally:
+        span.end_ns = time.perf_counter_ns()
+        _current_span.reset(token)
+        _export(span)
+
+
+def inject_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Return headers with the current span's traceparent added.
+    First-party calls only (MCP server, /plan loopback): third-party APIs
+    (Mapbox, OpenAI, Gemini) must not receive our trace ids.
+    """
+    headers = dict(headers or {})
+    span = _current_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent()
+    return headers